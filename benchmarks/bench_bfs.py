@@ -0,0 +1,120 @@
+"""
+Bidirectional BFS benchmark: time and memory per shortest-path query.
+
+    # on a full graph built from the dumps (the number that matters)
+    python benchmarks/bench_bfs.py --graph ~/.cache/wikigame/graph --queries 200
+
+    # on a generated power-law graph when no dump is at hand
+    python benchmarks/bench_bfs.py --synthetic-nodes 2000000 --avg-degree 40
+
+Random (source, target) pairs are drawn with a fixed seed. Reports latency
+percentiles, visited nodes / scanned edges per query, peak traced memory of
+a query and the process peak RSS (which includes touched mmap pages).
+"""
+import argparse
+import json
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from bidirectional_bfs import shortest_path  # noqa: E402
+from build_link_graph import csr_from_edges, write_graph  # noqa: E402
+from link_graph import LinkGraph  # noqa: E402
+
+
+def synthetic_graph(directory: str, nodes: int, avg_degree: int, seed: int):
+    """Half of the links point at a few hub pages (power law), half are uniform."""
+    rng = np.random.default_rng(seed)
+    edges = nodes * avg_degree
+    src = rng.integers(0, nodes, edges, dtype=np.int64)
+    dst = rng.integers(0, nodes, edges, dtype=np.int64)
+    hub = rng.random(edges) < 0.5
+    ranks = np.minimum((rng.pareto(1.2, int(hub.sum())) * nodes / 50).astype(np.int64), nodes - 1)
+    dst[hub] = rng.permutation(nodes)[ranks]  # hubs spread over the title order
+
+    offsets, targets = csr_from_edges(nodes, src, dst)
+    width = len(str(nodes))
+    titles = [f"Page_{i:0{width}d}".encode("ascii") for i in range(nodes)]
+    write_graph(directory, "en", titles, np.arange(nodes), offsets, targets, source="synthetic")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--graph", help="graph directory built by build_link_graph.py")
+    parser.add_argument("--synthetic-nodes", type=int, default=200000)
+    parser.add_argument("--avg-degree", type=int, default=30)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write results to this JSON file")
+    args = parser.parse_args()
+
+    tmp = None
+    graph_dir = args.graph
+    if not graph_dir:
+        tmp = tempfile.TemporaryDirectory()
+        graph_dir = tmp.name
+        start = time.perf_counter()
+        synthetic_graph(graph_dir, args.synthetic_nodes, args.avg_degree, args.seed)
+        print(f"built synthetic graph in {time.perf_counter() - start:.1f}s")
+
+    start = time.perf_counter()
+    graph = LinkGraph(graph_dir)
+    load_ms = (time.perf_counter() - start) * 1000
+    print(f"graph: {graph.num_nodes} nodes, {graph.num_edges} edges, mapped in {load_ms:.1f} ms")
+
+    rng = np.random.default_rng(args.seed + 1)
+    pairs = rng.integers(0, graph.num_nodes, size=(args.queries, 2))
+
+    times, visited, scanned, hops, peaks = [], [], [], [], []
+    for source, target in pairs:
+        tracemalloc.start()
+        result = shortest_path(graph, int(source), int(target))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        times.append(result.seconds * 1000)
+        visited.append(result.visited)
+        scanned.append(result.edges_scanned)
+        peaks.append(peak / 1024 / 1024)
+        if result.found:
+            hops.append(len(result.path) - 1)
+
+    times.sort()
+    summary = {
+        "nodes": graph.num_nodes,
+        "edges": graph.num_edges,
+        "load_ms": load_ms,
+        "queries": len(pairs),
+        "found": len(hops),
+        "ms_mean": statistics.mean(times),
+        "ms_p50": times[len(times) // 2],
+        "ms_p95": times[int(len(times) * 0.95) - 1],
+        "ms_max": times[-1],
+        "visited_mean": statistics.mean(visited),
+        "edges_scanned_mean": statistics.mean(scanned),
+        "hops_mean": statistics.mean(hops) if hops else None,
+        "query_peak_mb_max": max(peaks),
+        "rss_peak_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+    for key, value in summary.items():
+        print(f"{key:<20} {value:.2f}" if isinstance(value, float) else f"{key:<20} {value}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+
+    if tmp is not None:
+        tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Encoder backends: ranking parity against a reference and CPU throughput.
+
+    python src/encoders.py --export                              # once, for the onnx backend
+    python benchmarks/bench_encoders.py                          # torch vs onnx, built-in anchor sets
+    python benchmarks/bench_encoders.py --threads 1 2 4 --batch 1 32 256
+
+Parity: for every (query, anchor set), the link each backend would pick and
+the ranking of all anchors are compared with the reference backend. Reported
+are top-1 agreement (the greedy racers' decision), top-5 overlap, Spearman
+rank correlation and the largest cosine difference. Anchor sets come from
+the built-in list plus any recorded article HTML in benchmarks/fixtures/html
+(see bench_link_extractor.py --record), using the page title as query.
+
+Throughput: texts per second over the anchors at each batch size and thread
+count, after a warm-up call. Exits 1 when top-1 agreement of a candidate is
+below --min-top1.
+"""
+import argparse
+import glob
+import json
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "html")
+
+# (query, anchors) in the shape of a race step: a target description against
+# the anchor texts of one page
+ANCHOR_SETS = [
+    ("Bhupalpally, a town in Telangana, India", [
+        "Telangana", "Andhra Pradesh", "Hyderabad", "Warangal", "Godavari River", "Indian National Congress",
+        "Bollywood", "Mumbai", "Monsoon", "Cricket", "Jayashankar Bhupalpally district", "Coal mining",
+        "Singareni Collieries", "Census of India", "Hindi", "Telugu language", "Kakatiya dynasty",
+    ]),
+    ("England, a country that is part of the United Kingdom", [
+        "United Kingdom", "London", "Scotland", "Wales", "Great Britain", "Anglo-Saxons", "Norman conquest",
+        "Premier League", "Church of England", "France", "English Channel", "Parliament", "Tudor period",
+        "Industrial Revolution", "Germany", "Thames", "Commonwealth of Nations",
+    ]),
+    ("Photosynthesis in plants and algae", [
+        "Chlorophyll", "Carbon dioxide", "Sunlight", "Oxygen", "Glucose", "Chloroplast", "Calvin cycle",
+        "Cellular respiration", "Algae", "Cyanobacteria", "Stomata", "Water", "ATP", "Leaf", "Ecology",
+        "Greenhouse gas", "Mitochondrion",
+    ]),
+    ("Albert Einstein, theoretical physicist", [
+        "Theory of relativity", "Physics", "Nobel Prize in Physics", "Princeton University", "Germany",
+        "Quantum mechanics", "Photoelectric effect", "E=mc2", "Zurich", "Isaac Newton", "Manhattan Project",
+        "Brownian motion", "Switzerland", "Patent office", "Niels Bohr", "Violin", "Zionism",
+    ]),
+    ("The Python programming language", [
+        "Guido van Rossum", "Programming language", "Java (programming language)", "C (programming language)",
+        "Snake", "Monty Python", "Interpreter (computing)", "Garbage collection", "Dynamic typing",
+        "NumPy", "Open-source software", "Linux", "Indentation style", "Perl", "Machine learning",
+        "Software license", "Object-oriented programming",
+    ]),
+    ("Mount Everest, the highest mountain on Earth", [
+        "Himalayas", "Nepal", "Tibet", "China", "Sherpa people", "Tenzing Norgay", "Edmund Hillary",
+        "K2", "Mountaineering", "Sea level", "Death zone", "Oxygen", "Kathmandu", "Glacier",
+        "Andes", "Alps", "Plate tectonics",
+    ]),
+]
+
+
+def fixture_sets(directory: str):
+    from link_extractor import extract_links_lxml
+
+    sets = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.html"))):
+        with open(path, "rb") as f:
+            html = f.read().decode("utf-8", errors="replace")
+        anchors = list(dict.fromkeys(
+            text for text, _ in extract_links_lxml(html, lambda href: href.startswith("/wiki/")) if text.strip()
+        ))
+        if len(anchors) >= 5:
+            sets.append((os.path.basename(path)[:-5].replace("_", " "), anchors))
+    return sets
+
+
+def _ranks(values: np.ndarray) -> np.ndarray:
+    ranks = np.empty(len(values))
+    ranks[np.argsort(values)] = np.arange(len(values))
+    return ranks
+
+
+def parity(reference, candidate, sets, k: int = 5) -> dict:
+    top1, overlap, spearman, max_diff = [], [], [], 0.0
+    for query, anchors in sets:
+        scores = []
+        for encoder in (reference, candidate):
+            embs = encoder.encode([query] + anchors)
+            scores.append(embs[1:] @ embs[0])
+        ref, cand = scores
+        top1.append(int(np.argmax(ref) == np.argmax(cand)))
+        kk = min(k, len(anchors))
+        overlap.append(len(set(np.argsort(-ref)[:kk]) & set(np.argsort(-cand)[:kk])) / kk)
+        spearman.append(float(np.corrcoef(_ranks(ref), _ranks(cand))[0, 1]))
+        max_diff = max(max_diff, float(np.abs(ref - cand).max()))
+    return {
+        "sets": len(sets),
+        "top1_agreement": statistics.mean(top1),
+        f"top{k}_overlap": statistics.mean(overlap),
+        "spearman": statistics.mean(spearman),
+        "max_score_diff": max_diff,
+    }
+
+
+def throughput(encoder, texts, batch: int, seconds: float) -> float:
+    encoder.encode(texts[:batch])  # warm-up
+    done, start = 0, time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        for i in range(0, len(texts), batch):
+            encoder.encode(texts[i:i + batch])
+        done += len(texts)
+    return done / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reference", default="torch")
+    parser.add_argument("--backends", nargs="+", default=["torch", "onnx"])
+    parser.add_argument("--fixtures", default=FIXTURE_DIR)
+    parser.add_argument("--threads", nargs="+", type=int, default=[0], help="encoder threads (0 = runtime default)")
+    parser.add_argument("--batch", nargs="+", type=int, default=[1, 32, 256])
+    parser.add_argument("--seconds", type=float, default=3.0, help="time per throughput measurement")
+    parser.add_argument("--min-top1", type=float, default=0.9, help="required top-1 agreement with the reference")
+    parser.add_argument("--json", help="write results to this JSON file")
+    args = parser.parse_args()
+
+    from encoders import ENCODERS
+
+    sets = ANCHOR_SETS + fixture_sets(args.fixtures)
+    texts = [query for query, _ in sets] + [a for _, anchors in sets for a in anchors]
+    print(f"{len(sets)} anchor sets, {len(texts)} texts")
+
+    results = {"parity": {}, "throughput": []}
+    failed = []
+    for threads in args.threads:
+        encoders = {name: ENCODERS[name](threads=threads) for name in dict.fromkeys([args.reference] + args.backends)}
+        reference = encoders[args.reference]
+
+        if threads == args.threads[0]:
+            print(f"\n{'backend':<8} {'top1':>6} {'top5':>6} {'spearman':>9} {'max diff':>9}")
+            for name, encoder in encoders.items():
+                if name == args.reference:
+                    continue
+                p = parity(reference, encoder, sets)
+                results["parity"][name] = p
+                print(f"{name:<8} {p['top1_agreement']:6.1%} {p['top5_overlap']:6.1%} "
+                      f"{p['spearman']:9.3f} {p['max_score_diff']:9.4f}")
+                if p["top1_agreement"] < args.min_top1:
+                    failed.append(f"{name}: top-1 agreement {p['top1_agreement']:.1%} < {args.min_top1:.0%}")
+
+        print(f"\n{'backend':<8} {'threads':>7} " + " ".join(f"{'batch ' + str(b):>10}" for b in args.batch) + "  (texts/s)")
+        for name, encoder in encoders.items():
+            rates = [throughput(encoder, texts, batch, args.seconds) for batch in args.batch]
+            results["throughput"].append({"backend": name, "threads": threads, "texts_per_s": dict(zip(args.batch, rates))})
+            print(f"{name:<8} {threads or 'auto':>7} " + " ".join(f"{rate:10.0f}" for rate in rates))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if failed:
+        print("\nParity check failed:\n  " + "\n  ".join(failed))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,419 @@
+"""
+End-to-end navigation benchmark: offline, deterministic, comparable to a baseline.
+
+    # synthetic topical wiki rendered as MediaWiki HTML by wiki_server.py, hash encoder (no model needed)
+    python benchmarks/bench_engine.py --json bench.json
+
+    # compare with a stored run; exits 1 on a regression
+    python benchmarks/bench_engine.py --baseline bench.json
+
+    # recorded article HTML instead (see bench_link_extractor.py --record)
+    python benchmarks/bench_engine.py --fixtures benchmarks/fixtures/html --pairs pairs.json
+
+    # the real SentenceTransformer (must already be in the local model cache)
+    python benchmarks/bench_engine.py --encoder model
+
+Every strategy runs the same seeded (start, target) pairs in its own process,
+with the page cache, prefetch, summary index and network disabled. Per
+strategy it reports success rate, steps and pages fetched, race wall time,
+time spent in each stage (fetch, parse, encode, score; exclusive, summed over
+threads) and the process peak RSS. Timings are the fastest of --repeat
+rounds. With the hash encoder, paths, steps and page counts are identical
+from run to run, so only the timings may move.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from urllib.parse import quote, unquote, urlparse
+
+import numpy as np
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC)
+
+# "async" is greedy-context on the asyncio engine (AsyncWikipediaGame)
+STRATEGIES = ["greedy-title", "greedy-context", "beam", "async"]
+
+# Latency metrics compared against --baseline (relative), and metrics that
+# must not get worse at all
+TIMED = ["wall_ms_p50", "wall_ms_p95", "fetch_ms", "parse_ms", "encode_ms", "score_ms"]
+EXACT = {"solved": "higher", "pages_fetched": "lower", "steps_mean": "lower"}
+
+
+# --------------------------------------------------------------------
+# Stage timing: exclusive time per stage, nested stages subtracted
+# --------------------------------------------------------------------
+class StageTimer:
+    def __init__(self):
+        self.seconds = defaultdict(float)
+        self.calls = defaultdict(int)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        stack.append(0.0)  # time of nested stages
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            nested = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            with self._lock:
+                self.seconds[name] += elapsed - nested
+                self.calls[name] += 1
+
+
+TIMER = StageTimer()
+
+
+def hash_encode(texts):
+    """Deterministic bag-of-words vectors; measures the pipeline, not the model."""
+    out = np.zeros((len(texts), 256), dtype=np.float32)
+    for i, text in enumerate(texts):
+        for word in text.lower().split():
+            out[i, int.from_bytes(hashlib.blake2b(word.encode("utf-8"), digest_size=4).digest(), "little") % 256] += 1
+    out /= np.maximum(np.linalg.norm(out, axis=1, keepdims=True), 1e-12)
+    return out
+
+
+class BenchSelector:
+    """GetSimilarWord's encode interface over a fresh in-memory embedding cache."""
+
+    def __init__(self, encode_fn, model_name: str):
+        from embedding_cache import EmbeddingCache
+        self.encode_fn = encode_fn
+        self.cache = EmbeddingCache(model_name, cache_dir=None, memory_rows=50000, disk_rows=0)
+
+    def encode(self, texts, cancel=None):
+        if cancel is not None:
+            cancel.check()
+        with TIMER.stage("encode"):
+            return self.cache.encode(texts, self.encode_fn)
+
+
+def read_page(site, fixture_dir, url: str) -> str:
+    """HTML of `url` from the synthetic wiki or the fixture files ("" if missing)."""
+    title = unquote(urlparse(url).path.split("/wiki/", 1)[-1]).replace("_", " ")
+    if fixture_dir:
+        path = os.path.join(fixture_dir, f"{title.replace(' ', '_')}.html")
+        if not os.path.exists(path):
+            return ""
+        with open(path, "rb") as f:
+            return f.read().decode("utf-8", errors="replace")
+    status, html, _ = site.page("en", title)
+    return html if status == 200 else ""
+
+
+def make_scraper(site, fixture_dir):
+    from scapper import Scrapper
+
+    class BenchScrapper(Scrapper):
+        """Pages come from the synthetic wiki or fixture files instead of the network."""
+
+        def __init__(self):
+            super().__init__("en", page_cache=None)
+            self.pages_fetched = 0
+
+        def get_html(self, url: str) -> str:
+            with TIMER.stage("fetch"):
+                self.pages_fetched += 1
+                return read_page(site, fixture_dir, url)
+
+        def parse_links(self, html: str):
+            with TIMER.stage("parse"):
+                return super().parse_links(html)
+
+    return BenchScrapper()
+
+
+def make_async_scraper(site, fixture_dir):
+    from async_scapper import AsyncScrapper
+
+    class BenchAsyncScrapper(AsyncScrapper):
+        """`AsyncScrapper` over the same pages; no aiohttp session is opened."""
+
+        def __init__(self):
+            super().__init__("en", session=object())
+            self.pages_fetched = 0
+
+        async def get_html(self, url: str) -> str:
+            with TIMER.stage("fetch"):
+                self.pages_fetched += 1
+                return read_page(site, fixture_dir, url)
+
+        def parse_links(self, html: str):
+            with TIMER.stage("parse"):
+                return super().parse_links(html)
+
+    return BenchAsyncScrapper()
+
+
+# --------------------------------------------------------------------
+# One strategy over all pairs (runs in its own process)
+# --------------------------------------------------------------------
+def run_race(strategy, scraper, selector, start, target, context, max_steps):
+    from beam_search import BeamSearch
+    from engine import WikipediaGame
+
+    start_url = f"https://en.wikipedia.org/wiki/{quote(start.replace(' ', '_'))}"
+    if strategy == "async":
+        return asyncio.run(run_async_race(scraper, selector, start_url, target, context, max_steps))
+    if strategy == "beam":
+        search = BeamSearch(scraper, selector)
+        original, original_fetch = search._round, search._fetch
+        search._round = lambda *a, **kw: _timed("score", original, *a, **kw)
+        search._fetch = lambda *a, **kw: _timed("fetch_wait", original_fetch, *a, **kw)
+        return search.search(start_url, target, context).path
+
+    # Both greedy strategies run the stepwise generators the racers use (no similarity threshold)
+    game = WikipediaGame(scraper, selector, max_steps=max_steps)
+    original = game._choose_best_link
+    game._choose_best_link = lambda *a, **kw: _timed("score", original, *a, **kw)
+    if strategy == "greedy-title":
+        return list(game.play_stepwise_title(start_url, target))
+    return list(game.play_stepwise_context(start_url, target, context))
+
+
+async def run_async_race(scraper, selector, start_url, target, context, max_steps):
+    from async_engine import AsyncWikipediaGame
+
+    game = AsyncWikipediaGame(scraper, selector, max_steps=max_steps)
+    original = game._choose_best_link
+    game._choose_best_link = lambda *a, **kw: _timed("score", original, *a, **kw)
+    return [page async for page in game.play_stepwise_context(start_url, target, context)]
+
+
+def run_strategy(strategy: str, pairs, graph_dir, fixture_dir, encoder: str, max_steps: int, repeat: int):
+    """Races of one strategy; timings are the minimum over `repeat` rounds, each with a cold encoder cache."""
+    from link_graph import title_key
+    from settings import MODEL_NAME
+
+    from link_graph import LinkGraph
+    from wiki_server import WikiSite, lead_text
+
+    site = WikiSite(LinkGraph(graph_dir), ["en"]) if graph_dir else None
+    if encoder == "model":
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer(MODEL_NAME)
+        encode_fn, model_name = (lambda texts: model.encode(texts, convert_to_numpy=True)), MODEL_NAME
+    else:
+        encode_fn, model_name = hash_encode, "bench-hash"
+
+    walls = defaultdict(list)
+    rounds = []
+    races = []
+    for round_no in range(max(1, repeat)):
+        selector = BenchSelector(encode_fn, model_name)
+        before = dict(TIMER.seconds)
+        for i, (start, target) in enumerate(pairs):
+            scraper = (make_async_scraper if strategy == "async" else make_scraper)(site, fixture_dir)
+            began = time.perf_counter()
+            path = run_race(strategy, scraper, selector, start, target, lead_text(target) if site else target,
+                            max_steps)
+            walls[i].append((time.perf_counter() - began) * 1000)
+
+            if round_no == 0:
+                solved = bool(path) and title_key(path[-1][0]) == title_key(target)
+                races.append({
+                    "strategy": strategy, "start": start, "target": target, "solved": solved,
+                    "steps": len(path) - 1 if solved else None, "pages_fetched": scraper.pages_fetched,
+                })
+        rounds.append({name: (TIMER.seconds[name] - before.get(name, 0.0)) * 1000 for name in TIMER.seconds})
+
+    for i, race in enumerate(races):
+        race["wall_ms"] = min(walls[i])
+    stages = {
+        name: min(r.get(name, 0.0) for r in rounds)
+        for name in ("fetch", "parse", "encode", "score", "fetch_wait")
+    }
+    calls = {name: count // len(rounds) for name, count in TIMER.calls.items()}
+    return races, stages, calls, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _timed(stage, fn, *args, **kwargs):
+    with TIMER.stage(stage):
+        return fn(*args, **kwargs)
+
+
+def summarize(races, stages, calls, rss_mb):
+    walls = sorted(r["wall_ms"] for r in races)
+    steps = [r["steps"] for r in races if r["solved"]]
+    summary = {
+        "races": len(races),
+        "solved": sum(r["solved"] for r in races),
+        "success_rate": sum(r["solved"] for r in races) / len(races) if races else 0.0,
+        "steps_mean": statistics.mean(steps) if steps else None,
+        "pages_fetched": sum(r["pages_fetched"] for r in races),
+        "wall_ms_p50": walls[len(walls) // 2] if walls else 0.0,
+        "wall_ms_p95": walls[min(len(walls) - 1, int(len(walls) * 0.95))] if walls else 0.0,
+        "rss_peak_mb": rss_mb,
+    }
+    for name, ms in stages.items():
+        if ms or name != "fetch_wait":
+            summary[f"{name}_ms"] = ms
+            summary[f"{name}_calls"] = calls.get(name, 0)
+    return summary
+
+
+# --------------------------------------------------------------------
+# Baseline comparison
+# --------------------------------------------------------------------
+def compare(current: dict, baseline: dict, tolerance: float) -> list:
+    """Regressions as text lines; also prints the full comparison."""
+    regressions = []
+    print(f"\n{'strategy':<16} {'metric':<16} {'baseline':>11} {'current':>11} {'change':>8}")
+    for strategy, now in current["strategies"].items():
+        base = baseline.get("strategies", {}).get(strategy)
+        if base is None:
+            continue
+        for metric in list(EXACT) + TIMED:
+            old, new = base.get(metric), now.get(metric)
+            if old is None or new is None:
+                continue
+            change = (new - old) / old if old else 0.0
+            flag = ""
+            if metric in EXACT:
+                worse = new < old if EXACT[metric] == "higher" else new > old
+                flag = "REGRESSION" if worse else ("changed" if new != old else "")
+            elif change > tolerance:
+                flag = "REGRESSION"
+            if flag == "REGRESSION":
+                regressions.append(f"{strategy} {metric}: {old:.2f} -> {new:.2f}")
+            print(f"{strategy:<16} {metric:<16} {old:11.2f} {new:11.2f} {change:+8.1%} {flag}")
+    return regressions
+
+
+def pick_pairs(graph, count: int, seed: int, min_hops: int, max_hops: int):
+    """Seeded pairs whose shortest path has min_hops..max_hops links."""
+    from bidirectional_bfs import shortest_path
+
+    rng = np.random.default_rng(seed)
+    pairs = []
+    for _ in range(count * 50):
+        source, target = (int(x) for x in rng.integers(0, graph.num_nodes, 2))
+        result = shortest_path(graph, source, target)
+        if result.found and min_hops <= len(result.path) - 1 <= max_hops:
+            pairs.append((graph.title(source), graph.title(target)))
+            if len(pairs) == count:
+                break
+    return pairs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nodes", type=int, default=20000, help="synthetic wiki size")
+    parser.add_argument("--avg-degree", type=int, default=12)
+    parser.add_argument("--pairs", help="JSON list of [start, target] titles (default: seeded synthetic pairs)")
+    parser.add_argument("--num-pairs", type=int, default=20)
+    parser.add_argument("--fixtures", help="directory of recorded <Title>.html pages instead of the synthetic wiki")
+    parser.add_argument("--strategies", nargs="+", default=STRATEGIES, choices=STRATEGIES)
+    parser.add_argument("--encoder", choices=["hash", "model"], default="hash")
+    parser.add_argument("--max-steps", type=int, default=30)
+    parser.add_argument("--neighborhood-hops", type=int, default=2, help="target backlink hops (0 = direct links only)")
+    parser.add_argument("--repeat", type=int, default=3, help="rounds per strategy; the fastest counts")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="compare with a previous --json file; exit 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed relative slowdown")
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    graph_dir = None if args.fixtures else os.path.join(tmp.name, "graph")
+
+    # Hermetic settings, inherited by the strategy processes: no caches on
+    # disk, no network, the backlink neighborhood from the benchmark graph
+    os.environ.update({
+        "WIKIGAME_CACHE_DIR": tmp.name,
+        "WIKIGAME_PAGE_CACHE": "0",
+        "WIKIGAME_PREFETCH_DEPTH": "0",
+        "WIKIGAME_SUMMARY_WEIGHT": "0",
+        "WIKIGAME_RACE_DEADLINE": "0",
+        "WIKIGAME_GRAPH_DIR": graph_dir or os.path.join(tmp.name, "none"),
+        "WIKIGAME_NEIGHBORHOOD_SOURCE": "graph" if graph_dir else "off",
+        "WIKIGAME_NEIGHBORHOOD_HOPS": str(args.neighborhood_hops),
+        "HF_HUB_OFFLINE": "1",
+    })
+
+    if graph_dir:
+        from wiki_server import synthetic_graph
+
+        start = time.perf_counter()
+        synthetic_graph(graph_dir, args.nodes, args.avg_degree, args.seed, redirect_share=0.0)
+        print(f"built synthetic wiki ({args.nodes} pages) in {time.perf_counter() - start:.1f}s")
+
+    if args.pairs:
+        with open(args.pairs, "r", encoding="utf-8") as f:
+            pairs = [tuple(p) for p in json.load(f)]
+    elif graph_dir:
+        from link_graph import LinkGraph
+        pairs = pick_pairs(LinkGraph(graph_dir), args.num_pairs, args.seed + 1, 3, 6)
+    else:
+        parser.error("--fixtures needs --pairs")
+
+    results = {
+        "meta": {
+            "encoder": args.encoder, "nodes": args.nodes if graph_dir else None,
+            "avg_degree": args.avg_degree if graph_dir else None, "fixtures": args.fixtures,
+            "pairs": len(pairs), "seed": args.seed, "max_steps": args.max_steps, "repeat": args.repeat,
+            "neighborhood_hops": args.neighborhood_hops,
+            "python": platform.python_version(), "machine": platform.machine(),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        },
+        "strategies": {},
+        "races": [],
+    }
+
+    # One process per strategy: separate peak RSS, no shared warm caches
+    ctx = multiprocessing.get_context("spawn")
+    print(f"\n{'strategy':<16} {'solved':>7} {'steps':>6} {'pages':>6} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'fetch':>7} {'parse':>7} {'encode':>7} {'score':>7} {'RSS MB':>7}")
+    for strategy in args.strategies:
+        with ctx.Pool(1) as pool:
+            races, stages, calls, rss = pool.apply(
+                run_strategy,
+                (strategy, pairs, graph_dir, args.fixtures, args.encoder, args.max_steps, args.repeat),
+            )
+        s = summarize(races, stages, calls, rss)
+        results["strategies"][strategy] = s
+        results["races"].extend(races)
+        print(
+            f"{strategy:<16} {s['solved']:>3}/{s['races']:<3} {s['steps_mean'] or 0:6.2f} {s['pages_fetched']:6d} "
+            f"{s['wall_ms_p50']:8.1f} {s['wall_ms_p95']:8.1f} {s['fetch_ms']:7.0f} {s['parse_ms']:7.0f} "
+            f"{s['encode_ms']:7.0f} {s['score_ms']:7.0f} {s['rss_peak_mb']:7.0f}"
+        )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    tmp.cleanup()
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("\nRegressions:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
+        print("\nNo regressions.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Link extraction micro-benchmark on recorded article HTML.
+
+    # record a few pages once (needs network)
+    python benchmarks/bench_link_extractor.py --record India United_States Bhupalpally
+
+    # compare extractors on everything recorded
+    python benchmarks/bench_link_extractor.py benchmarks/fixtures/html/*.html
+
+Reports per page: parse time (median of --repeat runs), peak traced memory,
+links found, and whether the lxml extractor matches the bs4 reference
+restricted to #mw-content-text.
+"""
+import argparse
+import glob
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from link_extractor import extract_links_bs4, extract_links_lxml, parity_diff  # noqa: E402
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "html")
+
+
+def accept_href(href: str) -> bool:
+    return href.startswith("/wiki/")
+
+
+EXTRACTORS = {
+    # what Scrapper.get_links did before: html.parser over the whole page
+    "bs4_page": lambda html: extract_links_bs4(html, accept_href, content_only=False),
+    "lxml_stream": lambda html: extract_links_lxml(html, accept_href),
+}
+
+
+def measure(fn, html, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(html)
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    result = fn(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return statistics.median(times), peak, len(result)
+
+
+def record(titles, out_dir):
+    from scapper import Scrapper
+
+    os.makedirs(out_dir, exist_ok=True)
+    scraper = Scrapper("en")
+    for title in titles:
+        html = scraper.get_html(f"{scraper.base_url}/wiki/{title}")
+        if not html:
+            print(f"skip {title}: fetch failed")
+            continue
+        path = os.path.join(out_dir, f"{title}.html")
+        with open(path, "wb") as f:
+            f.write(html.encode("utf-8"))
+        print(f"recorded {path} ({len(html)} chars)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="*", help="recorded article HTML files")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--record", nargs="+", metavar="TITLE", help="fetch titles into the fixture dir")
+    parser.add_argument("--json", help="also write results to this JSON file")
+    args = parser.parse_args()
+
+    if args.record:
+        record(args.record, FIXTURE_DIR)
+        return
+
+    files = args.files or sorted(glob.glob(os.path.join(FIXTURE_DIR, "*.html")))
+    if not files:
+        parser.error(f"no HTML files given and none recorded in {FIXTURE_DIR} (use --record)")
+
+    results = []
+    print(f"{'page':<32} {'extractor':<12} {'ms':>8} {'peak KB':>9} {'links':>6}")
+    for path in files:
+        with open(path, "rb") as f:
+            raw = f.read()
+        html = raw.decode("utf-8", errors="replace")
+        name = os.path.splitext(os.path.basename(path))[0]
+
+        for extractor, fn in EXTRACTORS.items():
+            seconds, peak, count = measure(fn, html, args.repeat)
+            results.append({
+                "page": name, "bytes": len(raw), "extractor": extractor,
+                "ms": seconds * 1000, "peak_kb": peak / 1024, "links": count,
+            })
+            print(f"{name[:32]:<32} {extractor:<12} {seconds * 1000:8.2f} {peak / 1024:9.0f} {count:6d}")
+
+        diffs = parity_diff(extract_links_lxml(html, accept_href), extract_links_bs4(html, accept_href))
+        print(f"{'':<32} parity: {'ok' if not diffs else diffs[:3]}")
+
+    for extractor in EXTRACTORS:
+        rows = [r for r in results if r["extractor"] == extractor]
+        print(
+            f"TOTAL {extractor:<12} {sum(r['ms'] for r in rows):8.2f} ms"
+            f"  max peak {max(r['peak_kb'] for r in rows):.0f} KB"
+        )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Cold-start benchmark: import time of the entry modules and time to the first race step.
+
+    python benchmarks/bench_startup.py --json startup.json
+    python benchmarks/bench_startup.py --baseline startup.json    # exits 1 on a regression
+
+Every measurement runs in a fresh interpreter. Import rows report the median
+wall time of --repeat imports and which heavy packages (torch,
+sentence_transformers, nltk, bs4, ...) the import pulled in. The race row
+starts a greedy game against a small local wiki (wiki_server.py, no
+network) and reports, from the moment that server is up:
+
+    imports      engine + get_similar_word imported
+    first_fetch  links of the start page parsed
+    model_ready  encoder loaded (in the background since the game was created)
+    first_step   first link chosen (needs both)
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+MODULES = ["clean_summary", "fetch_target_summary", "scapper", "engine", "get_similar_word", "run_thread"]
+HEAVY = ["torch", "sentence_transformers", "transformers", "onnxruntime", "nltk", "bs4", "pandas", "streamlit"]
+
+# Latency metrics compared against --baseline
+TIMED = ["import_ms", "imports_ms", "first_fetch_ms", "model_ready_ms", "first_step_ms"]
+
+
+def child_import(module: str):
+    start = time.perf_counter()
+    __import__(module)
+    elapsed = time.perf_counter() - start
+    print(json.dumps({"import_ms": elapsed * 1000, "heavy": [m for m in HEAVY if m in sys.modules]}))
+
+
+def child_race(graph_dir: str):
+    start = time.perf_counter()
+    from link_graph import LinkGraph
+    from wiki_server import FaultInjector, WikiSite, make_server
+
+    server = make_server(WikiSite(LinkGraph(graph_dir), ["en"]), FaultInjector(), port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ["WIKIGAME_WIKI_BASE_URL"] = f"http://127.0.0.1:{server.server_address[1]}/{{lang}}"
+    server_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    from engine import WikipediaGame
+    from get_similar_word import GetSimilarWord
+    from scapper import Scrapper
+    imports = time.perf_counter() - start
+
+    game = WikipediaGame(Scrapper("en"), GetSimilarWord(), max_steps=2, similarity_threshold=0.0)
+    graph = LinkGraph(graph_dir)
+    steps = game.play_stepwise_title(f"{game.scraper.base_url}/wiki/{graph.title(0).replace(' ', '_')}",
+                                     graph.title(graph.num_nodes - 1))
+    next(steps)
+    step_started = time.perf_counter()
+    next(steps, None)
+    first_step = time.perf_counter() - start
+
+    event = game.steps[0]
+    first_fetch = step_started - start + (event.fetch_ms + event.parse_ms) / 1000
+    GetSimilarWord.wait_model()
+    print(json.dumps({
+        "imports_ms": imports * 1000,
+        "first_fetch_ms": first_fetch * 1000,
+        "model_ready_ms": (GetSimilarWord.loaded_at - start) * 1000,
+        "first_step_ms": first_step * 1000,
+        "server_ms": server_ms,
+    }))
+
+
+def run_child(args, env, repeat: int):
+    rows = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, os.path.abspath(__file__), *args], env=env,
+                             capture_output=True, text=True, check=True).stdout
+        rows.append(json.loads(out.strip().splitlines()[-1]))
+    merged = {k: statistics.median(r[k] for r in rows) for k, v in rows[0].items() if isinstance(v, (int, float))}
+    merged.update({k: v for k, v in rows[0].items() if not isinstance(v, (int, float))})
+    return merged
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list:
+    regressions = []
+    print(f"\n{'row':<22} {'metric':<15} {'baseline':>10} {'current':>10} {'change':>8}")
+    for row, now in current.items():
+        base = baseline.get(row, {})
+        for metric in TIMED:
+            old, new = base.get(metric), now.get(metric)
+            if old is None or new is None:
+                continue
+            change = (new - old) / old if old else 0.0
+            flag = "REGRESSION" if change > tolerance else ""
+            if flag:
+                regressions.append(f"{row} {metric}: {old:.1f} -> {new:.1f} ms")
+            print(f"{row:<22} {metric:<15} {old:10.1f} {new:10.1f} {change:+8.1%} {flag}")
+        if set(now.get("heavy", [])) - set(base.get("heavy", [])):
+            regressions.append(f"{row} now imports {sorted(set(now['heavy']) - set(base.get('heavy', [])))}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modules", nargs="+", default=MODULES)
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters per row; the median counts")
+    parser.add_argument("--nodes", type=int, default=2000, help="size of the local wiki for the race row")
+    parser.add_argument("--json", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="compare with a previous --json file; exit 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown")
+    parser.add_argument("--child", nargs="+", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    sys.path.insert(0, SRC)
+    if args.child:
+        kind, arg = args.child
+        return child_import(arg) if kind == "import" else child_race(arg)
+
+    tmp = tempfile.TemporaryDirectory()
+    # Hermetic: empty caches, no prefetch, no summary index, neighborhood off
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [SRC, os.environ.get("PYTHONPATH")])))
+    env.update({
+        "WIKIGAME_CACHE_DIR": tmp.name,
+        "WIKIGAME_PAGE_CACHE": "0",
+        "WIKIGAME_PREFETCH_DEPTH": "0",
+        "WIKIGAME_SUMMARY_WEIGHT": "0",
+        "WIKIGAME_NEIGHBORHOOD_SOURCE": "off",
+        "HF_HUB_OFFLINE": "1",
+    })
+
+    results = {}
+    print(f"{'row':<22} {'ms':>8}  heavy imports")
+    for module in args.modules:
+        row = run_child(["--child", "import", module], env, args.repeat)
+        results[f"import {module}"] = row
+        print(f"{'import ' + module:<22} {row['import_ms']:8.1f}  {', '.join(row['heavy']) or '-'}")
+
+    from wiki_server import synthetic_graph
+    graph_dir = os.path.join(tmp.name, "graph")
+    synthetic_graph(graph_dir, args.nodes, 12)
+    row = run_child(["--child", "race", graph_dir], env, args.repeat)
+    results["first race step"] = row
+    for metric in ("imports_ms", "first_fetch_ms", "model_ready_ms", "first_step_ms"):
+        print(f"{'race ' + metric[:-3]:<22} {row[metric]:8.1f}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    tmp.cleanup()
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("\nRegressions:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
+        print("\nNo regressions.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+Link source reading the MediaWiki API instead of rendered article HTML.
+
+`prop=links` returns the article links of up to 50 titles per request as
+compact JSON, a few KB per page instead of the several hundred KB of
+rendered HTML `Scrapper` downloads and parses. Long link lists are paged
+with the API's continuation tokens. Link text is the linked page's title
+(the API has no anchors).
+
+Selected with WIKIGAME_LINK_BACKEND=api. Like the HTML scraper it fetches
+through the page cache and the shared page store, and learns the redirects
+the API reports. Search modes that expand several pages at once call
+`get_links_many` to batch them.
+"""
+import json
+import logging
+from typing import Dict, List, Set, Tuple
+from urllib.parse import quote, unquote, urlencode
+
+import requests
+
+import metrics
+from cancellation import cancellable_get
+from http_session import wiki_title
+from page_store import PartialLinks
+from scapper import Link, Scrapper
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+MAX_TITLES = 50      # titles per request (the API limit for normal clients)
+MAX_CONTINUE = 40    # continuation requests per batch; a 500-link page each
+TITLE_SAFE = ":/()!,*;@$-._~"
+
+
+def api_title(url: str) -> str:
+    """Title of an article URL in the API's form (spaces, not underscores)."""
+    return unquote(wiki_title(url)).replace("_", " ").strip()
+
+
+def _first_upper(title: str) -> str:
+    return title[:1].upper() + title[1:]
+
+
+class ApiScrapper(Scrapper):
+    """`Scrapper` whose links come from action=query&prop=links."""
+
+    def __init__(self, target_lang: str = "en", **kwargs):
+        kwargs.setdefault("extractor", "api")  # keeps its page-store entries apart from parsed HTML
+        super().__init__(target_lang, **kwargs)
+        self.api_url = f"{self.base_url}/w/api.php"
+
+    def url_for(self, title: str) -> str:
+        return f"{self.base_url}/wiki/{quote(title.replace(' ', '_'), safe=TITLE_SAFE)}"
+
+    def _api_get(self, params: dict) -> dict:
+        url = f"{self.api_url}?{urlencode(params)}"
+        if self.page_cache is not None:
+            res = self.page_cache.fetch(self.session, url, timeout=10, cancel=self.cancel)
+            status, text = res.status_code, res.text
+        else:
+            if self.cancel is not None:
+                res = cancellable_get(self.session, url, self.cancel, timeout=10)
+            else:
+                res = self.session.get(url, timeout=10)
+            metrics.add("bytes_downloaded", len(res.content))
+            status, text = res.status_code, res.text
+        if status != 200:
+            raise requests.exceptions.HTTPError(f"{status} Error for url: {url}")
+        try:
+            data = json.loads(text)
+        except ValueError as e:
+            # e.g. an HTML error page served with 200 by a proxy or a misconfigured base URL
+            raise requests.exceptions.RequestException(f"Not a JSON API response from {url}: {e}") from e
+        if not isinstance(data, dict):
+            raise requests.exceptions.RequestException(f"Unexpected API response from {url}")
+        if "error" in data:
+            raise requests.exceptions.RequestException(f"API error: {data['error'].get('info', data['error'])}")
+        return data
+
+    def fetch_links(self, titles: List[str]) -> Tuple[Dict[str, List[str]], Set[str]]:
+        """
+        Article links of each title (at most MAX_TITLES), keyed by the title as
+        requested. Redirects are followed; missing pages map to [].
+
+        Also returns the titles whose lists may be incomplete. When the batch
+        needs more than MAX_CONTINUE requests, the lists gathered so far are
+        returned. The continuation does not say which pages were finished,
+        so every existing page of the batch counts as cut.
+        """
+        params = {
+            "action": "query", "format": "json", "formatversion": "2",
+            "prop": "links", "titles": "|".join(titles),
+            "plnamespace": 0, "pllimit": "max", "redirects": 1,
+        }
+        links: Dict[str, List[str]] = {}
+        aliases: Dict[str, str] = {}  # normalized / redirect source -> its target
+        missing = set()
+        cut_off = False
+        for _ in range(MAX_CONTINUE):
+            data = self._api_get(params)
+            query = data.get("query", {})
+            for item in query.get("normalized", []) + query.get("redirects", []):
+                aliases[item["from"]] = item["to"]
+            for item in query.get("redirects", []):
+                self.redirects.add(item["from"], item["to"])
+            for page in query.get("pages", []):
+                if page.get("missing") or page.get("invalid"):
+                    missing.add(page["title"])
+                # Continued responses repeat the pages; links of one page may span several
+                merged = links.setdefault(page["title"], [])
+                merged.extend(item["title"] for item in page.get("links", []))
+            if "continue" not in data:
+                break
+            params.update(data["continue"])
+        else:
+            cut_off = True
+            logger.warning(f"Link lists of {len(titles)} page(s) cut after {MAX_CONTINUE} continuation requests")
+
+        out, cut = {}, set()
+        for title in titles:
+            resolved = title
+            for _ in range(3):  # normalized, then redirected
+                if resolved not in aliases:
+                    break
+                resolved = aliases[resolved]
+            found = links.get(resolved)
+            if found is None:
+                resolved = _first_upper(resolved)
+                found = links.get(resolved, [])
+            out[title] = found
+            if cut_off and resolved not in missing:
+                cut.add(title)
+        return out, cut
+
+    def _links_of(self, titles: List[str]) -> Tuple[Dict[str, List[Link]], Set[str]]:
+        logger.info(f"Fetching links of {len(titles)} page(s) from {self.api_url}")
+        pages, cut = self.fetch_links(titles)
+        return {t: [Link(text=title, url=self.url_for(title)) for title in found] for t, found in pages.items()}, cut
+
+    def _load_links(self, url: str) -> List[Link]:
+        title = api_title(url)
+        if not title:
+            logger.warning(f"Not an article URL: {url}")
+            return []
+        try:
+            pages, cut = self._links_of([title])
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Error fetching links of {url}: {e}")
+            return []
+        links = pages[title]
+        logger.info(f"Total links from the API: {len(links)}")
+        if cut:
+            return PartialLinks(links)  # served to this racer, not kept in the page store
+        return links
+
+    def get_links_many(self, urls: List[str]) -> Dict[str, List[Link]]:
+        """Links of several pages in as few requests as possible; stored pages are not refetched."""
+        out: Dict[str, List[Link]] = {}
+        todo: Dict[str, List[str]] = {}  # title -> urls asking for it
+        for url in urls:
+            stored = self.page_store.peek(url, self.extractor) if self.page_store is not None else None
+            if stored is not None:
+                out[url] = stored
+                continue
+            title = api_title(url)
+            if not title:
+                out[url] = []
+                continue
+            todo.setdefault(title, []).append(url)
+
+        titles = list(todo)
+        for start in range(0, len(titles), MAX_TITLES):
+            batch = titles[start:start + MAX_TITLES]
+            if self.cancel is not None:
+                self.cancel.check()
+            try:
+                pages, cut = self._links_of(batch)
+            except requests.exceptions.RequestException as e:
+                logger.error(f"Error fetching links of {len(batch)} pages: {e}")
+                pages, cut = {}, set()
+            if len(batch) > 1:
+                # The batch ran out of continuations: fetch its pages one at a time
+                for title in [t for t in batch if t in cut]:
+                    if self.cancel is not None:
+                        self.cancel.check()
+                    try:
+                        single, single_cut = self._links_of([title])
+                    except requests.exceptions.RequestException as e:
+                        logger.error(f"Error fetching links of {title}: {e}")
+                        continue
+                    pages[title] = single[title]
+                    if not single_cut:
+                        cut.discard(title)
+            for title in batch:
+                links = pages.get(title, [])
+                for url in todo[title]:
+                    # Cut lists are returned as they are but not stored as if complete
+                    out[url] = PartialLinks(links) if title in cut else list(links)
+                    if self.page_store is not None and title not in cut:
+                        self.page_store.put(url, links, self.extractor)
+        return out
@@ -1,15 +1,81 @@
 
 import os
 os.environ["TF_ENABLE_ONEDNN_OPTS"] = "0"
+import html
+import pandas as pd
 import streamlit as st
 import threading
 import time
-from queue import Queue
+from collections import deque
+from queue import Empty, Queue
 
-from scapper import Scrapper
+from backends import create_scraper, create_shortest_path_solver
 from get_similar_word import GetSimilarWord
 from engine import WikipediaGame
 from fetch_target_summary import fetch_wikipedia_summary
+from cancellation import CancelToken
+from http_session import wiki_base_url
+from settings import RACE_DEADLINE
+
+# Start loading the model while the user fills in the form (once per process)
+GetSimilarWord.warmup()
+
+# Log lines kept in each racer's live log box; the full log is shown after the race
+LOG_WINDOW = 40
+# Seconds the redraw loop waits for a racer event before checking the threads are alive
+EVENT_POLL = 0.5
+# Seconds a new race waits for the racers of a previous run to unwind after cancelling them
+OLD_RACE_JOIN = 2.0
+
+
+# ==============================================================
+# RESOURCES CACHED ACROSS RERUNS
+# ==============================================================
+@st.cache_resource
+def get_selector():
+    """One GetSimilarWord (model, embedding cache, batcher) for every session."""
+    return GetSimilarWord()
+
+
+@st.cache_resource
+def get_shortest_path_solver(lang):
+    return create_shortest_path_solver(lang)
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def get_target_summary(title, word_limit):
+    return fetch_wikipedia_summary(title, word_limit)
+
+
+def get_scraper(lang, mode_name, cancel):
+    """
+    Scrapers (and their HTTP connection pools) are kept per session and
+    racer across reruns; only the race's cancel token changes.
+    """
+    scrapers = st.session_state.setdefault("scrapers", {})
+    key = (lang, mode_name)
+    if key not in scrapers:
+        scrapers[key] = create_scraper(lang, cancel=cancel)
+    scrapers[key].cancel = cancel
+    return scrapers[key]
+
+
+def stop_previous_race():
+    """
+    A rerun does not stop the threads of the race an earlier run started.
+    Cancel them through that race's token before its scrapers get a new one;
+    if they are still unwinding, the new race gets scrapers of its own.
+    """
+    race = st.session_state.pop("race", None)
+    if race is None:
+        return
+    token, threads = race
+    token.set()
+    deadline = time.monotonic() + OLD_RACE_JOIN
+    for t in threads:
+        t.join(max(deadline - time.monotonic(), 0))
+    if any(t.is_alive() for t in threads):
+        st.session_state.pop("scrapers", None)
 
 
 
@@ -209,7 +275,7 @@ with st.container():
 
     col_input1, col_input2 = st.columns(2)
     with col_input1:
-        start_url = st.text_input("🌍 Start Wikipedia URL:", "https://en.wikipedia.org/wiki/India")
+        start_url = st.text_input("🌍 Start Wikipedia URL:", f"{wiki_base_url('en')}/wiki/India")
         word_limit = st.slider("🧠 Context Word Limit:", 20, 200, 80)
 
     with col_input2:
@@ -250,45 +316,92 @@ def thread_worker(
     start_url,
     target_title,
     context,
+    lang,
+    source,
+    selector,
     results_dict,
     stop_event,
-    log_queue,
-    prog_queue,
+    events,
+    step_events,
 ):
-    scraper = Scrapper()
-    selector = GetSimilarWord()
-    game = WikipediaGame(
-        scraper,
-        selector,
-        max_steps=max_steps,
-        similarity_threshold=threshold,
-    )
-
+    """
+    Runs one racer (`source`: its scraper, or the shortest-path solver) and
+    reports (racer, "step" | "note" | "done", step, text) on `events`.
+    """
     path = []
 
     try:
-        if game_method == "title":
-            gen = game.play_stepwise_title(start_url, target_title)
+        if game_method == "shortest":
+            gen = source.play_stepwise(start_url, target_title)
         else:
-            gen = game.play_stepwise_context(start_url, target_title, context)
+            game = WikipediaGame(
+                source,
+                selector,
+                max_steps=max_steps,
+                similarity_threshold=threshold,
+                target_lang=lang,
+                cancel=stop_event,
+                racer=mode_name,
+            )
+            step_events[mode_name] = game.steps  # filled in as the race runs
+
+            if game_method == "title":
+                gen = game.play_stepwise_title(start_url, target_title)
+            else:
+                gen = game.play_stepwise_context(start_url, target_title, context)
 
         for step_idx, (title, url) in enumerate(gen):
             if stop_event.is_set():
-                return
+                break
 
             path.append((title, url))
+            events.put((mode_name, "step", step_idx, title))
 
-            log_queue.put((mode_name, step_idx, title))
-            prog_queue.put(step_idx)
-
-            time.sleep(0.05)
+        if stop_event.is_set():
+            # Deadline, not a winner: keep how far this racer got
+            if stop_event.expired and path:
+                results_dict[f"{mode_name} (partial)"] = path
+                events.put((mode_name, "note", -1, "⏱ Deadline reached"))
+            return
 
-        if not stop_event.is_set() and path:
+        if path:
             stop_event.set()
             results_dict[mode_name] = path
 
     except Exception as e:
-        log_queue.put((mode_name, -1, f"❌ ERROR: {e}"))
+        events.put((mode_name, "note", -1, f"❌ ERROR: {e}"))
+    finally:
+        events.put((mode_name, "done", -1, None))
+
+
+class RaceLog:
+    """
+    Live log of one racer. Lines are rendered to HTML once, when they
+    arrive; the box shows the last LOG_WINDOW of them, so redrawing costs
+    the same at step 200 as at step 2.
+    """
+
+    def __init__(self, box, tag_html, step_word):
+        self.box = box
+        self.tag_html = tag_html
+        self.step_word = step_word
+        self.lines = []
+        self.window = deque(maxlen=LOG_WINDOW)
+        self.dirty = False
+
+    def add(self, step_idx, text):
+        step_label = f"[{self.step_word} {step_idx}]" if step_idx >= 0 else ""
+        line = f"<div class='log-line'>{self.tag_html}{step_label} {html.escape(str(text))}</div>"
+        self.lines.append(line)
+        self.window.append(line)
+        self.dirty = True
+
+    def render(self):
+        if self.dirty:
+            hidden = len(self.lines) - len(self.window)
+            more = f"<div class='log-line'>… {hidden} earlier lines</div>" if hidden else ""
+            self.box.markdown(f"<div class='log-box'>{more}{''.join(self.window)}</div>", unsafe_allow_html=True)
+            self.dirty = False
 
 
 # ==============================================================
@@ -300,119 +413,126 @@ if start_btn:
         st.error("Please fill both Start URL and Target Title.")
         st.stop()
 
-    st.info("Fetching target context & detecting language...")
-    target_context, lang = fetch_wikipedia_summary(target_title, word_limit)
+    with st.spinner("Fetching target context & detecting language..."):
+        target_context, lang = get_target_summary(target_title, word_limit)
 
     # Force start URL into correct language domain
     slug = start_url.split("/wiki/")[-1]
-    start_url = f"https://{lang}.wikipedia.org/wiki/{slug}"
+    start_url = f"{wiki_base_url(lang)}/wiki/{slug}"
 
     st.markdown(
         f"**🌐 Detected Language:** `{lang}` &nbsp;&nbsp; | &nbsp;&nbsp; "
         f"**Context Extracted (first 200 chars):** `{target_context[:200]}...`"
     )
 
-    # Queues
-    title_log_q = Queue()
-    ctx_log_q = Queue()
-    title_prog_q = Queue()
-    ctx_prog_q = Queue()
+    # Third racer: exact shortest path, when a local link graph is built
+    solver = get_shortest_path_solver(lang)
+    has_graph = solver is not None
+    selector = get_selector()
 
     results = {}
-    stop_event = threading.Event()
+    step_events = {}  # racer -> list of metrics.StepEvent
+    stop_previous_race()
+    stop_event = CancelToken(deadline=RACE_DEADLINE or None)
+    events = Queue()  # (racer, kind, step, text) from all racers
 
     # UI containers
     st.markdown("<div class='glass-card'>", unsafe_allow_html=True)
-    log_cols = st.columns(2)
+    log_cols = st.columns(3 if has_graph else 2)
 
     with log_cols[0]:
         st.markdown("##### 🟦 Title-Based Logs")
-        log_title_box = st.empty()
+        title_log = RaceLog(st.empty(), "<span class='tag title-tag'>Title</span>", "step")
 
     with log_cols[1]:
         st.markdown("##### 🟩 Context-Based Logs")
-        log_ctx_box = st.empty()
+        ctx_log = RaceLog(st.empty(), "<span class='tag context-tag'>Context</span>", "step")
+
+    logs = {"Title-Based": title_log, "Context-Based": ctx_log}
+    if has_graph:
+        with log_cols[2]:
+            st.markdown("##### 🟪 Shortest-Path Logs")
+            logs["Shortest-Path"] = RaceLog(st.empty(), "<span class='tag title-tag'>BFS</span>", "hop")
 
     prog_cols = st.columns(2)
     with prog_cols[0]:
         prog_title = st.progress(0, text="Title-based Progress")
     with prog_cols[1]:
         prog_ctx = st.progress(0, text="Context-based Progress")
+    progress_bars = {"Title-Based": prog_title, "Context-Based": prog_ctx}
 
     st.markdown("</div>", unsafe_allow_html=True)
 
     # Start threads
-    t1 = threading.Thread(
-        target=thread_worker,
-        args=(
-            "Title-Based",
-            "title",
-            start_url,
-            target_title,
-            target_context,
-            results,
-            stop_event,
-            title_log_q,
-            title_prog_q,
-        ),
-        daemon=True,
-    )
-
-    t2 = threading.Thread(
-        target=thread_worker,
-        args=(
-            "Context-Based",
-            "context",
-            start_url,
-            target_title,
-            target_context,
-            results,
-            stop_event,
-            ctx_log_q,
-            ctx_prog_q,
-        ),
-        daemon=True,
-    )
-
-    t1.start()
-    t2.start()
-
-    # log buffers so we show history, not only last line
-    title_log_html = ""
-    ctx_log_html = ""
-
-    # Poll UI queues while threads run
-    while t1.is_alive() or t2.is_alive():
-        # Title logs
-        while not title_log_q.empty():
-            mode, step_idx, text = title_log_q.get()
-            tag_html = "<span class='tag title-tag'>Title</span>"
-            step_label = f"[step {step_idx}]" if step_idx >= 0 else ""
-            title_log_html += f"<div class='log-line'>{tag_html}{step_label} {text}</div>"
-            log_title_box.markdown(
-                f"<div class='log-box'>{title_log_html}</div>", unsafe_allow_html=True
-            )
-
-        # Context logs
-        while not ctx_log_q.empty():
-            mode, step_idx, text = ctx_log_q.get()
-            tag_html = "<span class='tag context-tag'>Context</span>"
-            step_label = f"[step {step_idx}]" if step_idx >= 0 else ""
-            ctx_log_html += f"<div class='log-line'>{tag_html}{step_label} {text}</div>"
-            log_ctx_box.markdown(
-                f"<div class='log-box'>{ctx_log_html}</div>", unsafe_allow_html=True
-            )
-
-        # Progress bars
-        if not title_prog_q.empty():
-            step = title_prog_q.get()
-            prog_title.progress(min((step + 1) / max_steps, 1.0))
-
-        if not ctx_prog_q.empty():
-            step = ctx_prog_q.get()
-            prog_ctx.progress(min((step + 1) / max_steps, 1.0))
+    racers = [("Title-Based", "title"), ("Context-Based", "context")]
+    if has_graph:
+        racers.append(("Shortest-Path", "shortest"))
+
+    threads = []
+    for mode_name, game_method in racers:
+        source = solver if game_method == "shortest" else get_scraper(lang, mode_name, stop_event)
+        threads.append(threading.Thread(
+            target=thread_worker,
+            args=(
+                mode_name,
+                game_method,
+                start_url,
+                target_title,
+                target_context,
+                lang,
+                source,
+                selector,
+                results,
+                stop_event,
+                events,
+                step_events,
+            ),
+            daemon=True,
+        ))
+
+    for t in threads:
+        t.start()
+    st.session_state["race"] = (stop_event, threads)
+
+    # Redraw when racers report, not on a timer: wait for the next event,
+    # drain whatever else arrived meanwhile, then redraw each changed box once
+    running = len(threads)
+    try:
+        while running:
+            try:
+                batch = [events.get(timeout=EVENT_POLL)]
+            except Empty:
+                if not any(t.is_alive() for t in threads):
+                    break
+                continue
+            while not events.empty():
+                batch.append(events.get_nowait())
+
+            latest_step = {}
+            for mode_name, kind, step_idx, text in batch:
+                if kind == "done":
+                    running -= 1
+                    continue
+                logs[mode_name].add(step_idx, text)
+                if kind == "step":
+                    latest_step[mode_name] = step_idx
+
+            for log in logs.values():
+                log.render()
+            for mode_name, step_idx in latest_step.items():
+                if mode_name in progress_bars:
+                    progress_bars[mode_name].progress(min((step_idx + 1) / max_steps, 1.0))
+    finally:
+        # A rerun or stop interrupts the script mid-race: don't leave the racers running
+        if running:
+            stop_event.set()
+        else:
+            stop_event.close()
 
-        time.sleep(0.05)
+    with st.expander("📜 Full race logs"):
+        for mode_name, log in logs.items():
+            st.markdown(f"##### {mode_name}")
+            st.markdown(f"<div class='log-box'>{''.join(log.lines)}</div>", unsafe_allow_html=True)
 
     st.success("🏁 Race finished!")
 
@@ -443,3 +563,31 @@ if start_btn:
         wiki_card(t, u, highlight=(i == len(winner_path)))
 
     st.markdown("</div>", unsafe_allow_html=True)
+
+
+    # ==============================================================
+    # PER-STEP LATENCY BREAKDOWN
+    # ==============================================================
+    if any(step_events.values()):
+        st.markdown("<div class='glass-card'>", unsafe_allow_html=True)
+        st.markdown("#### ⏱ Where the time went")
+        step_cols = st.columns(len(step_events))
+        for col, (mode_name, events) in zip(step_cols, step_events.items()):
+            with col:
+                st.markdown(f"##### {mode_name}")
+                if not events:
+                    st.caption("No completed steps.")
+                    continue
+                breakdown = pd.DataFrame(
+                    [e.stage_ms() for e in events],
+                    index=pd.Index([e.step for e in events], name="step"),
+                )
+                st.bar_chart(breakdown)  # stacked: fetch / parse / encode / score ms
+                st.caption(
+                    f"{len(events)} steps · {sum(e.total_ms for e in events) / 1000:.2f}s · "
+                    f"{sum(e.bytes_downloaded for e in events) / 1024:.0f} KB downloaded · "
+                    f"{sum(e.page_cache_hits for e in events)} page cache hits · "
+                    f"{sum(e.candidates for e in events)} links found, "
+                    f"{sum(e.unique_candidates for e in events)} encoded"
+                )
+        st.markdown("</div>", unsafe_allow_html=True)
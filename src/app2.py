@@ -8,7 +8,10 @@ from scapper import Scrapper
 from get_similar_word import GetSimilarWord
 from engine import WikipediaGame
 from fetch_target_summary import fetch_wikipedia_summary
-from run_thread import run_game_thread_title, run_game_thread_context
+from run_thread import run_game_thread_title, run_game_thread_context, run_game_thread_shortest, run_game_thread_beam, pick_winner
+from cancellation import CancelToken
+from http_session import wiki_base_url
+from settings import RACE_DEADLINE
 
 
 
@@ -31,7 +34,7 @@ st.write("Two threads race: **Title-Based** vs **Context-Based** similarity.")
 # --------------------------------------------------------------------
 start_url = st.text_input(
     "Start Wikipedia URL:",
-    "https://en.wikipedia.org/wiki/India"
+    f"{wiki_base_url('en')}/wiki/India"
 )
 
 target_title = st.text_input(
@@ -60,13 +63,13 @@ def run_navigation_race():
 
     # Force start URL to match discovered language domain
     page_slug = start_url.split("/wiki/")[-1]
-    lang_start_url = f"https://{target_lang}.wikipedia.org/wiki/{page_slug}"
+    lang_start_url = f"{wiki_base_url(target_lang)}/wiki/{page_slug}"
 
     st.write(f"Using language-adapted start URL: {lang_start_url}")
 
     # THREAD RESULTS AND STOP FLAG
     results = []
-    stop_event = threading.Event()
+    stop_event = CancelToken(deadline=RACE_DEADLINE or None)
 
     # Thread 1 - Title based
     t1 = threading.Thread(
@@ -80,13 +83,30 @@ def run_navigation_race():
         args=("Context-Based", lang_start_url, target_title, target_context, results, stop_event, target_lang, max_steps, threshold)
     )
 
+    # Thread 3 - Exact shortest path (only races when a local link graph exists)
+    t3 = threading.Thread(
+        target=run_game_thread_shortest,
+        args=("Shortest-Path", lang_start_url, target_title, results, stop_event, target_lang)
+    )
+
+    # Thread 4 - Best-first search with a bounded frontier
+    t4 = threading.Thread(
+        target=run_game_thread_beam,
+        args=("Beam-Search", lang_start_url, target_title, target_context, results, stop_event, target_lang)
+    )
+
     st.write("Starting threads...")
 
     t1.start()
     t2.start()
+    t3.start()
+    t4.start()
 
     t1.join()
     t2.join()
+    t3.join()
+    t4.join()
+    stop_event.close()
 
     st.success("Race Completed!")
 
@@ -116,10 +136,13 @@ if start_button:
         st.error("⚠ No thread finished. Probably got stuck or both were stopped early.")
         st.stop()
 
-    # Winner is always first appended
-    winner = results[0]
+    # First complete path wins; after the deadline, the best partial one
+    winner = pick_winner(results)
 
-    st.success(f"🏆 **Winner:** {winner.name}")
+    if winner.complete:
+        st.success(f"🏆 **Winner:** {winner.name}")
+    else:
+        st.warning(f"⏱ Deadline reached. Best partial path: {winner.name}")
 
     st.markdown("### 🧭 Winning Path")
     for i, (title, url) in enumerate(winner.path, start=1):
@@ -129,7 +152,7 @@ if start_button:
     if len(results) > 1:
         st.markdown("---")
         st.markdown("### 🥈 Second Thread Path")
-        loser = results[1]
+        loser = next(r for r in results if r is not winner)
         for i, (title, url) in enumerate(loser.path, start=1):
             st.markdown(f"{i}. [{title}]({url})")
 
@@ -0,0 +1,153 @@
+import asyncio
+import logging
+from concurrent.futures import Executor
+from typing import Optional
+
+from async_scapper import AsyncScrapper
+from engine import WikipediaGame
+from get_similar_word import GetSimilarWord
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+
+class AsyncWikipediaGame(WikipediaGame):
+    """
+    asyncio variant of `WikipediaGame`.
+
+    `play`, `play_stepwise_title` and `play_stepwise_context` are coroutines /
+    async generators, so a single event loop can drive hundreds of games.
+    Fetching is non-blocking; link scoring (encode + argmax) runs in
+    `executor`, the same way `AsyncScrapper` offloads parsing.
+
+        async def race(urls):
+            async with create_client_session() as session:
+                games = [AsyncWikipediaGame(AsyncScrapper(session=session), selector) for _ in urls]
+                return await asyncio.gather(*(g.play(u, "Bhupalpally") for g, u in zip(games, urls)))
+    """
+
+    def __init__(
+        self,
+        scraper: AsyncScrapper,
+        selector: GetSimilarWord,
+        max_steps: int = 100,
+        similarity_threshold: float = 0.40,
+        target_lang: str = "en",
+        executor: Optional[Executor] = None,
+        racer: str = "",
+    ):
+        # No prefetching: the event loop already overlaps the games' fetches.
+        # asyncio games are cancelled through their tasks, not a CancelToken.
+        super().__init__(
+            scraper,
+            selector,
+            max_steps=max_steps,
+            similarity_threshold=similarity_threshold,
+            target_lang=target_lang,
+            prefetch_depth=0,
+            racer=racer,
+        )
+        self.executor = executor
+
+    def _step(self, links, target: str):
+        shortcut = self._find_shortcut(links)
+        if shortcut:
+            return shortcut, None, None
+        best_link, score = self._choose_best_link(links, target)
+        return None, best_link, score
+
+    async def _next_step(self, current_url: str, target: str):
+        """(shortcut to the target or None, best next link, its score)."""
+        links = await self.scraper.get_links(current_url)
+        # Fetching the page may have shown that it redirects to the target
+        self.reached = self._is_target(self._title_from_url(current_url))
+        if self.reached:
+            return None, None, None
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self._step, links, target)
+
+    async def _start_race_async(self, target_title: str):
+        # Building the neighborhood may hit the local graph or the API
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.executor, self._start_race, target_title)
+
+    async def play_stepwise_title(self, start_url: str, target: str):
+        current_url = self._canonical_url(start_url)
+        await self._start_race_async(target)
+
+        for step in range(self.max_steps):
+            title = self._title_from_url(current_url)
+            yield (title, current_url)
+
+            if self._is_target(title):
+                return
+
+            shortcut, best_link, score = await self._next_step(current_url, target)
+            if shortcut:
+                for page in shortcut:
+                    yield page
+                return
+            if not best_link:
+                return
+
+            current_url = self._canonical_url(best_link.url)
+
+    async def play_stepwise_context(self, start_url: str, target_title: str, target_context: str):
+        current_url = self._canonical_url(start_url)
+        await self._start_race_async(target_title)
+
+        for step in range(self.max_steps):
+            title = self._title_from_url(current_url)
+            yield (title, current_url)
+
+            # STOP CONDITION (title match, not context match; redirects count)
+            if self._is_target(title):
+                return
+
+            shortcut, best_link, score = await self._next_step(current_url, target_context)
+            if shortcut:
+                for page in shortcut:
+                    yield page
+                return
+            if not best_link:
+                return
+
+            current_url = self._canonical_url(best_link.url)
+
+    async def play(self, start_url: str, target: str):
+        current_url = self._canonical_url(start_url)
+        path = []
+        await self._start_race_async(target)
+
+        logger.info(f"Starting async greedy wiki navigation from {start_url} -> Target: {target}")
+
+        for step in range(self.max_steps):
+            title = self._title_from_url(current_url)
+            path.append((title, current_url))
+
+            if self._is_target(title):
+                logger.info("🎯 Reached target page!")
+                return path
+
+            shortcut, best_link, score = await self._next_step(current_url, target)
+            if shortcut:
+                return path + shortcut
+
+            if self.reached:
+                return path
+
+            if not best_link:
+                logger.info("❌ No further links. Stopping.")
+                return path
+
+            if score < self.similarity_threshold:
+                logger.info(f"⚠ Best similarity {score:.4f} < threshold {self.similarity_threshold}")
+                return path
+
+            current_url = self._canonical_url(best_link.url)
+
+        logger.info("⚠ Max steps reached.")
+        return path
@@ -0,0 +1,135 @@
+import asyncio
+import logging
+from concurrent.futures import Executor
+from typing import List, Optional
+
+import metrics
+from http_session import wiki_base_url, wiki_title
+from page_cache import PageCache, get_page_cache
+from scapper import Link, parse_links
+from settings import LINK_EXTRACTOR
+from titles import get_redirects
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"
+    " AppleWebKit/537.36 (KHTML, like Gecko)"
+    " Chrome/120.0.0.0 Safari/537.36"
+)
+
+
+def create_client_session(limit: int = 100, limit_per_host: int = 32, timeout: float = 10):
+    """Pooled keep-alive aiohttp session (aiohttp is an optional dependency)."""
+    try:
+        import aiohttp
+    except ImportError as e:
+        raise ImportError(
+            "The async engine needs aiohttp. Install it with `uv sync --extra async`."
+        ) from e
+
+    connector = aiohttp.TCPConnector(
+        limit=limit,
+        limit_per_host=limit_per_host,
+        keepalive_timeout=30,
+        ttl_dns_cache=300,
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=timeout),
+        headers={"User-Agent": USER_AGENT},
+    )
+
+
+class AsyncScrapper:
+    """
+    asyncio counterpart of `Scrapper`.
+
+    One client session (and its connection pool) can be shared by any number
+    of scrapers/games on the same event loop. Page cache disk I/O and HTML
+    parsing run in `executor` so the loop stays free to drive other games.
+    """
+
+    def __init__(
+        self,
+        target_lang: str = "en",
+        session=None,
+        page_cache: Optional[PageCache] = None,
+        executor: Optional[Executor] = None,
+        extractor: str = LINK_EXTRACTOR,
+    ):
+        self.target_lang = target_lang
+        self.base_url = wiki_base_url(self.target_lang)
+        self.page_cache = page_cache if page_cache is not None else get_page_cache()
+        self.executor = executor
+        self.extractor = extractor
+        self.redirects = get_redirects(self.target_lang)  # learns from the pages fetched
+
+        self._session = session
+        self._owns_session = session is None
+
+    @property
+    def session(self):
+        if self._session is None:
+            self._session = create_client_session()
+        return self._session
+
+    async def close(self):
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _get(self, url: str, headers: dict):
+        async with self.session.get(url, headers=headers) as res:
+            body = await res.read()
+            text = body.decode(res.charset or "utf-8", errors="replace") if res.status == 200 else ""
+            return res.status, text, res.headers, len(body)
+
+    async def get_html(self, url: str) -> str:
+        logger.info(f"Fetching URL: {url}")
+        loop = asyncio.get_running_loop()
+        try:
+            if self.page_cache is not None:
+                # Both halves may read, write or evict disk entries: keep them off the loop
+                fresh, stale, headers = await loop.run_in_executor(self.executor, self.page_cache.prepare, url)
+                if fresh is not None:
+                    page = fresh
+                else:
+                    status, text, res_headers, nbytes = await self._get(url, headers)
+                    page = await loop.run_in_executor(
+                        self.executor, self.page_cache.complete, url, stale, status, text, res_headers, nbytes
+                    )
+                status, text = page.status_code, page.text
+            else:
+                status, text, _, _ = await self._get(url, {})
+
+            if status != 200:
+                logger.error(f"Error fetching URL {url}: HTTP {status}")
+                return ""
+
+            logger.info(f"Fetched successfully ({len(text)} chars).")
+            self.redirects.learn(wiki_title(url), text)
+            return text
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error fetching URL {url}: {e}")
+            return ""
+
+    async def get_links(self, url: str) -> List[Link]:
+        html = await self.get_html(url)
+        if not html:
+            logger.warning("Empty HTML. No links extracted.")
+            return []
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.parse_links, html)
+
+    def parse_links(self, html: str) -> List[Link]:
+        with metrics.stage("parse"):
+            return parse_links(html, self.base_url, self.extractor)
@@ -0,0 +1,43 @@
+import logging
+import os
+
+from scapper import Scrapper
+from settings import LINK_BACKEND, LINK_GRAPH_DIR
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+
+def create_scraper(target_lang: str = "en", backend: str = LINK_BACKEND, cancel=None):
+    """
+    Scrapper-compatible link source selected by configuration. `cancel` makes
+    network fetches interruptible; the local graph never blocks and ignores it.
+    """
+    if backend == "graph":
+        from link_graph import GraphScrapper, load_link_graph
+        return GraphScrapper(load_link_graph(LINK_GRAPH_DIR), target_lang)
+
+    if backend == "api":
+        from api_scapper import ApiScrapper
+        return ApiScrapper(target_lang, cancel=cancel)
+
+    if backend != "html":
+        logger.warning(f"Unknown link backend '{backend}', falling back to html.")
+    return Scrapper(target_lang, cancel=cancel)
+
+
+def create_shortest_path_solver(target_lang: str = "en"):
+    """Exact shortest-path racer over the local link graph, or None when no usable graph exists."""
+    if not os.path.exists(os.path.join(LINK_GRAPH_DIR, "meta.json")):
+        return None
+
+    from bidirectional_bfs import ShortestPathSolver
+    from link_graph import load_link_graph
+
+    graph = load_link_graph(LINK_GRAPH_DIR)
+    if not graph.has_reverse or graph.lang != target_lang:
+        return None
+    return ShortestPathSolver(graph, target_lang)
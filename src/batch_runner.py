@@ -0,0 +1,247 @@
+"""
+Headless batch races: run many (start, target) pairs across a process pool.
+
+Input is JSONL ({"start": ..., "target": ..., "id": ...}, id optional) or CSV
+with `start,target[,id]` columns. `start` is a page title or a Wikipedia URL.
+Each worker process loads the model once and runs one race at a time; every
+result is appended to the output JSONL as soon as its race finishes.
+
+    python src/batch_runner.py pairs.jsonl --out results.jsonl --workers 4 --timeout 60
+    python src/batch_runner.py pairs.csv --out results.jsonl --resume   # skip ids already written
+"""
+import argparse
+import csv
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Iterator, Optional, Set
+
+from http_session import wiki_base_url
+from settings import RACE_DEADLINE
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+# Extra seconds a job may run past its race deadline before its worker is
+# considered hung
+_GRACE = 30.0
+
+
+# --------------------------------------------------------------------
+# Input
+# --------------------------------------------------------------------
+def read_jobs(path: str) -> Iterator[dict]:
+    """{"id", "start", "target"} per pair; ids default to the line number."""
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if path.endswith(".csv"):
+            rows = csv.DictReader(f)
+        else:
+            rows = (json.loads(line) for line in f if line.strip())
+
+        for i, row in enumerate(rows):
+            start = row.get("start") or row.get("start_url")
+            target = row.get("target") or row.get("target_title")
+            if not start or not target:
+                logger.warning(f"Skipping row {i}: needs start and target ({row})")
+                continue
+            yield {"id": str(row.get("id") or i), "start": start.strip(), "target": target.strip()}
+
+
+def finished_ids(path: str) -> Set[str]:
+    """Job ids already in an output file (for --resume)."""
+    if not os.path.exists(path):
+        return set()
+    done = set()
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                done.add(str(json.loads(line)["id"]))
+            except (ValueError, KeyError):
+                continue  # a line cut off by a previous crash
+    return done
+
+
+# --------------------------------------------------------------------
+# Worker process
+# --------------------------------------------------------------------
+def _init_worker(log_level: str):
+    # One model per process; it loads in the background while the first
+    # job fetches its target summary and first pages
+    logging.getLogger().setLevel(log_level)
+    from get_similar_word import GetSimilarWord
+    GetSimilarWord.warmup()
+
+
+def _start_url(start: str, lang: str) -> str:
+    """Titles become URLs; URLs are moved to the target's language edition."""
+    slug = start.split("/wiki/", 1)[-1] if "/wiki/" in start else start.replace(" ", "_")
+    return f"{wiki_base_url(lang)}/wiki/{slug}"
+
+
+def run_job(job: dict, timeout: Optional[float], word_limit: int, max_steps: int) -> dict:
+    from fetch_target_summary import fetch_wikipedia_summary
+    from run_thread import run_race
+
+    started = time.perf_counter()
+    record = dict(job, status="failed", winner=None, path=[], steps=0, fetches=0, downloads=0)
+    try:
+        context, lang = fetch_wikipedia_summary(job["target"], word_limit)
+        outcome = run_race(_start_url(job["start"], lang), job["target"], context, lang,
+                           deadline=timeout, max_steps=max_steps)
+
+        winner = outcome.winner
+        record.update(lang=lang, fetches=outcome.fetches, downloads=outcome.downloads)
+        if winner is not None:
+            record.update(
+                status="solved" if winner.complete else "partial",
+                winner=winner.name,
+                path=[title for title, _ in winner.path],
+                steps=max(len(winner.path) - 1, 0),
+            )
+        elif outcome.deadline_reached:
+            record["status"] = "timeout"
+    except Exception as e:
+        logger.exception(f"Job {job['id']} failed")
+        record["error"] = f"{type(e).__name__}: {e}"
+
+    record["wall_time"] = round(time.perf_counter() - started, 3)
+    record["pid"] = os.getpid()
+    return record
+
+
+# --------------------------------------------------------------------
+# Driver
+# --------------------------------------------------------------------
+def run_batch(jobs, out_path: str, workers: int, timeout: Optional[float], max_pending: int,
+              word_limit: int = 100, max_steps: int = 100, log_level: str = "WARNING") -> dict:
+    """
+    Feed `jobs` to `workers` processes with at most `max_pending` in flight and
+    append each result to `out_path` as it completes. Returns summary counts.
+    """
+    counts = {"jobs": 0, "solved": 0, "partial": 0, "timeout": 0, "failed": 0}
+    wall_times = []
+    # Hard limit on top of the in-race deadline, for a worker that stops
+    # responding. The pool hands each worker one queued call ahead, so a
+    # "running" job may still wait for one race before it starts.
+    hard_limit = 2 * timeout + _GRACE if timeout else None
+    stuck = False
+
+    # spawn: workers must not inherit the parent's model or thread state
+    pool = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(log_level,),
+    )
+    pending = {}  # future -> (job, time first seen running or None)
+    jobs = iter(jobs)
+    started = time.perf_counter()
+
+    with open(out_path, "a", encoding="utf-8") as out:
+        def write(record):
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            counts["jobs"] += 1
+            counts[record["status"]] = counts.get(record["status"], 0) + 1
+            wall_times.append(record["wall_time"])
+            logger.info(
+                f"[{counts['jobs']}] {record['id']}: {record['status']} "
+                f"({record['winner']}, {record['steps']} steps, {record['wall_time']}s)"
+            )
+
+        try:
+            while True:
+                while len(pending) < max_pending and not stuck:
+                    job = next(jobs, None)
+                    if job is None:
+                        break
+                    future = pool.submit(run_job, job, timeout, word_limit, max_steps)
+                    pending[future] = (job, None)
+                if not pending:
+                    break
+
+                done, _ = wait(pending, timeout=5, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job, _ = pending.pop(future)
+                    try:
+                        write(future.result())
+                    except Exception as e:  # the worker process died
+                        write(dict(job, status="failed", winner=None, path=[], steps=0,
+                                   wall_time=0.0, error=f"{type(e).__name__}: {e}"))
+
+                if hard_limit is not None:
+                    now = time.monotonic()
+                    for future, (job, running_since) in list(pending.items()):
+                        if running_since is None:
+                            if future.running():
+                                pending[future] = (job, now)
+                        elif now - running_since > hard_limit:
+                            pending.pop(future)
+                            stuck = True
+                            write(dict(job, status="timeout", winner=None, path=[], steps=0,
+                                       wall_time=round(now - running_since, 3), error="worker unresponsive"))
+
+                if stuck:
+                    # Jobs that have not started are left for --resume
+                    for future in [f for f, (_, since) in pending.items() if since is None]:
+                        if future.cancel():
+                            pending.pop(future)
+        finally:
+            if stuck:
+                # A hung worker would block shutdown forever (the pool forgets
+                # its processes on shutdown, so take them first)
+                processes = list((getattr(pool, "_processes", None) or {}).values())
+                pool.shutdown(wait=False, cancel_futures=True)
+                for process in processes:
+                    process.terminate()
+                logger.warning("A worker stopped responding; stopped early. Rerun with --resume.")
+            else:
+                pool.shutdown(wait=True)
+
+    counts["seconds"] = round(time.perf_counter() - started, 1)
+    if wall_times:
+        wall_times.sort()
+        counts["p50_wall_time"] = wall_times[len(wall_times) // 2]
+        counts["p95_wall_time"] = wall_times[min(len(wall_times) - 1, int(len(wall_times) * 0.95))]
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pairs", help="JSONL or CSV of start / target pairs")
+    parser.add_argument("--out", required=True, help="results JSONL (appended to)")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2),
+                        help="worker processes, each with its own model")
+    parser.add_argument("--max-pending", type=int, default=None,
+                        help="jobs in flight at once (default: 2 x workers)")
+    parser.add_argument("--timeout", type=float, default=RACE_DEADLINE,
+                        help="seconds per race; the best partial path is kept (0 = no limit)")
+    parser.add_argument("--word-limit", type=int, default=100)
+    parser.add_argument("--max-steps", type=int, default=100)
+    parser.add_argument("--resume", action="store_true", help="skip ids already in --out")
+    parser.add_argument("--log-level", default="WARNING", help="log level inside workers")
+    args = parser.parse_args()
+
+    jobs = read_jobs(args.pairs)
+    if args.resume:
+        done = finished_ids(args.out)
+        logger.info(f"Resuming: {len(done)} jobs already done.")
+        jobs = (job for job in jobs if job["id"] not in done)
+
+    counts = run_batch(
+        jobs, args.out, args.workers, args.timeout or None,
+        args.max_pending or 2 * args.workers, args.word_limit, args.max_steps, args.log_level,
+    )
+    print(json.dumps(counts, indent=2))
+    return 0 if counts["jobs"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
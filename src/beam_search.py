@@ -0,0 +1,240 @@
+import heapq
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+from urllib.parse import unquote, urlparse
+
+import numpy as np
+
+from cancellation import Cancelled, CancelToken
+from http_session import wiki_title
+from link_pipeline import prepare_candidates
+from settings import BEAM_BATCH_SIZE, BEAM_MAX_EXPANSIONS, BEAM_WIDTH, BEAM_WORKERS, SUMMARY_WEIGHT
+from summary_index import blend_scores, get_summary_index
+from target_neighborhood import get_target_neighborhood
+from titles import get_redirects
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SearchStats:
+    solved: bool = False
+    cancelled: bool = False
+    hops: int = 0
+    expansions: int = 0
+    pages_fetched: int = 0
+    links_found: int = 0  # raw links on the expanded pages, before link_pipeline
+    encode_calls: int = 0
+    texts_encoded: int = 0
+    frontier_peak: int = 0
+    pruned: int = 0
+    seconds: float = 0.0
+
+
+@dataclass
+class SearchResult:
+    path: List[Tuple[str, str]] = field(default_factory=list)  # (title, url), start first
+    stats: SearchStats = field(default_factory=SearchStats)
+    score: Optional[float] = None  # similarity of the last page of a partial path
+
+
+class BeamSearch:
+    """
+    Best-first navigation with a bounded frontier.
+
+    Unlike the greedy loop, which commits to one argmax per step, every scored
+    link goes into a priority queue of (score, page, path) and the search
+    always continues from the best page seen so far, so a dead end only costs
+    one expansion. Each round pops `batch_size` pages, fetches them
+    concurrently and scores all of their links with a single encode call.
+    The goal test runs on the links of an expanded page against the target's
+    backlink neighborhood, so neither the target nor the pages right before
+    it are fetched.
+
+    beam_width      frontier size kept after each round (lower scores are pruned)
+    max_expansions  page fetch budget for one race
+    batch_size      pages expanded (fetched + encoded) together per round
+    cancel          race token; when it fires the best frontier path so far is
+                    returned as a partial (unsolved) result
+    target_lang     race language (defaults to the scraper's); picks the
+                    redirects, the neighborhood and whether the summary index applies
+    """
+
+    def __init__(
+        self,
+        scraper,
+        selector,
+        beam_width: int = BEAM_WIDTH,
+        max_expansions: int = BEAM_MAX_EXPANSIONS,
+        batch_size: int = BEAM_BATCH_SIZE,
+        max_workers: int = BEAM_WORKERS,
+        cancel: Optional[CancelToken] = None,
+        target_lang: Optional[str] = None,
+    ):
+        self.scraper = scraper
+        self.selector = selector
+        self.target_lang = target_lang or getattr(scraper, "target_lang", "en")
+        self.redirects = get_redirects(self.target_lang)
+        self.beam_width = max(1, beam_width)
+        self.max_expansions = max_expansions
+        self.batch_size = max(1, batch_size)
+        self.max_workers = max(1, max_workers)
+        self.cancel = cancel
+        self.neighborhood = None
+        self.summary_index = get_summary_index(self.target_lang) if SUMMARY_WEIGHT > 0 else None
+        self.last_stats: Optional[SearchStats] = None
+        self.target_title = ""
+
+    @staticmethod
+    def _canonical_url(url: str) -> str:
+        return urlparse(url)._replace(fragment="", query="").geturl()
+
+    @staticmethod
+    def _title_from_url(url: str) -> str:
+        title = wiki_title(url)
+        if not title:
+            return url
+        return unquote(title).replace("_", " ")
+
+    def _encode(self, texts: List[str], stats: SearchStats) -> np.ndarray:
+        stats.encode_calls += 1
+        stats.texts_encoded += len(texts)
+        if self.cancel is None:
+            return self.selector.encode(texts)
+        return self.selector.encode(texts, cancel=self.cancel)
+
+    def _fetch(self, pool: ThreadPoolExecutor, urls: List[str], stats: SearchStats):
+        def get(url):
+            try:
+                return self.scraper.get_links(url)
+            except Cancelled:
+                raise
+            except Exception as e:
+                logger.warning(f"Beam fetch failed for {url}: {e}")
+                return []
+
+        stats.pages_fetched += len(urls)
+        if len(urls) == 1:
+            return [get(urls[0])]
+        if hasattr(self.scraper, "get_links_many"):
+            # Batching backends (the API) fetch the whole round in one request
+            pages = self.scraper.get_links_many(urls)
+            return [pages.get(url, []) for url in urls]
+        return list(pool.map(get, urls))
+
+    def search(self, start_url: str, target_title: str, query: Optional[str] = None) -> SearchResult:
+        """Find a path to `target_title`, scoring links against `query` (defaults to the title)."""
+        stats = SearchStats()
+        start = time.perf_counter()
+        result = SearchResult(stats=stats)
+        self.target_title = target_title
+        start_url = self._canonical_url(start_url)
+        root = ((self._title_from_url(start_url), start_url),)
+        if self.redirects.same_page(root[0][0], target_title):
+            result.path = list(root)
+            stats.solved = True
+        else:
+            self.neighborhood = get_target_neighborhood(
+                target_title, self.target_lang, cancel=self.cancel,
+            )
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="beam") as pool:
+                result.path, result.score = self._run(pool, root, query or target_title, stats)
+
+        stats.hops = max(len(result.path) - 1, 0)
+        stats.seconds = time.perf_counter() - start
+        self.last_stats = stats
+
+        logger.info(
+            f"Beam search {'solved' if stats.solved else 'cancelled' if stats.cancelled else 'gave up'}: "
+            f"{stats.hops} hops, "
+            f"{stats.pages_fetched} pages fetched, {stats.encode_calls} encode calls, "
+            f"{stats.seconds:.2f}s"
+        )
+        return result
+
+    def _run(self, pool, root, query: str, stats: SearchStats):
+        seen = {self.redirects.key(root[0][0])}  # page keys, so redirects to one page count once
+        # Entries are (-score, insertion id, path); the id breaks score ties
+        # so paths are never compared
+        frontier = [(0.0, 0, root)]
+
+        try:
+            query_emb = self._encode([query], stats)
+            while frontier and stats.expansions < self.max_expansions:
+                path = self._round(pool, frontier, seen, query_emb, stats)
+                if path:
+                    stats.solved = True
+                    return path, None
+                if len(frontier) > self.beam_width:
+                    stats.pruned += len(frontier) - self.beam_width
+                    frontier[:] = heapq.nsmallest(self.beam_width, frontier)
+                    heapq.heapify(frontier)
+        except Cancelled as e:
+            # Best partial path: the most promising page still on the frontier
+            logger.info(f"Beam search cancelled: {e}")
+            stats.cancelled = True
+            if not frontier:
+                return list(root), None
+            return list(frontier[0][2]), -frontier[0][0]
+
+        return [], None
+
+    def _round(self, pool, frontier, seen, query_emb: np.ndarray, stats: SearchStats):
+        """Expand the best `batch_size` pages; returns the solved path or None."""
+        if self.cancel is not None:
+            self.cancel.check()
+
+        n = min(self.batch_size, len(frontier), self.max_expansions - stats.expansions)
+        batch = [heapq.heappop(frontier) for _ in range(n)]
+        stats.expansions += n
+
+        try:
+            pages = self._fetch(pool, [item[2][-1][1] for item in batch], stats)
+        except Cancelled:
+            for item in batch:  # keep them as partial-path candidates
+                heapq.heappush(frontier, item)
+            raise
+
+        # Goal test on generation; collect the unseen links of every page
+        candidates = []
+        for (_, _, path), links in zip(batch, pages):
+            if self.redirects.same_page(path[-1][0], self.target_title):
+                return list(path)  # fetching it showed the page redirects to the target
+            shortcut = self.neighborhood.find(links)
+            if shortcut:
+                return list(path) + shortcut
+            stats.links_found += len(links)
+            page = prepare_candidates(links, page_key=self.redirects.key)
+            for link, text, key in zip(page.links, page.texts, page.keys):
+                if key in seen:
+                    continue
+                seen.add(key)
+                candidates.append((text, path + ((self._title_from_url(link.url), link.url),)))
+
+        if not candidates:
+            return None
+
+        # One encode call for the whole batch; repeated anchors hit the cache
+        embs = self._encode([text for text, _ in candidates], stats)
+        scores = np.dot(embs, query_emb.T).flatten()
+        scores = blend_scores(
+            self.summary_index, [path[-1][0] for _, path in candidates], query_emb, scores, SUMMARY_WEIGHT
+        )
+
+        first_id = len(seen) - len(candidates)
+        for i, ((_, path), score) in enumerate(zip(candidates, scores.tolist())):
+            heapq.heappush(frontier, (-score, first_id + i, path))
+
+        stats.frontier_peak = max(stats.frontier_peak, len(frontier))
+        return None
+
+    def play_stepwise(self, start_url: str, target_title: str, query: Optional[str] = None):
+        """Same generator shape as WikipediaGame; yields the solved path."""
+        yield from self.search(start_url, target_title, query).path
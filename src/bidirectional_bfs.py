@@ -0,0 +1,164 @@
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from link_graph import GraphScrapper, LinkGraph
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ShortestPathResult:
+    path: List[int] = field(default_factory=list)  # node ids, empty if unreachable
+    levels: int = 0
+    expanded_forward: int = 0
+    expanded_backward: int = 0
+    edges_scanned: int = 0
+    visited: int = 0
+    seconds: float = 0.0
+
+    @property
+    def found(self) -> bool:
+        return bool(self.path)
+
+
+class _Bitset:
+    def __init__(self, size: int):
+        self.bits = np.zeros((size + 7) // 8, dtype=np.uint8)
+
+    def test(self, ids: np.ndarray) -> np.ndarray:
+        return ((self.bits[ids >> 3] >> (ids & 7).astype(np.uint8)) & 1).astype(bool)
+
+    def set(self, ids: np.ndarray):
+        np.bitwise_or.at(self.bits, ids >> 3, (1 << (ids & 7)).astype(np.uint8))
+
+
+class _Side:
+    """One direction of the search: frontier, visited bitset and parent pointers."""
+
+    def __init__(self, num_nodes: int, root: int, offsets: np.ndarray, targets: np.ndarray):
+        self.offsets = offsets
+        self.targets = targets
+        self.visited = _Bitset(num_nodes)
+        self.parents: Dict[int, int] = {root: -1}
+        self.frontier = np.array([root], dtype=np.int64)
+        self.visited.set(self.frontier)
+        self.expanded = 0
+
+    def expand(self):
+        """Advance one full BFS level. Returns (new nodes, edges scanned)."""
+        starts = self.offsets[self.frontier]
+        ends = self.offsets[self.frontier + 1]
+        degrees = ends - starts
+        self.expanded += len(self.frontier)
+
+        if degrees.sum() == 0:
+            self.frontier = np.zeros(0, dtype=np.int64)
+            return self.frontier, 0
+
+        # Gather all neighbor slices with one fancy-index instead of a Python loop
+        total = int(degrees.sum())
+        idx = np.arange(total) + np.repeat(starts - (np.cumsum(degrees) - degrees), degrees)
+        neighbors = np.asarray(self.targets[idx], dtype=np.int64)
+        parents = np.repeat(self.frontier, degrees)
+
+        fresh = ~self.visited.test(neighbors)
+        neighbors, parents = neighbors[fresh], parents[fresh]
+        neighbors, first = np.unique(neighbors, return_index=True)
+        parents = parents[first]
+
+        self.visited.set(neighbors)
+        self.parents.update(zip(neighbors.tolist(), parents.tolist()))
+        self.frontier = neighbors
+        return neighbors, total
+
+    def chain(self, node: int) -> List[int]:
+        out = []
+        while node != -1:
+            out.append(node)
+            node = self.parents[node]
+        return out
+
+
+def shortest_path(graph: LinkGraph, source: int, target: int, max_levels: int = 64) -> ShortestPathResult:
+    """
+    Bidirectional BFS over forward and reverse adjacency. Each round expands
+    whichever frontier is smaller by one full level, so the first level on
+    which the two searches touch yields a shortest path.
+    """
+    start = time.perf_counter()
+    result = ShortestPathResult()
+
+    if source == target:
+        result.path = [source]
+        result.visited = 1
+        result.seconds = time.perf_counter() - start
+        return result
+
+    if not graph.has_reverse:
+        graph.in_neighbors(target)  # raises with a hint on how to add it
+
+    forward = _Side(graph.num_nodes, source, graph.offsets, graph.targets)
+    backward = _Side(graph.num_nodes, target, graph.rev_offsets, graph.rev_targets)
+
+    while len(forward.frontier) and len(backward.frontier) and result.levels < max_levels:
+        grow_forward = len(forward.frontier) <= len(backward.frontier)
+        side, other = (forward, backward) if grow_forward else (backward, forward)
+
+        new_nodes, scanned = side.expand()
+        result.levels += 1
+        result.edges_scanned += scanned
+
+        if not len(new_nodes):
+            break
+
+        meet = new_nodes[other.visited.test(new_nodes)]
+        if len(meet):
+            node = int(meet[0])
+            result.path = forward.chain(node)[::-1] + backward.chain(node)[1:]
+            break
+
+    result.expanded_forward = forward.expanded
+    result.expanded_backward = backward.expanded
+    result.visited = len(forward.parents) + len(backward.parents)
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+class ShortestPathSolver:
+    """
+    Racer that answers with a guaranteed-shortest path from the local link
+    graph. Exposes the same stepwise generator shape as WikipediaGame.
+    """
+
+    def __init__(self, graph: LinkGraph, target_lang: Optional[str] = None):
+        self.graph = graph
+        self.scraper = GraphScrapper(graph, target_lang)
+        self.last_result: Optional[ShortestPathResult] = None
+
+    def solve(self, start_url: str, target_title: str) -> ShortestPathResult:
+        source = self.scraper.node_from_url(start_url)
+        target = self.graph.node_id(target_title)
+        if source is None or target is None:
+            logger.warning(f"Start or target not in link graph: {start_url} -> {target_title}")
+            self.last_result = ShortestPathResult()
+            return self.last_result
+
+        self.last_result = shortest_path(self.graph, source, target)
+        logger.info(
+            f"Shortest path: {len(self.last_result.path) - 1} hops, "
+            f"{self.last_result.visited} visited, {self.last_result.seconds * 1000:.1f} ms"
+        )
+        return self.last_result
+
+    def play_stepwise(self, start_url: str, target_title: str):
+        result = self.solve(start_url, target_title)
+        for node in result.path:
+            yield (self.graph.title(node), self.scraper.url_for(node))
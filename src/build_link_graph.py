@@ -0,0 +1,380 @@
+"""
+Build a memory-mapped link graph (see link_graph.py) from Wikipedia dumps.
+
+SQL dumps from https://dumps.wikimedia.org/<lang>wiki/latest/:
+
+    python src/build_link_graph.py --lang en --out graph/en \\
+        --page enwiki-latest-page.sql.gz \\
+        --redirect enwiki-latest-redirect.sql.gz \\
+        --pagelinks enwiki-latest-pagelinks.sql.gz \\
+        --linktarget enwiki-latest-linktarget.sql.gz
+
+`--linktarget` is needed for dumps using the 2024+ pagelinks schema
+(pl_target_id); older dumps carry pl_title directly and do not need it.
+
+A tab-separated "source<TAB>target" title list also works, which is handy
+for small hand-made graphs:
+
+    python src/build_link_graph.py --lang en --out graph/toy --edges edges.tsv
+
+Only main-namespace pages are kept. Links to redirects are rewritten to the
+redirect target, and duplicate links and self-links are dropped. The
+builder holds all edges in RAM while sorting (~16 bytes per link).
+"""
+import argparse
+import gzip
+import json
+import logging
+import os
+import re
+import time
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from link_graph import title_key
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+
+SQL_STRING = rb"'((?:[^'\\]|\\.)*)'"
+SQL_VALUE = rb"(?:'(?:[^'\\]|\\.)*'|NULL|-?[0-9.eE+-]+)"
+COLUMN_RE = re.compile(rb"\s+`(\w+)`")
+REDIRECT_RE = re.compile(rb"\((\d+),(-?\d+)," + SQL_STRING + rb",")
+LINKTARGET_RE = re.compile(rb"\((\d+),(-?\d+)," + SQL_STRING + rb"\)")
+PAGELINKS_NEW_RE = re.compile(rb"\((\d+),(-?\d+),(\d+)\)")
+PAGELINKS_OLD_RE = re.compile(rb"\((\d+),(-?\d+)," + SQL_STRING + rb",(-?\d+)\)")
+
+# Columns of the page table the builder reads. Their position depends on the
+# MediaWiki version (older dumps have page_restrictions between page_title and
+# page_is_redirect), so the row pattern is built from the dump's CREATE TABLE.
+PAGE_FIELDS = {
+    "page_id": rb"(?P<id>\d+)",
+    "page_namespace": rb"(?P<ns>-?\d+)",
+    "page_title": rb"'(?P<title>(?:[^'\\]|\\.)*)'",
+    "page_is_redirect": rb"(?P<redirect>[01])",
+}
+# Leading columns of the current layout, assumed when a dump has no CREATE TABLE
+PAGE_COLUMNS = ["page_id", "page_namespace", "page_title", "page_is_redirect", "page_is_new"]
+
+SQL_ESCAPES = {b"0": b"\0", b"n": b"\n", b"r": b"\r", b"t": b"\t", b"Z": b"\x1a"}
+SQL_ESCAPE_RE = re.compile(rb"\\(.)")
+
+
+def sql_unescape(value: bytes) -> bytes:
+    if b"\\" not in value:
+        return value
+    return SQL_ESCAPE_RE.sub(lambda m: SQL_ESCAPES.get(m.group(1), m.group(1)), value)
+
+
+def iter_insert_lines(path: str, table: str) -> Iterator[bytes]:
+    prefix = f"INSERT INTO `{table}` VALUES ".encode("ascii")
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rb") as f:
+        for line in f:
+            if line.startswith(prefix):
+                yield line
+
+
+def table_columns(path: str, table: str) -> Optional[List[str]]:
+    """Column names from the dump's CREATE TABLE statement (None when it has none)."""
+    create = f"CREATE TABLE `{table}` (".encode("ascii")
+    opener = gzip.open if path.endswith(".gz") else open
+    columns = None
+    with opener(path, "rb") as f:
+        for line in f:
+            if columns is None:
+                if line.startswith(create):
+                    columns = []
+                elif line.startswith(b"INSERT INTO"):
+                    return None
+                continue
+            m = COLUMN_RE.match(line)
+            if m is None:
+                return columns  # keys and options follow the columns
+            columns.append(m.group(1).decode("ascii"))
+    return columns
+
+
+def page_row_re(columns: List[str]) -> "re.Pattern":
+    """Row pattern of a page table with these columns; groups id, ns, title, redirect."""
+    missing = [c for c in PAGE_FIELDS if c not in columns]
+    if missing:
+        raise SystemExit(f"The page dump has no {', '.join(missing)} column (columns: {', '.join(columns)}).")
+    last = max(columns.index(c) for c in PAGE_FIELDS)
+    fields = [PAGE_FIELDS.get(c, SQL_VALUE) for c in columns[:last + 1]]
+    end = rb"\)" if last == len(columns) - 1 else rb","
+    return re.compile(rb"\(" + rb",".join(fields) + end)
+
+
+PAGE_RE = page_row_re(PAGE_COLUMNS)
+
+
+# --------------------------------------------------------------------
+# CSR construction and output
+# --------------------------------------------------------------------
+def csr_from_edges(num_nodes: int, src: np.ndarray, dst: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Deduplicated, sorted CSR (offsets, targets). Negative ids and self-links are dropped."""
+    src = np.asarray(src, dtype=np.int64)
+    dst = np.asarray(dst, dtype=np.int64)
+    keep = (src >= 0) & (dst >= 0) & (src != dst)
+
+    keys = np.unique(src[keep] * num_nodes + dst[keep])
+    rows = keys // num_nodes
+    targets = (keys % num_nodes).astype(np.int32)
+
+    offsets = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=num_nodes), out=offsets[1:])
+    return offsets, targets
+
+
+def reverse_csr(offsets: np.ndarray, targets: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """CSR of the transposed graph (who links to each node)."""
+    num_nodes = len(offsets) - 1
+    sources = np.repeat(np.arange(num_nodes, dtype=np.int32), np.diff(offsets))
+    order = np.argsort(targets, kind="stable")
+
+    rev_offsets = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(targets, minlength=num_nodes), out=rev_offsets[1:])
+    return rev_offsets, sources[order]
+
+
+def _write_strings(directory: str, blob_name: str, offsets_name: str, values: List[bytes]):
+    offsets = np.zeros(len(values) + 1, dtype=np.int64)
+    np.cumsum([len(v) for v in values], out=offsets[1:])
+    with open(os.path.join(directory, blob_name), "wb") as f:
+        for v in values:
+            f.write(v)
+    offsets.tofile(os.path.join(directory, offsets_name))
+
+
+def write_graph(
+    out_dir: str,
+    lang: str,
+    titles: List[bytes],
+    page_ids: np.ndarray,
+    offsets: np.ndarray,
+    targets: np.ndarray,
+    redirects: Optional[Dict[bytes, int]] = None,
+    source: str = "",
+):
+    """`titles` must be sorted bytewise; node i is titles[i]."""
+    os.makedirs(out_dir, exist_ok=True)
+    redirects = redirects or {}
+
+    np.asarray(offsets, dtype=np.int64).tofile(os.path.join(out_dir, "offsets.i64"))
+    np.asarray(targets, dtype=np.int32).tofile(os.path.join(out_dir, "targets.i32"))
+    np.asarray(page_ids, dtype=np.int32).tofile(os.path.join(out_dir, "page_ids.i32"))
+    _write_strings(out_dir, "titles.bin", "title_offsets.i64", titles)
+
+    rev_offsets, rev_targets = reverse_csr(np.asarray(offsets), np.asarray(targets, dtype=np.int32))
+    rev_offsets.tofile(os.path.join(out_dir, "rev_offsets.i64"))
+    rev_targets.tofile(os.path.join(out_dir, "rev_targets.i32"))
+
+    redirect_titles = sorted(redirects)
+    _write_strings(out_dir, "redirect_titles.bin", "redirect_offsets.i64", redirect_titles)
+    np.array([redirects[t] for t in redirect_titles], dtype=np.int32).tofile(
+        os.path.join(out_dir, "redirect_targets.i32")
+    )
+
+    # meta last: a graph directory without it is incomplete
+    with open(os.path.join(out_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "lang": lang,
+            "nodes": len(titles),
+            "edges": int(len(targets)),
+            "redirects": len(redirects),
+            "source": source,
+            "built_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        }, f, indent=2)
+
+    logger.info(f"Wrote {len(titles)} pages / {len(targets)} links / {len(redirects)} redirects to {out_dir}")
+
+
+# --------------------------------------------------------------------
+# Builders
+# --------------------------------------------------------------------
+def build_from_edges(out_dir: str, lang: str, edges: Iterable[Tuple[str, str]]):
+    pairs = [(title_key(a), title_key(b)) for a, b in edges]
+    titles = sorted({t for pair in pairs for t in pair})
+    node_of = {t: i for i, t in enumerate(titles)}
+
+    src = np.array([node_of[a] for a, _ in pairs], dtype=np.int64)
+    dst = np.array([node_of[b] for _, b in pairs], dtype=np.int64)
+    offsets, targets = csr_from_edges(len(titles), src, dst)
+
+    write_graph(out_dir, lang, titles, np.arange(len(titles)), offsets, targets, source="edges")
+
+
+def build_from_sql(
+    out_dir: str,
+    lang: str,
+    page_path: str,
+    pagelinks_path: str,
+    redirect_path: Optional[str] = None,
+    linktarget_path: Optional[str] = None,
+):
+    # 1. Pages: main-namespace articles become nodes, in title order
+    article_ids = array("q")
+    article_titles: List[bytes] = []
+    redirect_pages: Dict[int, bytes] = {}
+
+    columns = table_columns(page_path, "page")
+    page_re = PAGE_RE if columns is None else page_row_re(columns)
+    inserts = matched = 0
+    for line in iter_insert_lines(page_path, "page"):
+        inserts += 1
+        for m in page_re.finditer(line):
+            matched += 1
+            if m.group("ns") != b"0":
+                continue
+            page_id, title = int(m.group("id")), sql_unescape(m.group("title"))
+            if m.group("redirect") == b"1":
+                redirect_pages[page_id] = title
+            else:
+                article_ids.append(page_id)
+                article_titles.append(title)
+
+    if inserts and not matched:
+        layout = ", ".join(columns or PAGE_COLUMNS)
+        raise SystemExit(f"No rows of {page_path} matched the page table layout ({layout}).")
+
+    logger.info(f"Pages: {len(article_titles)} articles, {len(redirect_pages)} redirects")
+
+    order = sorted(range(len(article_titles)), key=article_titles.__getitem__)
+    titles = [article_titles[i] for i in order]
+    page_ids = np.frombuffer(article_ids, dtype=np.int64)[order]
+    del article_titles, article_ids
+
+    resolve: Dict[bytes, int] = {t: i for i, t in enumerate(titles)}
+
+    # page_id -> node, via searchsorted over the sorted ids
+    id_order = np.argsort(page_ids)
+    sorted_ids = page_ids[id_order]
+
+    def nodes_for_page_ids(ids: np.ndarray) -> np.ndarray:
+        if not len(sorted_ids):
+            return np.full(len(ids), -1, dtype=np.int64)
+        pos = np.clip(np.searchsorted(sorted_ids, ids), 0, len(sorted_ids) - 1)
+        return np.where(sorted_ids[pos] == ids, id_order[pos], -1)
+
+    # 2. Redirects (one hop; double redirects are left unresolved)
+    redirects: Dict[bytes, int] = {}
+    if redirect_path:
+        for line in iter_insert_lines(redirect_path, "redirect"):
+            for m in REDIRECT_RE.finditer(line):
+                if m.group(2) != b"0":
+                    continue
+                source = redirect_pages.get(int(m.group(1)))
+                target = resolve.get(sql_unescape(m.group(3)))
+                if source is not None and target is not None:
+                    redirects[source] = target
+        resolve.update(redirects)
+        logger.info(f"Resolved {len(redirects)} redirects")
+    del redirect_pages
+
+    # 3. Link targets (new pagelinks schema)
+    lt_ids = lt_nodes = None
+    if linktarget_path:
+        ids, nodes = array("q"), array("i")
+        for line in iter_insert_lines(linktarget_path, "linktarget"):
+            for m in LINKTARGET_RE.finditer(line):
+                if m.group(2) != b"0":
+                    continue
+                node = resolve.get(sql_unescape(m.group(3)))
+                if node is not None:
+                    ids.append(int(m.group(1)))
+                    nodes.append(node)
+        lt_ids = np.frombuffer(ids, dtype=np.int64)
+        lt_nodes = np.frombuffer(nodes, dtype=np.int32)
+        lt_order = np.argsort(lt_ids)
+        lt_ids, lt_nodes = lt_ids[lt_order], lt_nodes[lt_order]
+        logger.info(f"Link targets: {len(lt_ids)} main-namespace targets")
+
+    # 4. Links
+    src_pages, dst = array("q"), array("q")
+    new_schema = None
+    values_start = len(b"INSERT INTO `pagelinks` VALUES ")
+    for line in iter_insert_lines(pagelinks_path, "pagelinks"):
+        if new_schema is None:
+            new_schema = PAGELINKS_NEW_RE.match(line, values_start) is not None
+            if new_schema and lt_ids is None:
+                raise SystemExit("This pagelinks dump uses pl_target_id; pass --linktarget too.")
+
+        if new_schema:
+            for pl_from, from_ns, target_id in PAGELINKS_NEW_RE.findall(line):
+                if from_ns == b"0":
+                    src_pages.append(int(pl_from))
+                    dst.append(int(target_id))
+            continue
+
+        for m in PAGELINKS_OLD_RE.finditer(line):
+            if m.group(2) != b"0" or m.group(4) != b"0":
+                continue
+            node = resolve.get(sql_unescape(m.group(3)))
+            if node is not None:
+                src_pages.append(int(m.group(1)))
+                dst.append(node)
+
+    src = nodes_for_page_ids(np.frombuffer(src_pages, dtype=np.int64))
+    dst = np.frombuffer(dst, dtype=np.int64)
+    if lt_ids is not None:
+        if len(lt_ids):
+            pos = np.clip(np.searchsorted(lt_ids, dst), 0, len(lt_ids) - 1)
+            dst = np.where(lt_ids[pos] == dst, lt_nodes[pos], -1)
+        else:
+            dst = np.full(len(dst), -1, dtype=np.int64)
+
+    logger.info(f"Links read: {len(src)}")
+    offsets, targets = csr_from_edges(len(titles), src, dst)
+
+    write_graph(
+        out_dir, lang, titles, page_ids, offsets, targets, redirects,
+        source=os.path.basename(pagelinks_path),
+    )
+
+
+def add_reverse(graph_dir: str):
+    """Add the reverse adjacency to a graph built before it was part of the format."""
+    offsets = np.fromfile(os.path.join(graph_dir, "offsets.i64"), dtype=np.int64)
+    targets = np.fromfile(os.path.join(graph_dir, "targets.i32"), dtype=np.int32)
+    rev_offsets, rev_targets = reverse_csr(offsets, targets)
+    rev_offsets.tofile(os.path.join(graph_dir, "rev_offsets.i64"))
+    rev_targets.tofile(os.path.join(graph_dir, "rev_targets.i32"))
+    logger.info(f"Wrote reverse adjacency for {len(offsets) - 1} pages to {graph_dir}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", required=True, help="output graph directory")
+    parser.add_argument("--add-reverse", action="store_true", help="only add reverse adjacency to an existing graph")
+    parser.add_argument("--lang", default="en")
+    parser.add_argument("--page", help="page.sql(.gz)")
+    parser.add_argument("--pagelinks", help="pagelinks.sql(.gz)")
+    parser.add_argument("--redirect", help="redirect.sql(.gz)")
+    parser.add_argument("--linktarget", help="linktarget.sql(.gz), for 2024+ pagelinks dumps")
+    parser.add_argument("--edges", help="TSV of 'source<TAB>target' titles instead of SQL dumps")
+    args = parser.parse_args()
+
+    start = time.time()
+    if args.add_reverse:
+        add_reverse(args.out)
+    elif args.edges:
+        with open(args.edges, "r", encoding="utf-8") as f:
+            rows = (line.rstrip("\n").split("\t") for line in f if "\t" in line)
+            build_from_edges(args.out, args.lang, [(r[0], r[1]) for r in rows])
+    elif args.page and args.pagelinks:
+        build_from_sql(args.out, args.lang, args.page, args.pagelinks, args.redirect, args.linktarget)
+    else:
+        parser.error("pass --page and --pagelinks (SQL dumps) or --edges")
+
+    logger.info(f"Done in {time.time() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
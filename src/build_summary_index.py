@@ -0,0 +1,243 @@
+"""
+Build the page-summary embedding index (see summary_index.py).
+
+Each article's lead paragraph is cleaned exactly like the target context
+(clean_summary.clean_text, first --word-limit words), embedded with the game's
+model and stored as a float16 or int8 memory-mapped matrix.
+
+From the abstracts dump (https://dumps.wikimedia.org/<lang>wiki/latest/):
+
+    python src/build_summary_index.py --out ~/.cache/wikigame/summaries \\
+        --abstracts enwiki-latest-abstract.xml.gz --graph ~/.cache/wikigame/graph
+
+From a JSONL file of {"title": ..., "text": ..., "page_id": ...} lines, or by
+fetching the listed titles (one per line) through the page cache:
+
+    python src/build_summary_index.py --out summaries --jsonl leads.jsonl --dtype i8
+    python src/build_summary_index.py --out summaries --fetch titles.txt --workers 8
+
+With --graph, page ids come from the link graph and titles that are not in
+it are skipped, so the index lines up with the offline graph.
+"""
+import argparse
+import bz2
+import gzip
+import json
+import logging
+import os
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from clean_summary import clean_text
+from settings import MODEL_NAME
+from summary_index import title_hashes
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+
+def _open(path: str, mode: str = "rb"):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode)
+    if path.endswith(".bz2"):
+        return bz2.open(path, mode)
+    return open(path, mode)
+
+
+def summary_from_text(text: str, word_limit: int) -> Optional[str]:
+    """Same cleaning and cut-off as fetch_target_summary.extract_summary."""
+    cleaned = clean_text(text or "")
+    if not cleaned or len(cleaned) < 30:
+        return None
+    return " ".join(cleaned.split()[:word_limit])
+
+
+# --------------------------------------------------------------------
+# Sources: (title, raw lead text, page_id or -1)
+# --------------------------------------------------------------------
+def iter_abstracts(path: str) -> Iterator[Tuple[str, str, int]]:
+    """<doc><title>Wikipedia: X</title><abstract>...</abstract></doc> records."""
+    with _open(path) as f:
+        for _, elem in ET.iterparse(f, events=("end",)):
+            if elem.tag != "doc":
+                continue
+            title = (elem.findtext("title") or "").split(":", 1)[-1].strip()
+            abstract = elem.findtext("abstract") or ""
+            elem.clear()
+            if title:
+                yield title, abstract, -1
+
+
+def iter_jsonl(path: str) -> Iterator[Tuple[str, str, int]]:
+    with _open(path, "rt") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            yield row["title"], row.get("text", ""), int(row.get("page_id", -1))
+
+
+def iter_fetched(path: str, lang: str, workers: int, word_limit: int) -> Iterator[Tuple[str, str, int]]:
+    """Fetch each listed title's lead paragraph through Scrapper and the page cache."""
+    from fetch_target_summary import extract_summary
+    from scapper import Scrapper
+
+    with open(path, "r", encoding="utf-8") as f:
+        titles = [line.strip() for line in f if line.strip()]
+
+    scraper = Scrapper(lang)
+
+    def lead(title):
+        html = scraper.get_html(f"{scraper.base_url}/wiki/{title.replace(' ', '_')}")
+        return title, (extract_summary(html, word_limit) if html else None) or "", -1
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(lead, titles)
+
+
+# --------------------------------------------------------------------
+# Writer
+# --------------------------------------------------------------------
+class SummaryIndexWriter:
+    """Appends normalized rows to the vector file; lookup tables and meta.json are written on close."""
+
+    def __init__(self, out_dir: str, model: str, dtype: str):
+        os.makedirs(out_dir, exist_ok=True)
+        self.out_dir = out_dir
+        self.model = model
+        self.dtype = dtype
+        self.dim = None
+        self.titles: List[str] = []
+        self.page_ids: List[int] = []
+
+        ext = "i8" if dtype == "i8" else "f16"
+        self._vectors = open(os.path.join(out_dir, f"vectors.{ext}"), "wb")
+        self._scales = open(os.path.join(out_dir, "scales.f32"), "wb") if dtype == "i8" else None
+
+    def add(self, titles: List[str], page_ids: List[int], vectors: np.ndarray):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        self.dim = vectors.shape[1]
+
+        if self.dtype == "i8":
+            scales = np.maximum(np.abs(vectors).max(axis=1), 1e-12) / 127.0
+            np.round(vectors / scales[:, None]).astype(np.int8).tofile(self._vectors)
+            scales.astype(np.float32).tofile(self._scales)
+        else:
+            vectors.astype(np.float16).tofile(self._vectors)
+
+        self.titles.extend(titles)
+        self.page_ids.extend(page_ids)
+
+    def close(self, lang: str, source: str):
+        self._vectors.close()
+        if self._scales is not None:
+            self._scales.close()
+
+        rows = len(self.titles)
+        # np.unique keeps the first row of duplicate titles / page ids
+        hashes, first = np.unique(title_hashes(self.titles), return_index=True)
+        hashes.tofile(os.path.join(self.out_dir, "title_hashes.u64"))
+        first.astype(np.int32).tofile(os.path.join(self.out_dir, "title_rows.i32"))
+
+        page_ids = np.array(self.page_ids, dtype=np.int32)
+        page_ids.tofile(os.path.join(self.out_dir, "page_ids.i32"))
+        known = np.flatnonzero(page_ids >= 0)
+        sorted_ids, first = np.unique(page_ids[known], return_index=True)
+        sorted_ids.astype(np.int32).tofile(os.path.join(self.out_dir, "page_sorted_ids.i32"))
+        known[first].astype(np.int32).tofile(os.path.join(self.out_dir, "page_sorted_rows.i32"))
+
+        # meta.json last: its presence marks a complete index
+        with open(os.path.join(self.out_dir, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                "model": self.model, "dim": self.dim or 0, "dtype": self.dtype, "rows": rows,
+                "lang": lang, "source": source, "built_at": int(time.time()),
+            }, f, indent=2)
+        logger.info(f"Wrote {rows} summaries ({self.dtype}) to {self.out_dir}")
+
+
+def build(out_dir: str, records: Iterable[Tuple[str, str, int]], encode_fn, lang: str,
+          dtype: str = "f16", model: str = MODEL_NAME, graph_dir: Optional[str] = None,
+          word_limit: int = 100, batch_size: int = 256, source: str = ""):
+    graph = None
+    if graph_dir:
+        from link_graph import LinkGraph
+        graph = LinkGraph(graph_dir)
+
+    writer = SummaryIndexWriter(out_dir, model, dtype)
+    skipped = 0
+    batch: List[Tuple[str, str, int]] = []
+
+    def flush():
+        if batch:
+            writer.add([b[0] for b in batch], [b[2] for b in batch], encode_fn([b[1] for b in batch]))
+            batch.clear()
+
+    for title, text, page_id in records:
+        summary = summary_from_text(text, word_limit)
+        if graph is not None:
+            node = graph.node_id(title)
+            if node is None:
+                summary = None
+            else:
+                page_id = int(graph.page_ids[node])
+        if summary is None:
+            skipped += 1
+            continue
+
+        batch.append((title, summary, page_id))
+        if len(batch) >= batch_size:
+            flush()
+            if len(writer.titles) % (batch_size * 40) == 0:
+                logger.info(f"{len(writer.titles)} summaries encoded")
+    flush()
+
+    writer.close(lang, source)
+    logger.info(f"Skipped {skipped} pages without a usable lead paragraph")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", required=True, help="output index directory")
+    parser.add_argument("--lang", default="en")
+    parser.add_argument("--abstracts", help="<lang>wiki-latest-abstract.xml(.gz)")
+    parser.add_argument("--jsonl", help="JSONL of title / text / page_id")
+    parser.add_argument("--fetch", help="file of titles to fetch lead paragraphs for")
+    parser.add_argument("--graph", help="link graph directory: page ids + restrict to its pages")
+    parser.add_argument("--dtype", choices=["f16", "i8"], default="f16")
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--word-limit", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--workers", type=int, default=8, help="concurrent fetches for --fetch")
+    args = parser.parse_args()
+
+    if args.abstracts:
+        records, source = iter_abstracts(args.abstracts), args.abstracts
+    elif args.jsonl:
+        records, source = iter_jsonl(args.jsonl), args.jsonl
+    elif args.fetch:
+        records, source = iter_fetched(args.fetch, args.lang, args.workers, args.word_limit), args.fetch
+    else:
+        parser.error("pass --abstracts, --jsonl or --fetch")
+
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer(args.model)
+
+    def encode(texts):
+        return model.encode(texts, batch_size=64, convert_to_numpy=True)
+
+    start = time.time()
+    build(args.out, records, encode, args.lang, args.dtype, args.model, args.graph,
+          args.word_limit, args.batch_size, source)
+    logger.info(f"Done in {time.time() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional
+
+import requests
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+
+class Cancelled(Exception):
+    """Raised inside a racer once its race was won by someone else or timed out."""
+
+
+class CancelToken:
+    """
+    Race-wide cancellation flag with an optional wall-clock deadline.
+
+    It keeps the `threading.Event` interface the racers already use
+    (`set` / `is_set` / `wait`), so it can be passed as `stop_event`. On top of
+    that, blocking operations can register callbacks that fire the moment it
+    is set, and `check()` raises `Cancelled` so deep call stacks unwind at the
+    next checkpoint instead of at the next generator yield.
+    """
+
+    def __init__(self, deadline: Optional[float] = None):
+        """deadline: seconds from now after which the token cancels itself (None = no limit)"""
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: Dict[int, Callable[[], None]] = {}
+        self._next_handle = 0
+
+        self.started_at = time.monotonic()
+        self.deadline_at = self.started_at + deadline if deadline else None
+        self.set_at: Optional[float] = None
+        self.expired = False
+
+        self._timer = None
+        if deadline:
+            self._timer = threading.Timer(deadline, self._expire)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _expire(self):
+        if self._trigger(expired=True):
+            logger.info("Race deadline reached. Racers cancelled.")
+
+    def set(self):
+        self._trigger(expired=False)
+
+    def _trigger(self, expired: bool) -> bool:
+        with self._lock:
+            if self._event.is_set():
+                return False
+            self.expired = expired
+            self.set_at = time.monotonic()
+            self._event.set()
+            callbacks = list(self._callbacks.values())
+            self._callbacks.clear()
+
+        if self._timer is not None:
+            self._timer.cancel()
+
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.warning(f"Cancel callback failed: {e}")
+        return True
+
+    cancel = set
+
+    def close(self):
+        """Stop the deadline timer of a race that ended; the token is left as it is."""
+        if self._timer is not None:
+            self._timer.cancel()
+
+    def is_set(self) -> bool:
+        return self._event.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._event.wait(timeout)
+
+    def check(self):
+        if self._event.is_set():
+            raise Cancelled("deadline reached" if self.expired else "race finished")
+
+    def remaining(self, default: Optional[float] = None) -> Optional[float]:
+        """Seconds left before the deadline, capped at `default`."""
+        if self.deadline_at is None:
+            return default
+        left = max(self.deadline_at - time.monotonic(), 0.0)
+        return left if default is None else min(left, default)
+
+    def add_callback(self, callback: Callable[[], None]) -> Optional[int]:
+        """Run `callback` once on cancellation (immediately if already set)."""
+        with self._lock:
+            if not self._event.is_set():
+                self._next_handle += 1
+                self._callbacks[self._next_handle] = callback
+                return self._next_handle
+        callback()
+        return None
+
+    def remove_callback(self, handle: Optional[int]):
+        if handle is None:
+            return
+        with self._lock:
+            self._callbacks.pop(handle, None)
+
+    def wait_future(self, future: Future, timeout: Optional[float] = None):
+        """Result of `future`, or `Cancelled` as soon as the token is set."""
+        done = threading.Event()
+        future.add_done_callback(lambda _: done.set())
+        handle = self.add_callback(done.set)  # the deadline timer fires it too
+        try:
+            done.wait(timeout)
+        finally:
+            self.remove_callback(handle)
+
+        if future.done():
+            return future.result()
+        future.cancel()
+        self.check()
+        raise TimeoutError("timed out waiting for result")
+
+
+# --------------------------------------------------------------------
+# Interruptible HTTP GET
+# --------------------------------------------------------------------
+@dataclass
+class FetchedResponse:
+    """The parts of `requests.Response` the scrapers and page cache use."""
+    status_code: int
+    headers: dict
+    content: bytes = b""
+    encoding: Optional[str] = None
+    url: str = ""
+    _text: Optional[str] = field(default=None, repr=False)
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = self.content.decode(self.encoding or "utf-8", errors="replace")
+        return self._text
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code} Error for url: {self.url}")
+
+
+_fetch_pool = None
+_fetch_pool_lock = threading.Lock()
+
+
+def _get_fetch_pool() -> ThreadPoolExecutor:
+    global _fetch_pool
+    with _fetch_pool_lock:
+        if _fetch_pool is None:
+            _fetch_pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix="fetch")
+        return _fetch_pool
+
+
+def _download(session, url: str, timeout: float, headers, cancel: CancelToken, chunk_size: int):
+    res = session.get(url, timeout=timeout, headers=headers, stream=True)
+    try:
+        chunks = []
+        for chunk in res.iter_content(chunk_size):
+            if cancel.is_set():
+                raise Cancelled(url)
+            chunks.append(chunk)
+        return FetchedResponse(
+            status_code=res.status_code,
+            headers=res.headers,
+            content=b"".join(chunks),
+            encoding=res.encoding,
+            url=url,
+        )
+    finally:
+        # Hands the socket back (or drops it mid-body when cancelled)
+        res.close()
+
+
+def cancellable_get(
+    session,
+    url: str,
+    cancel: CancelToken,
+    timeout: float = 10,
+    headers: Optional[dict] = None,
+    chunk_size: int = 64 * 1024,
+) -> FetchedResponse:
+    """
+    GET `url` on a shared fetch pool and wait for either the response or the
+    token. The caller is released immediately on cancellation; the download
+    itself stops at the next body chunk and closes its connection.
+
+    A request still waiting for the server's response headers cannot be
+    interrupted: requests has no way to abort a socket read from another
+    thread (closing the adapter only drops idle pooled connections). Its pool
+    thread stays blocked until the response starts or `timeout` runs out, so
+    a cancelled race can hold up to `timeout` seconds of fetch-pool capacity.
+    """
+    cancel.check()
+    timeout = cancel.remaining(timeout)
+    future = _get_fetch_pool().submit(_download, session, url, timeout, headers, cancel, chunk_size)
+    return cancel.wait_future(future)
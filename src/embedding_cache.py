@@ -0,0 +1,272 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+import metrics
+
+try:
+    import fcntl
+except ImportError:  # Windows: the disk store is then safe for one process only
+    fcntl = None
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+
+KEY_BYTES = 20  # sha1 digest
+
+
+def normalize_text(text: str) -> str:
+    text = unicodedata.normalize("NFC", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+class DiskEmbeddingStore:
+    """
+    Fixed-capacity ring of embeddings stored in memory-mapped files:
+
+        meta.json     model name, dim, capacity, number of rows written
+        vectors.f32   float32 matrix (capacity, dim)
+        keys.bin      uint8 matrix (capacity, 20) of sha1 keys, row-aligned
+
+    When the ring is full the oldest row is overwritten.
+
+    Several processes (batch workers) may share one store. Writers take an
+    exclusive lock on `lock` and continue the ring from the row count in
+    meta.json. A process's index can then point at a row another process has
+    reused, so reads check the row's key and treat a mismatch as a miss.
+    """
+
+    def __init__(self, directory: str, model_name: str, capacity: int):
+        self.directory = directory
+        self.model_name = model_name
+        self.capacity = capacity
+        self.dim: Optional[int] = None
+        self.next_row = 0
+        self.vectors = None
+        self.keys = None
+        self.index: Dict[bytes, int] = {}
+        self._open_existing()
+
+    @property
+    def _meta_path(self) -> str:
+        return os.path.join(self.directory, "meta.json")
+
+    def _read_meta(self) -> Optional[dict]:
+        if not os.path.exists(self._meta_path):
+            return None
+        with open(self._meta_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _open_existing(self):
+        meta = self._read_meta()
+        if meta is None:
+            return
+
+        if meta.get("model") != self.model_name or meta.get("capacity") != self.capacity:
+            logger.warning(f"Embedding store at {self.directory} does not match settings. Rebuilding.")
+            return
+
+        self.dim = int(meta["dim"])
+        self.next_row = int(meta["next"])
+        self._map_files(mode="r+")
+
+        used = min(self.next_row, self.capacity)
+        for row in range(used):
+            self.index[self.keys[row].tobytes()] = row
+
+        logger.info(f"Loaded {used} cached embeddings from {self.directory}")
+
+    def _map_files(self, mode: str):
+        self.vectors = np.memmap(
+            os.path.join(self.directory, "vectors.f32"),
+            dtype=np.float32, mode=mode, shape=(self.capacity, self.dim),
+        )
+        self.keys = np.memmap(
+            os.path.join(self.directory, "keys.bin"),
+            dtype=np.uint8, mode=mode, shape=(self.capacity, KEY_BYTES),
+        )
+
+    def _create(self, dim: int):
+        os.makedirs(self.directory, exist_ok=True)
+        self.dim = dim
+        self.next_row = 0
+        self.index = {}
+        self._map_files(mode="w+")
+
+    @contextmanager
+    def _locked(self):
+        """Exclusive across processes while the ring and meta.json are written."""
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, "lock"), "a") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def get(self, key: bytes) -> Optional[np.ndarray]:
+        row = self.index.get(key)
+        if row is None:
+            return None
+        if self.keys[row].tobytes() != key:
+            del self.index[key]  # another process reused the row
+            return None
+        return np.array(self.vectors[row])
+
+    def put_many(self, keys: Sequence[bytes], vectors: np.ndarray):
+        with self._locked():
+            if self.vectors is None:
+                self._open_existing()  # another process may have created it meanwhile
+            if self.vectors is None:
+                self._create(vectors.shape[1])
+            else:
+                meta = self._read_meta()
+                if meta is not None:
+                    self.next_row = max(self.next_row, int(meta["next"]))
+
+            for key, vec in zip(keys, vectors):
+                if key in self.index:
+                    continue
+
+                row = self.next_row % self.capacity
+                if self.next_row >= self.capacity:
+                    self.index.pop(self.keys[row].tobytes(), None)
+
+                self.vectors[row] = vec
+                self.keys[row] = np.frombuffer(key, dtype=np.uint8)
+                self.index[key] = row
+                self.next_row += 1
+
+            self.vectors.flush()
+            self.keys.flush()
+
+            # meta last, so a crash never points at rows that were not written;
+            # replaced atomically so readers never see it half written
+            tmp = f"{self._meta_path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({
+                    "model": self.model_name,
+                    "dim": self.dim,
+                    "capacity": self.capacity,
+                    "next": self.next_row,
+                }, f)
+            os.replace(tmp, self._meta_path)
+
+
+class EmbeddingCache:
+    """
+    Content-addressed embedding cache keyed by (model name, normalized text).
+
+    Lookups go memory LRU -> disk store -> encoder, and only texts missing
+    from both tiers are sent to `encode_fn` (once per unique text).
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        cache_dir: Optional[str] = None,
+        memory_rows: int = 50000,
+        disk_rows: int = 200000,
+    ):
+        self.model_name = model_name
+        self.memory_rows = memory_rows
+        self._memory: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self.disk: Optional[DiskEmbeddingStore] = None
+        if cache_dir and disk_rows > 0:
+            directory = os.path.join(cache_dir, re.sub(r"[^A-Za-z0-9_.-]", "_", model_name))
+            try:
+                self.disk = DiskEmbeddingStore(directory, model_name, disk_rows)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Disk embedding cache disabled ({e})")
+
+    def _key(self, text: str) -> bytes:
+        payload = f"{self.model_name}\0{normalize_text(text)}".encode("utf-8")
+        return hashlib.sha1(payload).digest()
+
+    def _remember(self, key: bytes, vec: np.ndarray):
+        self._memory[key] = vec
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_rows:
+            self._memory.popitem(last=False)
+
+    def encode(self, texts: List[str], encode_fn: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+        keys = [self._key(t) for t in texts]
+        found: Dict[bytes, np.ndarray] = {}
+        missing: Dict[bytes, str] = {}
+
+        with self._lock:
+            for key, text in zip(keys, texts):
+                if key in found or key in missing:
+                    continue
+
+                vec = self._memory.get(key)
+                if vec is not None:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    found[key] = vec
+                    continue
+
+                vec = self.disk.get(key) if self.disk else None
+                if vec is not None:
+                    self.disk_hits += 1
+                    self._remember(key, vec)
+                    found[key] = vec
+                    continue
+
+                self.misses += 1
+                missing[key] = text
+
+        metrics.add("embedding_hits", len(found))
+        metrics.add("embedding_misses", len(missing))
+
+        if missing:
+            new_keys = list(missing.keys())
+            new_vecs = np.asarray(encode_fn(list(missing.values())), dtype=np.float32)
+
+            with self._lock:
+                for key, vec in zip(new_keys, new_vecs):
+                    self._remember(key, vec)
+                    found[key] = vec
+
+                if self.disk:
+                    try:
+                        self.disk.put_many(new_keys, new_vecs)
+                    except OSError as e:
+                        logger.warning(f"Could not persist embeddings ({e}). Disk tier disabled.")
+                        self.disk = None
+
+        if not keys:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.stack([found[k] for k in keys])
+
+    def stats(self) -> dict:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            "memory_rows": len(self._memory),
+            "disk_rows": len(self.disk.index) if self.disk else 0,
+        }
@@ -0,0 +1,273 @@
+"""
+Host-wide embedding server on a Unix domain socket.
+
+One process holds the model and the embedding cache; Streamlit sessions,
+batch workers and scripts on the same host encode through it with
+WIKIGAME_ENCODER=remote, so there is one model copy per host and request
+paths never wait for a model to load. Concurrent requests from all clients
+are merged into shared forward passes (embedding_service.BatchingEncoder).
+
+    python src/embedding_daemon.py --backend onnx
+    WIKIGAME_ENCODER=remote python src/batch_runner.py pairs.jsonl --out results.jsonl --workers 8
+
+Protocol (little-endian, one request / response at a time per connection):
+
+    request   magic "WGE1", op u8, count u32, payload u32
+              count x u32 byte lengths, then the UTF-8 texts back to back
+              op 1 = encode, op 2 = info (count = payload = 0)
+    response  status u8 (0 ok, 1 error), rows u32, dim u32, extra u32
+              rows x dim float32, then `extra` bytes of UTF-8
+              (the error message, or for info the embedding cache namespace)
+"""
+import argparse
+import logging
+import os
+import socket
+import socketserver
+import struct
+import threading
+from typing import List, Tuple
+
+import numpy as np
+
+from settings import (
+    CACHE_DIR, EMBEDDING_BATCH_SIZE, EMBEDDING_BATCH_WAIT_MS, EMBEDDING_DISK_ROWS,
+    EMBEDDING_MEMORY_ROWS, EMBEDDING_SOCKET, ENCODER_BACKEND,
+)
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+MAGIC = b"WGE1"
+OP_ENCODE = 1
+OP_INFO = 2
+REQUEST = struct.Struct("<4sBII")
+RESPONSE = struct.Struct("<BIII")
+
+MAX_TEXTS = 100_000
+MAX_PAYLOAD = 64 * 1024 * 1024
+
+
+class ProtocolError(Exception):
+    pass
+
+
+# --------------------------------------------------------------------
+# Wire format
+# --------------------------------------------------------------------
+def recv_exact(sock: socket.socket, n: int) -> bytes:
+    buf = bytearray(n)
+    view = memoryview(buf)
+    got = 0
+    while got < n:
+        read = sock.recv_into(view[got:], n - got)
+        if read == 0:
+            raise ConnectionError("connection closed")
+        got += read
+    return bytes(buf)
+
+
+def pack_request(op: int, texts: List[str] = ()) -> bytes:
+    blobs = [t.encode("utf-8") for t in texts]
+    lengths = np.array([len(b) for b in blobs], dtype="<u4").tobytes()
+    payload = b"".join(blobs)
+    return REQUEST.pack(MAGIC, op, len(blobs), len(payload)) + lengths + payload
+
+
+def read_request(sock: socket.socket) -> Tuple[int, List[str]]:
+    magic, op, count, size = REQUEST.unpack(recv_exact(sock, REQUEST.size))
+    if magic != MAGIC:
+        raise ProtocolError(f"bad magic {magic!r}")
+    if count > MAX_TEXTS or size > MAX_PAYLOAD:
+        raise ProtocolError(f"request too large ({count} texts, {size} bytes)")
+
+    lengths = np.frombuffer(recv_exact(sock, 4 * count), dtype="<u4") if count else np.zeros(0, dtype="<u4")
+    payload = recv_exact(sock, size) if size else b""
+    if int(lengths.sum()) != size:
+        raise ProtocolError("text lengths do not add up to the payload size")
+
+    ends = np.cumsum(lengths)
+    texts = [payload[end - n:end].decode("utf-8") for n, end in zip(lengths.tolist(), ends.tolist())]
+    return op, texts
+
+
+def pack_response(vectors: np.ndarray = None, extra: str = "", status: int = 0, dim: int = 0) -> bytes:
+    extra_bytes = extra.encode("utf-8")
+    if vectors is None or vectors.size == 0:
+        return RESPONSE.pack(status, 0, dim, len(extra_bytes)) + extra_bytes
+    vectors = np.ascontiguousarray(vectors, dtype="<f4")
+    rows, dim = vectors.shape
+    return RESPONSE.pack(status, rows, dim, len(extra_bytes)) + vectors.tobytes() + extra_bytes
+
+
+def read_response(sock: socket.socket) -> Tuple[np.ndarray, str, int]:
+    """(vectors, extra text, dim); raises RuntimeError on an error status."""
+    status, rows, dim, extra = RESPONSE.unpack(recv_exact(sock, RESPONSE.size))
+    body = recv_exact(sock, rows * dim * 4) if rows else b""
+    text = recv_exact(sock, extra).decode("utf-8") if extra else ""
+    if status != 0:
+        raise RuntimeError(f"embedding daemon: {text}")
+    vectors = np.frombuffer(body, dtype="<f4").reshape(rows, dim) if rows else np.zeros((0, dim), np.float32)
+    return vectors, text, dim
+
+
+# --------------------------------------------------------------------
+# Server
+# --------------------------------------------------------------------
+class EmbeddingDaemon:
+    def __init__(self, backend: str = ENCODER_BACKEND):
+        from embedding_cache import EmbeddingCache
+        from embedding_service import BatchingEncoder
+        from encoders import create_encoder
+
+        if backend == "remote":
+            raise ValueError("The daemon needs a local backend (torch or onnx), not 'remote'.")
+        self.encoder = create_encoder(backend)
+        self.cache = EmbeddingCache(
+            self.encoder.cache_name,
+            cache_dir=os.path.join(CACHE_DIR, "embeddings"),
+            memory_rows=EMBEDDING_MEMORY_ROWS,
+            disk_rows=EMBEDDING_DISK_ROWS,
+        )
+        self.service = BatchingEncoder(
+            self.encoder.encode, max_batch=EMBEDDING_BATCH_SIZE, max_wait_ms=EMBEDDING_BATCH_WAIT_MS
+        )
+        self.dim = int(self.encoder.encode(["warm-up"]).shape[1])
+        self.connections = 0
+        self._lock = threading.Lock()
+
+    def handle(self, op: int, texts: List[str]) -> bytes:
+        if op == OP_INFO:
+            return pack_response(extra=self.encoder.cache_name, dim=self.dim)
+        if op == OP_ENCODE:
+            if not texts:
+                return pack_response(dim=self.dim)
+            return pack_response(self.cache.encode(texts, self.service.encode))
+        return pack_response(status=1, extra=f"unknown op {op}")
+
+    def serve(self, path: str = EMBEDDING_SOCKET):
+        daemon = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                with daemon._lock:
+                    daemon.connections += 1
+                try:
+                    while True:
+                        try:
+                            op, texts = read_request(self.request)
+                        except ConnectionError:
+                            return
+                        except ProtocolError as e:
+                            self.request.sendall(pack_response(status=1, extra=str(e)))
+                            return
+                        try:
+                            response = daemon.handle(op, texts)
+                        except Exception as e:
+                            logger.exception("Encode failed")
+                            response = pack_response(status=1, extra=f"{type(e).__name__}: {e}")
+                        self.request.sendall(response)
+                finally:
+                    with daemon._lock:
+                        daemon.connections -= 1
+
+        _claim_socket(path)
+        server = socketserver.ThreadingUnixStreamServer(path, Handler)
+        server.daemon_threads = True
+        os.chmod(path, 0o600)  # local user only
+        logger.info(f"Embedding daemon ({self.encoder.cache_name}, dim {self.dim}) listening on {path}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            if os.path.exists(path):
+                os.unlink(path)
+
+
+def _claim_socket(path: str):
+    """Remove a stale socket file; refuse to start if a daemon is already answering on it."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    if not os.path.exists(path):
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except OSError:
+        os.unlink(path)
+        return
+    finally:
+        probe.close()
+    raise RuntimeError(f"An embedding daemon is already listening on {path}")
+
+
+# --------------------------------------------------------------------
+# Client
+# --------------------------------------------------------------------
+class EmbeddingClient:
+    """
+    Blocking client with one connection, shared by the threads of a process
+    (the in-process batcher already funnels encodes into one caller).
+    Reconnects once if the daemon restarted.
+    """
+
+    def __init__(self, path: str = EMBEDDING_SOCKET, timeout: float = 60.0):
+        self.path = path
+        self.timeout = timeout
+        self._sock = None
+        self._lock = threading.Lock()
+        _, self.cache_name, self.dim = self._call(OP_INFO)
+
+    def _connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.path)
+        except OSError as e:
+            sock.close()
+            raise RuntimeError(
+                f"No embedding daemon on {self.path} ({e}). Start one with `python src/embedding_daemon.py`."
+            ) from e
+        return sock
+
+    def _call(self, op: int, texts: List[str] = ()):
+        request = pack_request(op, texts)
+        with self._lock:
+            for attempt in (0, 1):
+                if self._sock is None:
+                    self._sock = self._connect()
+                try:
+                    self._sock.sendall(request)
+                    return read_response(self._sock)
+                except (ConnectionError, BrokenPipeError, socket.timeout) as e:
+                    self._sock.close()
+                    self._sock = None
+                    if attempt:
+                        raise RuntimeError(f"Embedding daemon connection failed: {e}") from e
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        vectors, _, _ = self._call(OP_ENCODE, texts)
+        return vectors
+
+    def close(self):
+        with self._lock:
+            if self._sock is not None:
+                self._sock.close()
+                self._sock = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--socket", default=EMBEDDING_SOCKET)
+    parser.add_argument("--backend", default=ENCODER_BACKEND if ENCODER_BACKEND != "remote" else "torch",
+                        help="torch or onnx")
+    args = parser.parse_args()
+    EmbeddingDaemon(args.backend).serve(args.socket)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Callable, List
+
+import numpy as np
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _EncodeRequest:
+    texts: List[str]
+    future: Future = field(default_factory=Future)
+
+
+class BatchingEncoder:
+    """
+    Micro-batching front for a shared encoder.
+
+    Concurrent `encode` calls (one per racing game) are collected for up to
+    `max_wait_ms` or until `max_batch` texts are queued, encoded with a single
+    call to `encode_fn`, and each caller gets back its own slice.
+    """
+
+    def __init__(
+        self,
+        encode_fn: Callable[[List[str]], np.ndarray],
+        max_batch: int = 512,
+        max_wait_ms: float = 3.0,
+    ):
+        self.encode_fn = encode_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+
+        self._queue: "queue.Queue[_EncodeRequest]" = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+        self.batches = 0
+        self.requests = 0
+        self.texts = 0
+
+    def _ensure_worker(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="embedding-batcher", daemon=True
+                )
+                self._thread.start()
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        self._ensure_worker()
+        request = _EncodeRequest(list(texts))
+        self._queue.put(request)
+        return request.future.result()
+
+    def _collect(self) -> List[_EncodeRequest]:
+        batch = [self._queue.get()]
+        size = len(batch[0].texts)
+        deadline = time.monotonic() + self.max_wait
+
+        while size < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(request)
+            size += len(request.texts)
+
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            texts = [t for request in batch for t in request.texts]
+
+            try:
+                embeddings = np.asarray(self.encode_fn(texts), dtype=np.float32)
+            except Exception as e:
+                logger.error(f"Batched encode of {len(texts)} texts failed: {e}")
+                for request in batch:
+                    request.future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.requests += len(batch)
+            self.texts += len(texts)
+
+            offset = 0
+            for request in batch:
+                n = len(request.texts)
+                request.future.set_result(embeddings[offset:offset + n])
+                offset += n
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "texts": self.texts,
+            "requests_per_batch": self.requests / self.batches if self.batches else 0.0,
+        }
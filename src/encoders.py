@@ -0,0 +1,279 @@
+"""
+Sentence encoder backends for GetSimilarWord.
+
+    torch  the SentenceTransformer model on PyTorch (default)
+    onnx   the same model exported to ONNX and int8-quantized, on ONNX Runtime;
+           usually several times faster on CPU. Needs the `onnx` extra
+           (`uv sync --extra onnx`); the export runs once and is cached.
+    remote the host-wide embedding daemon (embedding_daemon.py) over its Unix
+           socket: one model copy for all processes on the machine.
+
+All return L2-normalized float32 rows when the model normalizes, so scores
+are comparable. Select one with WIKIGAME_ENCODER; export ahead of time with
+
+    python src/encoders.py --export
+"""
+import argparse
+import json
+import logging
+import os
+import threading
+from typing import Dict, List
+
+import numpy as np
+
+from settings import EMBEDDING_SOCKET, ENCODER_BACKEND, ENCODER_THREADS, MODEL_NAME, ONNX_DIR, ONNX_QUANTIZE
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+
+def encoder_cache_name(backend: str, model_name: str = MODEL_NAME, quantize: bool = ONNX_QUANTIZE) -> str:
+    """Embedding cache namespace of a backend; known before the model is loaded."""
+    if backend == "onnx":
+        return f"{model_name}@onnx{'-int8' if quantize else ''}"
+    if backend == "remote":
+        # Fallback only: RemoteEncoder.cache_name names the daemon's backend
+        return f"{model_name}@remote"
+    return model_name  # torch keeps the original namespace, so existing caches stay valid
+
+
+class TorchEncoder:
+    """SentenceTransformer on PyTorch (CPU unless a GPU is visible)."""
+
+    def __init__(self, model_name: str = MODEL_NAME, threads: int = ENCODER_THREADS):
+        from sentence_transformers import SentenceTransformer
+
+        if threads > 0:
+            import torch
+            torch.set_num_threads(threads)
+        self.model = SentenceTransformer(model_name)
+        self.model_name = model_name
+        self.cache_name = encoder_cache_name("torch", model_name)
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        return np.asarray(self.model.encode(texts, convert_to_numpy=True), dtype=np.float32)
+
+
+# --------------------------------------------------------------------
+# ONNX Runtime
+# --------------------------------------------------------------------
+def _onnx_dir(model_name: str) -> str:
+    return os.path.join(ONNX_DIR, model_name.replace("/", "__"))
+
+
+def export_onnx(model_name: str = MODEL_NAME, out_dir: str = None, quantize: bool = True) -> str:
+    """
+    Export the transformer of a SentenceTransformer model to ONNX (dynamic
+    batch and sequence axes), quantize its weights to int8, and save the
+    tokenizer and pooling settings next to it. Returns the directory.
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    out_dir = out_dir or _onnx_dir(model_name)
+    os.makedirs(out_dir, exist_ok=True)
+
+    st_model = SentenceTransformer(model_name, device="cpu")
+    transformer = st_model[0]
+    pooling = next((m for m in st_model if type(m).__name__ == "Pooling"), None)
+    config = {
+        "model": model_name,
+        "max_seq_length": int(st_model.max_seq_length or 256),
+        "pooling": "cls" if pooling is not None and pooling.pooling_mode_cls_token else "mean",
+        "normalize": any(type(m).__name__ == "Normalize" for m in st_model),
+        "quantized": quantize,
+    }
+
+    hf_model = transformer.auto_model.eval()
+    tokenizer = transformer.tokenizer
+    config.update(pad_id=int(tokenizer.pad_token_id or 0), pad_token=tokenizer.pad_token or "[PAD]")
+    tokenizer.save_pretrained(out_dir)  # tokenizer.json is all the runtime needs
+
+    sample = tokenizer(["an example anchor text"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    fp32_path = os.path.join(out_dir, "model.onnx")
+    with torch.no_grad():
+        torch.onnx.export(
+            hf_model,
+            tuple(sample[name] for name in input_names),
+            fp32_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=axes,
+            opset_version=17,
+        )
+
+    config["file"] = "model.onnx"
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantize_dynamic(fp32_path, os.path.join(out_dir, "model.int8.onnx"), weight_type=QuantType.QInt8)
+        config["file"] = "model.int8.onnx"
+
+    # config last: a directory without it is an unfinished export
+    with open(os.path.join(out_dir, "encoder.json"), "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=2)
+    logger.info(f"Exported {model_name} to {out_dir} ({config['file']})")
+    return out_dir
+
+
+class OnnxEncoder:
+    """
+    The exported model on ONNX Runtime's CPU provider.
+
+    Texts are sorted by length and encoded in batches of `batch_size`, so
+    short anchors are not padded to the longest one in the call.
+    """
+
+    def __init__(self, model_name: str = MODEL_NAME, threads: int = ENCODER_THREADS,
+                 quantize: bool = ONNX_QUANTIZE, batch_size: int = 64):
+        try:
+            import onnxruntime as ort
+            from tokenizers import Tokenizer
+        except ImportError as e:
+            raise RuntimeError(
+                "The ONNX encoder needs onnxruntime. Install it with `uv sync --extra onnx`."
+            ) from e
+
+        directory = _onnx_dir(model_name)
+        config_path = os.path.join(directory, "encoder.json")
+        if os.path.exists(config_path):
+            with open(config_path, "r", encoding="utf-8") as f:
+                config = json.load(f)
+            if config.get("quantized") != quantize:
+                config = None
+        else:
+            config = None
+        if config is None:
+            logger.info(f"No ONNX export of {model_name} yet; exporting (once)...")
+            export_onnx(model_name, directory, quantize)
+            with open(config_path, "r", encoding="utf-8") as f:
+                config = json.load(f)
+
+        self.model_name = model_name
+        self.cache_name = encoder_cache_name("onnx", model_name, config["quantized"])
+        self.pooling = config["pooling"]
+        self.normalize = config["normalize"]
+        self.batch_size = batch_size
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(directory, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=config["max_seq_length"])
+        self.tokenizer.enable_padding(pad_id=config["pad_id"], pad_token=config["pad_token"])
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads > 0:
+            options.intra_op_num_threads = threads
+            options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(
+            os.path.join(directory, config["file"]), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        feeds = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+        }
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+
+        hidden = self.session.run(None, feeds)[0]
+        if self.pooling == "cls":
+            pooled = hidden[:, 0]
+        else:
+            mask = feeds["attention_mask"][..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+
+        if self.normalize:
+            pooled /= np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+        return pooled.astype(np.float32)
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        order = np.argsort([len(t) for t in texts], kind="stable")
+        out = None
+        for start in range(0, len(texts), self.batch_size):
+            idx = order[start:start + self.batch_size]
+            vecs = self._encode_batch([texts[i] for i in idx])
+            if out is None:
+                out = np.empty((len(texts), vecs.shape[1]), dtype=np.float32)
+            out[idx] = vecs
+        return out
+
+
+# --------------------------------------------------------------------
+# Embedding daemon
+# --------------------------------------------------------------------
+class RemoteEncoder:
+    """
+    Encodes through the embedding daemon on `socket_path`. The daemon loads
+    the model (its own backend), caches and batches across all clients;
+    `threads` and `model_name` are the daemon's business.
+    """
+
+    def __init__(self, model_name: str = MODEL_NAME, threads: int = ENCODER_THREADS,
+                 socket_path: str = EMBEDDING_SOCKET):
+        from embedding_daemon import EmbeddingClient
+
+        self.client = EmbeddingClient(socket_path)
+        self.model_name = model_name
+        self.daemon_cache_name = self.client.cache_name
+        # Client-side caches follow the daemon's backend, so switching it
+        # (torch <-> onnx-int8) never mixes vectors of both in one ranking
+        self.cache_name = f"{self.daemon_cache_name}@remote"
+        if not self.daemon_cache_name.startswith(model_name):
+            logger.warning(f"Embedding daemon serves {self.daemon_cache_name}, not {model_name}")
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        return self.client.encode(texts)
+
+
+# --------------------------------------------------------------------
+# Registry
+# --------------------------------------------------------------------
+ENCODERS = {
+    "torch": TorchEncoder,
+    "onnx": OnnxEncoder,
+    "remote": RemoteEncoder,
+}
+
+_encoders: Dict[tuple, object] = {}
+_encoders_lock = threading.Lock()
+
+
+def create_encoder(backend: str = ENCODER_BACKEND, model_name: str = MODEL_NAME):
+    """Process-wide encoder for `backend`; anything with `encode(texts)`, `model_name` and `cache_name`."""
+    if backend not in ENCODERS:
+        raise ValueError(f"Unknown encoder backend '{backend}' (choose from {', '.join(ENCODERS)})")
+    key = (backend, model_name)
+    with _encoders_lock:
+        if key not in _encoders:
+            logger.info(f"Loading {backend} encoder ({model_name})...")
+            _encoders[key] = ENCODERS[backend](model_name)
+        return _encoders[key]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--export", action="store_true", help="export (and quantize) the ONNX model")
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--no-quantize", action="store_true", help="keep fp32 weights")
+    args = parser.parse_args()
+
+    if not args.export:
+        parser.error("nothing to do; pass --export (see benchmarks/bench_encoders.py for parity and speed)")
+    print(export_onnx(args.model, quantize=not args.no_quantize))
+
+
+if __name__ == "__main__":
+    main()
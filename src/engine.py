@@ -1,14 +1,25 @@
 from get_similar_word import GetSimilarWord
 
+import metrics
 from scapper import Scrapper
+from backends import create_scraper
+from http_session import wiki_title
+from link_pipeline import prepare_candidates
+from prefetch import Prefetcher
+from cancellation import Cancelled, CancelToken
+from summary_index import blend_scores, get_summary_index
+from metrics import StepEvent
+from target_neighborhood import get_target_neighborhood
+from titles import get_redirects
+from settings import (
+    PREFETCH_DEPTH, PREFETCH_WORKERS, PREFETCH_BUDGET_MB, SUMMARY_WEIGHT, NEIGHBORHOOD_HOPS,
+)
 import logging
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse
+from urllib.parse import unquote, urljoin, urlparse
 from dataclasses import dataclass
 from typing import List, Optional, Tuple, Set
 
 import numpy as np
-from sentence_transformers import SentenceTransformer
 
 
 logging.basicConfig(
@@ -29,43 +40,117 @@ class WikipediaGame:
         selector: GetSimilarWord,
         max_steps: int = 100,
         similarity_threshold: float = 0.40,
-        target_lang:str = "en"
+        target_lang:str = "en",
+        prefetch_depth: int = PREFETCH_DEPTH,
+        cancel: Optional[CancelToken] = None,
+        summary_weight: float = SUMMARY_WEIGHT,
+        neighborhood_hops: int = NEIGHBORHOOD_HOPS,
+        racer: str = "",
     ):
         self.target_lang = target_lang
-        self.scraper = Scrapper(self.target_lang)
+        self.cancel = cancel
+        self.racer = racer  # label of this game's step events
+
+        # Live scrapers are rebuilt for the race language; other backends
+        # (e.g. the offline link graph) are used as given.
+        if scraper is None or (isinstance(scraper, Scrapper) and scraper.target_lang != target_lang):
+            scraper = create_scraper(self.target_lang, cancel=cancel)
+        self.scraper = scraper
         self.selector = selector
         self.max_steps = max_steps
         self.similarity_threshold = similarity_threshold
-        self.seen = set()
+        self.seen = set()  # page keys of the links taken
+        self.last_score = None  # similarity of the last link taken
+        self.redirects = get_redirects(target_lang)
+        self.target_title = None
+        self.reached = False  # the current page turned out to redirect to the target
+        self.steps: List[StepEvent] = []  # one event per page left (see metrics.py)
+
+        # Lead-paragraph embeddings of linked pages, when an index was built
+        self.summary_weight = summary_weight
+        self.summary_index = get_summary_index(target_lang) if summary_weight > 0 else None
+
+        # Backlink neighborhood of the current target (set when a race starts)
+        self.neighborhood_hops = neighborhood_hops
+        self.neighborhood = None
+
+        # Optional speculative fetching of the top-k candidates of each step
+        self.prefetch_depth = prefetch_depth
+        self.prefetcher = None
+        self._open_prefetcher()
+
+    def _open_prefetcher(self):
+        if self.prefetcher is None and self.prefetch_depth > 0 and isinstance(self.scraper, Scrapper):
+            self.prefetcher = Prefetcher(
+                self.scraper,
+                depth=self.prefetch_depth,
+                max_workers=PREFETCH_WORKERS,
+                byte_budget=PREFETCH_BUDGET_MB * 1024 * 1024,
+            )
+
+    def _finish(self):
+        # Closing also stops its worker threads; a later race opens a new one
+        if self.prefetcher is not None:
+            self.prefetcher.close()
+            logger.info(f"Prefetch stats: {self.prefetcher.stats()}")
+            self.prefetcher = None
 
     def _canonical_url(self, url: str) -> str:
         parsed = urlparse(url)
         return parsed._replace(fragment="", query="").geturl()
 
     def _title_from_url(self, url: str) -> str:
-        parsed = urlparse(url)
-        if not parsed.path.startswith("/wiki/"):
+        title = wiki_title(url)
+        if not title:
             return url
-        return parsed.path.split("/wiki/")[-1].replace("_", " ")
+        return unquote(title).replace("_", " ")
+
+    def _is_target(self, title: str) -> bool:
+        """`title` is the race target, directly or through a known redirect."""
+        if self.redirects.same_page(title, self.target_title):
+            return True
+        return self.neighborhood is not None and self.neighborhood.is_target(title)
     
     def play_stepwise_title(self, start_url: str, target: str):
+        try:
+            yield from self._stepwise_title(start_url, target)
+        except Cancelled as e:
+            logger.info(f"Navigation cancelled: {e}")
+        finally:
+            self._finish()
+
+    def _stepwise_title(self, start_url: str, target: str):
         current_url = self._canonical_url(start_url)
+        self._start_race(target)
 
         for step in range(self.max_steps):
             title = self._title_from_url(current_url)
             yield (title, current_url)
 
-            if title.lower() == target.lower():
+            if self._is_target(title):
+                return
+
+            shortcut, best_link, score = self._advance(step, title, current_url, target)
+            if shortcut:
+                yield from shortcut
                 return
 
-            best_link, score = self._get_best_next_link(current_url, target)
             if not best_link:
                 return
 
             current_url = self._canonical_url(best_link.url)
 
     def play_stepwise_context(self, start_url: str, target_title: str, target_context: str):
+        try:
+            yield from self._stepwise_context(start_url, target_title, target_context)
+        except Cancelled as e:
+            logger.info(f"Navigation cancelled: {e}")
+        finally:
+            self._finish()
+
+    def _stepwise_context(self, start_url: str, target_title: str, target_context: str):
         current_url = self._canonical_url(start_url)
+        self._start_race(target_title)
 
         for step in range(self.max_steps):
             title = self._title_from_url(current_url)
@@ -73,12 +158,15 @@ class WikipediaGame:
             # Yield step so thread can stop early
             yield (title, current_url)
 
-            # STOP CONDITION (title match, not context match)
-            if title.lower() == target_title.lower():
+            # STOP CONDITION (title match, not context match; redirects count)
+            if self._is_target(title):
                 return
 
             # Find best next link using CONTEXT for similarity
-            best_link, score = self._get_best_next_link(current_url, target_context)
+            shortcut, best_link, score = self._advance(step, title, current_url, target_context)
+            if shortcut:
+                yield from shortcut
+                return
 
             if not best_link:
                 return
@@ -90,39 +178,117 @@ class WikipediaGame:
     # ================================================================
     # 🔥 Greedy Step-by-Step Wikipedia Navigation (NO DFS)
     # ================================================================
-    def _get_best_next_link(self, current_url: str, target: str):
-        links = self.scraper.get_links(current_url)
+    def _get_links(self, current_url: str):
+        if self.cancel is not None:
+            self.cancel.check()
+        if self.prefetcher is not None:
+            return self.prefetcher.get_links(current_url)
+        return self.scraper.get_links(current_url)
+
+    def _advance(self, step: int, title: str, url: str, query: str):
+        """
+        Fetch the current page and pick the next hop: (shortcut, best link, score).
+        Timings and counters of the step are recorded as a StepEvent.
+        """
+        event = StepEvent(racer=self.racer, step=step, title=title, url=url)
+        with metrics.record_step(event):
+            with metrics.stage("fetch"):
+                links = self._get_links(url)
+            event.candidates = len(links)
+
+            # Fetching the page may have shown that it redirects to the target
+            self.reached = self._is_target(title)
+            shortcut = None if self.reached else self._find_shortcut(links)
+            if self.reached:
+                logger.info(f"🎯 '{title}' redirects to the target.")
+                best_link, score = None, None
+            elif shortcut:
+                event.shortcut = True
+                best_link, score = None, None
+            else:
+                with metrics.stage("score"):
+                    best_link, score = self._choose_best_link(links, query)
+                if best_link is not None:
+                    event.chosen, event.score = best_link.text, score
+
+        self.steps.append(event)
+        return shortcut, best_link, score
+
+    def _start_race(self, target_title: str):
+        self.target_title = target_title
+        self.reached = False
+        self._open_prefetcher()
+        self.neighborhood = get_target_neighborhood(
+            target_title, self.target_lang, self.neighborhood_hops, cancel=self.cancel,
+        )
+
+    def _find_shortcut(self, links):
+        """Rest of the path when one of `links` is known to lead to the target."""
+        if self.neighborhood is None:
+            return None
+        shortcut = self.neighborhood.find(links)
+        if shortcut:
+            logger.info(f"🎯 Target neighborhood hit: {len(shortcut)} hop(s) left via '{shortcut[0][0]}'")
+        return shortcut
+
+    def _encode(self, texts):
+        with metrics.stage("encode"):
+            if self.cancel is None:
+                return self.selector.encode(texts)
+            return self.selector.encode(texts, cancel=self.cancel)
+
+    def _choose_best_link(self, links, target: str):
         if not links:
             return None, None
 
-        # Filter valid links
-        clean_links = [link for link in links if link.text and link.text.strip()]
-        if not clean_links:
+        # One candidate per target article (redirects resolved), non-articles and noise dropped
+        candidates = prepare_candidates(links, page_key=self.redirects.key)
+        metrics.add("unique_candidates", len(candidates))
+        if not candidates:
             return None, None
 
-        texts = [link.text for link in clean_links]
-        # print(texts)
+        clean_links = candidates.links
+        texts = candidates.texts
 
-        # Encode target once
-        query_emb = self.selector.model.encode([target])
+        # Encode target (cached after the first step)
+        query_emb = self._encode([target])
 
-        # Encode all link texts at once
-        link_embs = self.selector.model.encode(texts)
+        # Encode all candidate texts at once; repeated ones come from the cache
+        link_embs = self._encode(texts)
 
         similarities = np.dot(link_embs, query_emb.T).flatten()
 
-        # Mask visited URLs
-        for i, link in enumerate(clean_links):
-            if link.url in self.seen:
+        # Blend in how close each linked page's summary is to the target
+        similarities = blend_scores(
+            self.summary_index,
+            [self._title_from_url(link.url) for link in clean_links],
+            query_emb,
+            similarities,
+            self.summary_weight,
+        )
+
+        # Mask visited pages
+        for i, key in enumerate(candidates.keys):
+            if key in self.seen:
                 similarities[i] = -9999  # effectively remove it from competition
 
+        # Start fetching the strongest candidates while the caller moves on
+        if self.prefetcher is not None:
+            k = min(self.prefetcher.depth, len(similarities))
+            top = np.argpartition(-similarities, k - 1)[:k]
+            top = top[np.argsort(-similarities[top])]
+            self.prefetcher.schedule([
+                self._canonical_url(clean_links[i].url) for i in top if similarities[i] > -9999
+            ])
+
         # Get best remaining link
         best_idx = int(np.argmax(similarities))
         best_link = clean_links[best_idx]
         best_score = float(similarities[best_idx])
 
         # Mark visited
-        self.seen.add(best_link.url)
+        self.seen.add(candidates.keys[best_idx])
+        self.last_score = best_score
 
         return best_link, best_score
 
@@ -132,8 +298,15 @@ class WikipediaGame:
     # 🔥 Main "Play" Loop (Greedy)
     # ================================================================
     def play(self, start_url: str, target: str):
+        try:
+            return self._play(start_url, target)
+        finally:
+            self._finish()
+
+    def _play(self, start_url: str, target: str):
         current_url = self._canonical_url(start_url)
         path = []
+        self._start_race(target)
 
         logger.info(f"Starting greedy wiki navigation from {start_url} -> Target: {target}")
 
@@ -144,12 +317,21 @@ class WikipediaGame:
             logger.info(f"[STEP {step}] At page: {title}")
 
             # Check if reached target
-            if title.lower() == target.lower():
+            if self._is_target(title):
                 logger.info("🎯 Reached target page!")
                 return path
 
             # Compute best next link
-            best_link, score = self._get_best_next_link(current_url, target)
+            try:
+                shortcut, best_link, score = self._advance(step, title, current_url, target)
+                if shortcut:
+                    return path + shortcut
+            except Cancelled as e:
+                logger.info(f"Navigation cancelled: {e}")
+                return path
+
+            if self.reached:
+                return path
 
             if not best_link:
                 logger.info("❌ No further links. Stopping.")
@@ -1,45 +1,172 @@
-from bs4 import BeautifulSoup
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Optional, Tuple
+
+from cancellation import Cancelled, CancelToken, cancellable_get
 from clean_summary import clean_text
-from http_session import create_session
+from http_session import create_session, wiki_base_url
+from page_cache import get_page_cache
+from settings import CACHE_DIR, PAGE_CACHE_TTL, SUMMARY_LANGS, WIKI_BASE_URL
+from titles import normalize_title
+
+LANGS = SUMMARY_LANGS
 
-LANGS = ["en", "simple", "es", "fr", "de", "hi", "ru", "ja"]
+PREFER_WAIT = 1.0   # seconds a found summary waits for an earlier-listed language still probing
+CACHE_WORDS = 300   # words kept per cached summary, so later calls can ask for fewer
 
 
-def safe_get(session, url, timeout=5):
+def safe_get(session, url, timeout=5, cancel=None):
     try:
+        cache = get_page_cache()
+        if cache is not None:
+            return cache.fetch(session, url, timeout=timeout, cancel=cancel)
+        if cancel is not None:
+            return cancellable_get(session, url, cancel, timeout=timeout)
         return session.get(url, timeout=timeout)
+    except Cancelled:
+        return None
     except Exception as e:
         print(f"[ERROR] GET failed for {url} → {e}")
         return None
 
 
-def fetch_wikipedia_summary(title: str, word_limit: int = 100):
-    session = create_session()
-    normalized_title = title.replace(" ", "_")
+def extract_summary(html: str, word_limit: int = 100):
+    """First substantial lead paragraph of an article, cleaned; None if there is none."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    paragraphs = soup.select("#mw-content-text .mw-parser-output > p")
 
-    for lang in LANGS:
-        url = f"https://{lang}.wikipedia.org/wiki/{normalized_title}"
-        print(f"Trying {lang.upper()} → {url}")
+    for p in paragraphs:
+        text = p.get_text().strip()
+        cleaned = clean_text(text)
 
-        resp = safe_get(session, url)
-        if not resp or resp.status_code != 200:
+        if not cleaned or len(cleaned) < 30:
             continue
 
-        soup = BeautifulSoup(resp.text, "html.parser")
-        paragraphs = soup.select("#mw-content-text .mw-parser-output > p")
+        words = cleaned.split()
+        return " ".join(words[:word_limit])
+
+    return None
+
+
+# --------------------------------------------------------------------
+# Resolved targets, kept across runs: title -> (lang, summary)
+# --------------------------------------------------------------------
+class SummaryCache:
+    def __init__(self, path: str, ttl: float = PAGE_CACHE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._entries: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self._entries = json.load(f)
+        except (OSError, ValueError):
+            pass
+
+    def get(self, title: str, word_limit: int) -> Optional[Tuple[str, str]]:
+        entry = self._entries.get(normalize_title(title))
+        if entry is None or entry.get("site") != WIKI_BASE_URL or time.time() - entry["fetched_at"] > self.ttl:
+            return None
+        words = entry["summary"].split()
+        if word_limit > entry["words"] and len(words) >= entry["words"]:
+            return None  # cut shorter than asked for now
+        return " ".join(words[:word_limit]), entry["lang"]
+
+    def put(self, title: str, lang: str, summary: str, words: int):
+        with self._lock:
+            self._entries[normalize_title(title)] = {
+                "lang": lang, "summary": summary, "words": words,
+                "site": WIKI_BASE_URL, "fetched_at": time.time(),
+            }
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                tmp = f"{self.path}.{os.getpid()}.tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(self._entries, f, ensure_ascii=False)
+                os.replace(tmp, self.path)
+            except OSError as e:
+                print(f"[WARN] Could not save summary cache → {e}")
+
 
-        for p in paragraphs:
-            text = p.get_text().strip()
-            cleaned = clean_text(text)
+_summary_cache = None
+_summary_cache_lock = threading.Lock()
 
-            if not cleaned or len(cleaned) < 30:
-                continue
 
-            words = cleaned.split()
-            summary = " ".join(words[:word_limit])
+def get_summary_cache() -> SummaryCache:
+    global _summary_cache
+    with _summary_cache_lock:
+        if _summary_cache is None:
+            _summary_cache = SummaryCache(os.path.join(CACHE_DIR, "target_summaries.json"))
+        return _summary_cache
+
+
+# --------------------------------------------------------------------
+# Language probing: every edition at once, first useful answer wins
+# --------------------------------------------------------------------
+def _probe(session, lang: str, normalized_title: str, word_limit: int, cancel: CancelToken):
+    url = f"{wiki_base_url(lang)}/wiki/{normalized_title}"
+    print(f"Trying {lang.upper()} → {url}")
+
+    resp = safe_get(session, url, cancel=cancel)
+    if not resp or resp.status_code != 200 or cancel.is_set():
+        return None
+    return extract_summary(resp.text, word_limit)
+
+
+def fetch_wikipedia_summary(title: str, word_limit: int = 100):
+    """
+    (summary, lang) of `title`. All LANGS are probed concurrently; the first
+    valid summary wins, but waits up to PREFER_WAIT for languages listed
+    before it that are still probing. The other probes are then cancelled.
+    """
+    cache = get_summary_cache()
+    cached = cache.get(title, word_limit)
+    if cached:
+        summary, lang = cached
+        print(f"Found summary in {lang.upper()} (cached)")
+        return summary, lang
+
+    session = create_session()
+    normalized_title = title.replace(" ", "_")
+    words = max(word_limit, CACHE_WORDS)
+
+    cancel = CancelToken()
+    pool = ThreadPoolExecutor(max_workers=len(LANGS), thread_name_prefix="summary")
+    futures = {
+        pool.submit(_probe, session, lang, normalized_title, words, cancel): i
+        for i, lang in enumerate(LANGS)
+    }
+    summaries: Dict[int, Optional[str]] = {}
+    best, found_at = None, None
+    try:
+        pending = set(futures)
+        while pending:
+            timeout = None if found_at is None else max(found_at + PREFER_WAIT - time.monotonic(), 0)
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                i = futures[future]
+                summaries[i] = future.result()
+                if summaries[i] and (best is None or i < best):
+                    best = i
+                    found_at = found_at or time.monotonic()
+            if best is not None and (
+                all(i in summaries for i in range(best)) or time.monotonic() >= found_at + PREFER_WAIT
+            ):
+                break
+    finally:
+        cancel.set()  # releases the probes still waiting on the network
+        pool.shutdown(wait=False)
 
-            print(f"Found summary in {lang.upper()}!")
-            return summary, lang  # <--- RETURN LANGUAGE ALSO
+    if best is None:
+        print("No valid summary found in any language.")
+        return title, "en"   # default fallback
 
-    print("No valid summary found in any language.")
-    return title, "en"   # default fallback
+    lang = LANGS[best]
+    print(f"Found summary in {lang.upper()}!")
+    cache.put(title, lang, summaries[best], words)
+    return " ".join(summaries[best].split()[:word_limit]), lang  # <--- RETURN LANGUAGE ALSO
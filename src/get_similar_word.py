@@ -1,9 +1,20 @@
 import logging
+import os
 import re
+import threading
+import time
 import numpy as np
 from dataclasses import dataclass
-from typing import List
-from sentence_transformers import SentenceTransformer
+from typing import List, Optional
+
+from cancellation import CancelToken
+from embedding_cache import EmbeddingCache
+from embedding_service import BatchingEncoder
+from encoders import create_encoder, encoder_cache_name
+from settings import (
+    CACHE_DIR, ENCODER_BACKEND, EMBEDDING_MEMORY_ROWS, EMBEDDING_DISK_ROWS,
+    EMBEDDING_BATCH_SIZE, EMBEDDING_BATCH_WAIT_MS, ENCODE_CHUNK_SIZE,
+)
 
 logging.basicConfig(
     level=logging.INFO,
@@ -20,16 +31,116 @@ class Link:
 
 class GetSimilarWord:
     _model = None
+    _cache = None
+    _service = None
+    _loader = None
+    _load_error = None
+    loaded_at = None  # perf_counter() when warmup finished
+    _ready = threading.Event()
+    _lock = threading.Lock()
 
     def __init__(self):
-        if GetSimilarWord._model is None:
-            logger.info("Loading SentenceTransformer model (all-MiniLM-L6-v2)...")
-            GetSimilarWord._model = SentenceTransformer("all-MiniLM-L6-v2")
-            logger.info("Model loaded.")
+        # The model loads in the background; racers fetch their first pages
+        # meanwhile and only block when they first need an embedding
+        GetSimilarWord.warmup()
+
+        cache_name, disk_rows = encoder_cache_name(ENCODER_BACKEND), EMBEDDING_DISK_ROWS
+        if ENCODER_BACKEND == "remote" and GetSimilarWord._cache is None:
+            # Vectors depend on the daemon's backend: ask it (connecting is
+            # cheap); without a daemon keep only a memory tier
+            try:
+                cache_name = GetSimilarWord.wait_model().cache_name
+            except RuntimeError:
+                disk_rows = 0
+
+        with GetSimilarWord._lock:
+            if GetSimilarWord._cache is None:
+                GetSimilarWord._cache = EmbeddingCache(
+                    cache_name,
+                    cache_dir=os.path.join(CACHE_DIR, "embeddings"),
+                    memory_rows=EMBEDDING_MEMORY_ROWS,
+                    disk_rows=disk_rows,
+                )
+
+            if GetSimilarWord._service is None:
+                GetSimilarWord._service = BatchingEncoder(
+                    lambda texts: GetSimilarWord.wait_model().encode(texts),
+                    max_batch=EMBEDDING_BATCH_SIZE,
+                    max_wait_ms=EMBEDDING_BATCH_WAIT_MS,
+                )
+
+        self.cache = GetSimilarWord._cache
+        self.service = GetSimilarWord._service
+
+    # ----------------------------------------------------------
+    # 🔥 Background model loading
+    # ----------------------------------------------------------
+    @classmethod
+    def warmup(cls) -> threading.Thread:
+        """Start loading the model on a background thread (once per process)."""
+        with cls._lock:
+            if cls._loader is None:
+                cls._loader = threading.Thread(target=cls._load, name="model-warmup", daemon=True)
+                cls._loader.start()
+            return cls._loader
+
+    @classmethod
+    def _load(cls):
+        started = time.perf_counter()
+        try:
+            # torch or onnx, picked by WIKIGAME_ENCODER (see encoders.py)
+            cls._model = create_encoder(ENCODER_BACKEND)
+            cls.loaded_at = time.perf_counter()
+            logger.info(f"Model loaded in {time.perf_counter() - started:.2f}s.")
+        except Exception as e:
+            logger.error(f"Model failed to load: {e}")
+            cls._load_error = e
+        finally:
+            cls._ready.set()
+
+    @classmethod
+    def wait_model(cls, cancel: Optional[CancelToken] = None):
+        """The loaded encoder; blocks until warmup finished (interruptible with `cancel`)."""
+        cls.warmup()
+        if cancel is None:
+            cls._ready.wait()
         else:
-            logger.info("Reusing already-loaded model.")
+            while not cls._ready.wait(0.05):
+                cancel.check()
+        if cls._load_error is not None:
+            raise RuntimeError(f"Encoder could not be loaded: {cls._load_error}") from cls._load_error
+        return cls._model
+
+    @property
+    def model(self):
+        return GetSimilarWord.wait_model()
+
+    # ----------------------------------------------------------
+    # 🔥 Encode through the embedding cache (only unseen texts hit the model);
+    #    misses from all racing threads are batched into shared forward passes
+    #    With a cancel token, large inputs are encoded in chunks and the
+    #    token is checked between them
+    # ----------------------------------------------------------
+    def encode(self, texts: List[str], cancel: Optional[CancelToken] = None) -> np.ndarray:
+        if cancel is not None and not GetSimilarWord._ready.is_set():
+            GetSimilarWord.wait_model(cancel)
+
+        if cancel is None or len(texts) <= ENCODE_CHUNK_SIZE:
+            if cancel is not None:
+                cancel.check()
+            return self.cache.encode(texts, self.service.encode)
+
+        chunks = []
+        for i in range(0, len(texts), ENCODE_CHUNK_SIZE):
+            cancel.check()
+            chunks.append(self.cache.encode(texts[i:i + ENCODE_CHUNK_SIZE], self.service.encode))
+        return np.vstack(chunks)
+
+    def cache_stats(self) -> dict:
+        return self.cache.stats()
 
-        self.model = GetSimilarWord._model
+    def batch_stats(self) -> dict:
+        return self.service.stats()
 
     # ----------------------------------------------------------
     # 🔥 Remove useless / navigation / junk links
@@ -80,8 +191,8 @@ class GetSimilarWord:
         texts = [link.text for link in clean_links]
 
         logger.info(f"Encoding query and {len(texts)} cleaned links...")
-        query_emb = self.model.encode([query])
-        link_embs = self.model.encode(texts)
+        query_emb = self.encode([query])
+        link_embs = self.encode(texts)
 
         similarities = np.dot(link_embs, query_emb.T).flatten()
 
@@ -1,6 +1,21 @@
+from urllib.parse import urlparse
+
 import requests
 from requests.adapters import HTTPAdapter, Retry
 
+from settings import WIKI_BASE_URL
+
+
+def wiki_base_url(lang: str) -> str:
+    """Site root of a language edition, e.g. https://en.wikipedia.org (see WIKI_BASE_URL)."""
+    return WIKI_BASE_URL.format(lang=lang).rstrip("/")
+
+
+def wiki_title(url: str) -> str:
+    """Raw title part of an article URL ("" if it is not one); the site may sit under a path prefix."""
+    path = urlparse(url).path
+    return path.split("/wiki/", 1)[1] if "/wiki/" in path else ""
+
 def create_session():
     session = requests.Session()
 
@@ -0,0 +1,171 @@
+from typing import Callable, List, Optional, Tuple, Union
+from urllib.parse import unquote
+
+from lxml import etree
+
+# --------------------------------------------------------------------
+# Namespaces whose pages are not articles (canonical English names and
+# aliases, plus the common localized names of the File/Category/Template
+# namespaces for the languages in fetch_target_summary.LANGS).
+# --------------------------------------------------------------------
+NON_ARTICLE_NAMESPACES = {
+    "media", "special", "talk", "user", "user talk", "wikipedia", "wikipedia talk",
+    "wp", "project", "project talk", "file", "file talk", "image", "image talk",
+    "mediawiki", "mediawiki talk", "template", "template talk", "help", "help talk",
+    "category", "category talk", "portal", "portal talk", "draft", "draft talk",
+    "timedtext", "timedtext talk", "module", "module talk", "book", "book talk",
+    "education program", "gadget", "gadget definition", "topic",
+    # es / fr / de / ru / hi / ja
+    "archivo", "categoría", "plantilla", "ayuda", "especial", "anexo",
+    "fichier", "catégorie", "modèle", "aide", "spécial", "portail",
+    "datei", "kategorie", "vorlage", "hilfe", "spezial",
+    "файл", "категория", "шаблон", "справка", "служебная", "портал",
+    "चित्र", "श्रेणी", "साँचा", "सहायता", "विशेष",
+    "ファイル", "カテゴリ", "テンプレート", "ヘルプ", "特別", "ポータル",
+}
+
+CONTENT_ID = "mw-content-text"
+FEED_CHUNK = 64 * 1024
+
+RawLink = Tuple[str, str]  # (anchor text, href)
+
+
+def is_article_href(href: str) -> bool:
+    """False for /wiki/ links into non-article namespaces (File:, Help:, Category:, ...)."""
+    title = unquote(href.split("/wiki/", 1)[-1]).replace("_", " ")
+    prefix, sep, _ = title.partition(":")
+    if not sep:
+        return True
+    return prefix.strip().lower() not in NON_ARTICLE_NAMESPACES
+
+
+def _anchor_text(parts: List[str]) -> str:
+    # Same result as BeautifulSoup's tag.get_text(strip=True)
+    return "".join(p.strip() for p in parts if p.strip())
+
+
+class _StopParsing(Exception):
+    pass
+
+
+class _ContentLinkTarget:
+    """
+    lxml parser target: receives start/end/data events and keeps only
+    <a href> inside #mw-content-text. No tree is ever built.
+    """
+
+    def __init__(self, accept_href: Callable[[str], bool]):
+        self.accept_href = accept_href
+        self.links: List[RawLink] = []
+        self.depth = 0          # > 0 while inside #mw-content-text
+        self.done = False
+        self._href: Optional[str] = None
+        self._parts: List[str] = []
+        self._chunk: List[str] = []
+
+    def _flush_text(self):
+        # lxml may deliver one text node in several data() calls
+        if self._chunk:
+            if self._href is not None:
+                self._parts.append("".join(self._chunk))
+            self._chunk = []
+
+    def start(self, tag, attrib):
+        self._flush_text()
+        if self.done:
+            return
+
+        if self.depth:
+            self.depth += 1
+        elif tag == "div" and attrib.get("id") == CONTENT_ID:
+            self.depth = 1
+        else:
+            return
+
+        if tag == "a" and self._href is None:
+            href = attrib.get("href")
+            if href and self.accept_href(href) and is_article_href(href):
+                self._href = href
+                self._parts = []
+
+    def end(self, tag):
+        self._flush_text()
+        if not self.depth:
+            return
+
+        if tag == "a" and self._href is not None:
+            self.links.append((_anchor_text(self._parts), self._href))
+            self._href = None
+
+        self.depth -= 1
+        if self.depth == 0:
+            self.done = True
+
+    def data(self, data):
+        if self._href is not None:
+            self._chunk.append(data)
+
+    def comment(self, text):
+        self._flush_text()
+
+    def close(self):
+        return self.links
+
+
+def extract_links_lxml(html: Union[str, bytes], accept_href: Callable[[str], bool]) -> List[RawLink]:
+    """Streaming extractor: feeds the page in chunks and stops once #mw-content-text closes."""
+    target = _ContentLinkTarget(accept_href)
+    parser = etree.HTMLParser(target=target, encoding="utf-8" if isinstance(html, bytes) else None)
+
+    for start in range(0, len(html), FEED_CHUNK):
+        parser.feed(html[start:start + FEED_CHUNK])
+        if target.done:
+            break
+
+    try:
+        parser.close()
+    except etree.XMLSyntaxError:
+        pass
+    return target.links
+
+
+def extract_links_bs4(
+    html: Union[str, bytes],
+    accept_href: Callable[[str], bool],
+    content_only: bool = True,
+) -> List[RawLink]:
+    """Reference extractor on top of BeautifulSoup (html.parser)."""
+    from bs4 import BeautifulSoup  # only the reference path needs it
+
+    soup = BeautifulSoup(html, "html.parser")
+    root = soup
+    if content_only:
+        root = soup.find(id=CONTENT_ID)
+        if root is None:
+            return []
+
+    links: List[RawLink] = []
+    for tag in root.find_all("a"):
+        href = tag.get("href")
+        if not href or not accept_href(href):
+            continue
+        if content_only and not is_article_href(href):
+            continue
+        links.append((tag.get_text(strip=True) or "", href))
+    return links
+
+
+def parity_diff(fast: List[RawLink], reference: List[RawLink]) -> List[str]:
+    """Human-readable differences between two extractor outputs (empty when identical)."""
+    if fast == reference:
+        return []
+
+    diffs = []
+    if len(fast) != len(reference):
+        diffs.append(f"count {len(fast)} != {len(reference)}")
+    for i, (a, b) in enumerate(zip(fast, reference)):
+        if a != b:
+            diffs.append(f"#{i}: {a!r} != {b!r}")
+            if len(diffs) >= 10:
+                break
+    return diffs
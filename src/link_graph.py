@@ -0,0 +1,186 @@
+import bisect
+import json
+import logging
+import os
+import threading
+from typing import List, Optional
+from urllib.parse import quote
+
+import numpy as np
+
+from http_session import wiki_base_url, wiki_title
+from scapper import Link
+from titles import title_key
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+
+# --------------------------------------------------------------------
+# On-disk layout (everything except meta.json is a raw little-endian array)
+#
+#   meta.json                 lang, node / edge / redirect counts
+#   offsets.i64               CSR row offsets, len = nodes + 1
+#   targets.i32               CSR column indices (node ids), len = edges
+#   rev_offsets.i64           reverse CSR (pages linking to each node)
+#   rev_targets.i32
+#   page_ids.i32              Wikipedia page_id of each node
+#   titles.bin                utf-8 titles (underscore form), sorted bytewise;
+#   title_offsets.i64           node id == rank of its title
+#   redirect_titles.bin       sorted redirect titles and the node each
+#   redirect_offsets.i64        one points to
+#   redirect_targets.i32
+# --------------------------------------------------------------------
+
+
+class _StringTable:
+    """Sorted byte strings stored as one blob plus offsets; supports bisect."""
+
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray):
+        self.blob = blob
+        self.offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> bytes:
+        return self.blob[self.offsets[i]:self.offsets[i + 1]].tobytes()
+
+    def find(self, key: bytes) -> Optional[int]:
+        i = bisect.bisect_left(self, key)
+        if i < len(self) and self[i] == key:
+            return i
+        return None
+
+
+def _map(directory: str, name: str, dtype) -> np.ndarray:
+    path = os.path.join(directory, name)
+    if os.path.getsize(path) == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r")
+
+
+class LinkGraph:
+    """
+    Memory-mapped CSR link graph built by build_link_graph.py.
+
+    Loading only maps the files, so it takes milliseconds regardless of graph
+    size; pages are faulted in by the OS as they are touched.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        with open(os.path.join(directory, "meta.json"), "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+
+        self.lang = self.meta.get("lang", "en")
+        self.offsets = _map(directory, "offsets.i64", np.int64)
+        self.targets = _map(directory, "targets.i32", np.int32)
+        self.page_ids = _map(directory, "page_ids.i32", np.int32)
+
+        self.rev_offsets = self.rev_targets = None
+        if os.path.exists(os.path.join(directory, "rev_offsets.i64")):
+            self.rev_offsets = _map(directory, "rev_offsets.i64", np.int64)
+            self.rev_targets = _map(directory, "rev_targets.i32", np.int32)
+
+        self.titles = _StringTable(
+            _map(directory, "titles.bin", np.uint8),
+            _map(directory, "title_offsets.i64", np.int64),
+        )
+        self.redirects = _StringTable(
+            _map(directory, "redirect_titles.bin", np.uint8),
+            _map(directory, "redirect_offsets.i64", np.int64),
+        )
+        self.redirect_targets = _map(directory, "redirect_targets.i32", np.int32)
+
+        logger.info(
+            f"Mapped link graph {directory}: {self.num_nodes} pages, "
+            f"{self.num_edges} links, {len(self.redirects)} redirects"
+        )
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.page_ids)
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.targets)
+
+    def title(self, node: int) -> str:
+        return self.titles[node].decode("utf-8").replace("_", " ")
+
+    def node_id(self, title: str, follow_redirects: bool = True) -> Optional[int]:
+        key = title_key(title)
+        node = self.titles.find(key)
+        if node is None and follow_redirects:
+            r = self.redirects.find(key)
+            if r is not None:
+                node = int(self.redirect_targets[r])
+        return node
+
+    def neighbors(self, node: int) -> np.ndarray:
+        return self.targets[self.offsets[node]:self.offsets[node + 1]]
+
+    @property
+    def has_reverse(self) -> bool:
+        return self.rev_offsets is not None
+
+    def in_neighbors(self, node: int) -> np.ndarray:
+        if self.rev_offsets is None:
+            raise RuntimeError(
+                f"{self.directory} has no reverse adjacency; "
+                "run build_link_graph.py --add-reverse --out <dir>"
+            )
+        return self.rev_targets[self.rev_offsets[node]:self.rev_offsets[node + 1]]
+
+    def degree(self, node: int) -> int:
+        return int(self.offsets[node + 1] - self.offsets[node])
+
+
+_graphs = {}
+_graphs_lock = threading.Lock()
+
+
+def load_link_graph(directory: str) -> LinkGraph:
+    """Process-wide LinkGraph per directory."""
+    directory = os.path.abspath(directory)
+    with _graphs_lock:
+        if directory not in _graphs:
+            _graphs[directory] = LinkGraph(directory)
+        return _graphs[directory]
+
+
+class GraphScrapper:
+    """
+    Drop-in replacement for `Scrapper` whose links come from a local
+    LinkGraph instead of HTTP. Link text is the target page title.
+    """
+
+    def __init__(self, graph: LinkGraph, target_lang: Optional[str] = None):
+        self.graph = graph
+        self.target_lang = target_lang or graph.lang
+        self.base_url = wiki_base_url(self.target_lang)
+
+    def url_for(self, node: int) -> str:
+        title = self.graph.titles[node].decode("utf-8")
+        return f"{self.base_url}/wiki/{quote(title, safe=':/()!,*;@$-._~')}"
+
+    def node_from_url(self, url: str) -> Optional[int]:
+        title = wiki_title(url)
+        if not title:
+            return None
+        return self.graph.node_id(title)
+
+    def get_links(self, url: str) -> List[Link]:
+        node = self.node_from_url(url)
+        if node is None:
+            logger.warning(f"Page not in link graph: {url}")
+            return []
+
+        return [
+            Link(text=self.graph.title(int(n)), url=self.url_for(int(n)))
+            for n in self.graph.neighbors(node)
+        ]
@@ -0,0 +1,119 @@
+"""
+Link preprocessing between link extraction and encoding.
+
+A page links to the same article many times (lead, infobox, body, navbox)
+under different anchors, and the bs4 extractor also returns File:, Help:,
+Category: ... links and citation markers. `prepare_candidates` turns the raw
+links of a page into one candidate per target article:
+
+    1. drop links without anchor text and citation-like noise ("[3]", "^")
+    2. drop links into non-article namespaces
+    3. canonicalize the target (no fragment / query) and key it by page:
+       the decoded title by default, or the redirect-resolved title when a
+       `page_key` such as titles.RedirectMap.key is given
+    4. group the remaining links by page, merging up to MAX_ANCHORS
+       distinct anchors into the text that gets encoded
+
+Only the surviving candidates are encoded, and the stats say how much was cut.
+"""
+import re
+from dataclasses import dataclass, field, replace
+from typing import Callable, Dict, List
+from urllib.parse import urlparse
+
+from http_session import wiki_title
+from link_extractor import is_article_href
+from titles import title_key
+
+MAX_ANCHORS = 3     # anchors merged into one candidate text
+ANCHOR_SEP = "; "
+
+# Footnote markers and anchors without a letter or digit
+NOISE_ANCHOR = re.compile(r"^(?:[\[(](?:\d{1,3}|[a-z]|note \d+)[\])]|\W*)$", re.IGNORECASE)
+
+
+@dataclass
+class PipelineStats:
+    raw: int = 0
+    no_text: int = 0
+    noise: int = 0
+    namespace: int = 0
+    duplicates: int = 0
+    candidates: int = 0
+
+    @property
+    def reduction(self) -> float:
+        """Raw links per encoded candidate (1.0 = nothing removed)."""
+        return self.raw / self.candidates if self.candidates else float(self.raw > 0)
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "raw": self.raw, "no_text": self.no_text, "noise": self.noise, "namespace": self.namespace,
+            "duplicates": self.duplicates, "candidates": self.candidates, "reduction": round(self.reduction, 2),
+        }
+
+
+@dataclass
+class Candidates:
+    links: List = field(default_factory=list)    # first link to each target, URL canonicalized
+    texts: List[str] = field(default_factory=list)  # merged anchors, the text to encode
+    keys: List[bytes] = field(default_factory=list)  # page key of each target
+    stats: PipelineStats = field(default_factory=PipelineStats)
+
+    def __len__(self) -> int:
+        return len(self.links)
+
+
+def canonical_url(url: str) -> str:
+    """The URL without fragment and query."""
+    if "#" not in url and "?" not in url:
+        return url
+    return urlparse(url)._replace(fragment="", query="").geturl()
+
+
+def target_key(url: str, page_key: Callable[[str], bytes] = title_key) -> bytes:
+    """Grouping key of a link target: `page_key` of its title, else the canonical URL."""
+    title = wiki_title(canonical_url(url))
+    return page_key(title) if title else canonical_url(url).encode("utf-8")
+
+
+def prepare_candidates(links, page_key: Callable[[str], bytes] = title_key,
+                       max_anchors: int = MAX_ANCHORS) -> Candidates:
+    out = Candidates()
+    stats = out.stats
+    stats.raw = len(links)
+
+    anchors: Dict[bytes, List[str]] = {}  # target key -> merged anchors, in first-seen order
+    keys: Dict[str, bytes] = {}  # url -> target key; pages repeat their links
+    rejected = set()
+    for link in links:
+        text = link.text.strip() if link.text else ""
+        if not text:
+            stats.no_text += 1
+            continue
+        if NOISE_ANCHOR.match(text):
+            stats.noise += 1
+            continue
+
+        key = keys.get(link.url)
+        if key is None:
+            key = keys[link.url] = target_key(link.url, page_key)
+        merged = anchors.get(key)
+        if merged is None:
+            if key in rejected or not is_article_href(link.url):
+                rejected.add(key)
+                stats.namespace += 1
+                continue
+            anchors[key] = [text]
+            url = canonical_url(link.url)
+            out.links.append(link if text == link.text and url == link.url else replace(link, text=text, url=url))
+            continue
+
+        stats.duplicates += 1
+        if len(merged) < max_anchors and all(text.lower() != a.lower() for a in merged):
+            merged.append(text)
+
+    out.keys = list(anchors)
+    out.texts = [ANCHOR_SEP.join(merged) for merged in anchors.values()]
+    stats.candidates = len(out.links)
+    return out
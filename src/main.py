@@ -1,6 +1,5 @@
 import os
 os.environ["TF_ENABLE_ONEDNN_OPTS"] = "0"
-import threading
 from get_similar_word import GetSimilarWord
 from scapper import Scrapper
 from fetch_target_summary import fetch_wikipedia_summary
@@ -8,47 +7,43 @@ from engine import WikipediaGame
 
 import logging
 from dataclasses import dataclass
-from run_thread import run_game_thread_context, run_game_thread_title
+from http_session import wiki_base_url
+from metrics import get_metrics
+from run_thread import run_race
+from settings import RACE_DEADLINE
 
 
 
 
 def mainFun():
+    # Load the model while the target summary is fetched
+    GetSimilarWord.warmup()
 
     # target_title = "England"
     target_title = "Bhupalpally"
 
     target_context, target_lang = fetch_wikipedia_summary(target_title, 200)
-    start_url = f"https://{target_lang}.wikipedia.org/wiki/India"
+    start_url = f"{wiki_base_url(target_lang)}/wiki/India"
     print("target_lang =", target_lang)
     print(f"target_context: {target_context}")
 
-    results = []
-    stop_event = threading.Event()
+    outcome = run_race(start_url, target_title, target_context, target_lang, deadline=RACE_DEADLINE)
 
-    thread_title = threading.Thread(
-        target=run_game_thread_title,
-        args=("Title-Based", start_url, target_title, target_lang, results, stop_event)
-    )
+    if outcome.idle_ms is not None:
+        print(f"All racers idle {outcome.idle_ms:.1f} ms after the race was decided.")
 
-    thread_context = threading.Thread(
-        target=run_game_thread_context,
-        args=("Context-Based", start_url, target_title, target_context, target_lang, results, stop_event)
-    )
-
-    thread_title.start()
-    thread_context.start()
-
-    thread_title.join()
-    thread_context.join()
+    # Where each racer's time went, mean milliseconds per step
+    for racer, row in get_metrics().summary().items():
+        print(f"{racer}: {row}")
 
     print("\n======================")
     print(" WINNER RESULT")
     print("======================\n")
 
-    if results:
-        winner = results[0]
-        print(f"\n---- {winner.name} Path (Winner) ----")
+    winner = outcome.winner
+    if winner is not None:
+        label = "Winner" if winner.complete else "Best partial path, deadline reached"
+        print(f"\n---- {winner.name} Path ({label}) ----")
         for i, (title, url) in enumerate(winner.path, start=1):
             print(f"{i}. {title} -> {url}")
     else:
@@ -0,0 +1,285 @@
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+from settings import METRICS_PORT, METRICS_TRACE
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+STAGES = ("fetch", "parse", "encode", "score")
+
+
+@dataclass
+class StepEvent:
+    """What one racer step cost: from landing on a page to choosing the next link."""
+    racer: str
+    step: int
+    title: str
+    url: str
+    candidates: int = 0           # links found on the page
+    unique_candidates: int = 0    # of which encoded, after link_pipeline
+    chosen: Optional[str] = None  # anchor text of the link taken
+    score: Optional[float] = None
+    shortcut: bool = False        # finished through the target neighborhood
+    fetch_ms: float = 0.0         # exclusive stage times; nested stages are subtracted
+    parse_ms: float = 0.0
+    encode_ms: float = 0.0
+    score_ms: float = 0.0
+    total_ms: float = 0.0
+    bytes_downloaded: int = 0
+    page_cache_hits: int = 0
+    embedding_hits: int = 0
+    embedding_misses: int = 0
+    prefetch_hits: int = 0
+    page_store_hits: int = 0      # pages served by page_store (stored or loaded by another racer)
+    timestamp: float = field(default_factory=time.time)
+
+    def stage_ms(self) -> Dict[str, float]:
+        return {stage: getattr(self, f"{stage}_ms") for stage in STAGES}
+
+
+# --------------------------------------------------------------------
+# Per-thread step recording. Code deep in the call stack (scraper, page
+# cache, embedding cache) reports into whatever step its thread is in; with
+# no step active these calls cost one attribute lookup.
+# --------------------------------------------------------------------
+_local = threading.local()
+
+
+def current_step() -> Optional[StepEvent]:
+    return getattr(_local, "event", None)
+
+
+@contextmanager
+def record_step(event: StepEvent):
+    """Collect stage timings and counters for `event`; it is published only if the step completes."""
+    outer, outer_stack = current_step(), getattr(_local, "stack", None)
+    _local.event, _local.stack = event, []
+    start = time.perf_counter()
+    try:
+        yield event
+    finally:
+        _local.event, _local.stack = outer, outer_stack
+    event.total_ms = (time.perf_counter() - start) * 1000
+    get_metrics().record(event)
+
+
+@contextmanager
+def stage(name: str):
+    event = current_step()
+    if event is None:
+        yield
+        return
+
+    stack = _local.stack
+    stack.append(0.0)  # time of nested stages
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = (time.perf_counter() - start) * 1000
+        nested = stack.pop()
+        if stack:
+            stack[-1] += elapsed
+        field_name = f"{name}_ms"
+        setattr(event, field_name, getattr(event, field_name) + elapsed - nested)
+
+
+def add(name: str, value: int = 1):
+    """Add to a counter field of the current step, if any."""
+    event = current_step()
+    if event is not None:
+        setattr(event, name, getattr(event, name) + value)
+
+
+# --------------------------------------------------------------------
+# Aggregation and export
+# --------------------------------------------------------------------
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CANDIDATE_BUCKETS = (10, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+def _labels(**labels) -> str:
+    def escape(value) -> str:
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return ",".join(f'{key}="{escape(value)}"' for key, value in labels.items())
+
+
+class MetricsRegistry:
+    """
+    Aggregates step events into per-racer counters and histograms, exported
+    in the Prometheus text format (`render_prometheus`, `serve`), and
+    optionally appends every event to a JSONL trace file.
+    """
+
+    def __init__(self, trace_path: Optional[str] = None, keep_events: int = 10000):
+        self._lock = threading.Lock()
+        self.counters: Dict[Tuple[str, str], float] = {}
+        self.stage_seconds: Dict[Tuple[str, str], Histogram] = {}
+        self.step_seconds: Dict[str, Histogram] = {}
+        self.candidates: Dict[str, Histogram] = {}
+        self.events: List[StepEvent] = []
+        self.keep_events = keep_events
+
+        self.trace_path = trace_path
+        self._trace = open(trace_path, "a", encoding="utf-8") if trace_path else None
+        self._server = None
+
+    def _count(self, name: str, racer: str, value: float):
+        key = (name, racer)
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def record(self, event: StepEvent):
+        racer = event.racer or "unnamed"
+        with self._lock:
+            self._count("steps_total", racer, 1)
+            self._count("bytes_downloaded_total", racer, event.bytes_downloaded)
+            self._count("page_cache_hits_total", racer, event.page_cache_hits)
+            self._count("embedding_cache_hits_total", racer, event.embedding_hits)
+            self._count("embedding_cache_misses_total", racer, event.embedding_misses)
+            self._count("prefetch_hits_total", racer, event.prefetch_hits)
+            self._count("page_store_hits_total", racer, event.page_store_hits)
+            self._count("shortcuts_total", racer, int(event.shortcut))
+            self._count("candidate_links_total", racer, event.candidates)
+            self._count("encoded_candidates_total", racer, event.unique_candidates)
+
+            for name, ms in event.stage_ms().items():
+                self.stage_seconds.setdefault((racer, name), Histogram(SECONDS_BUCKETS)).observe(ms / 1000)
+            self.step_seconds.setdefault(racer, Histogram(SECONDS_BUCKETS)).observe(event.total_ms / 1000)
+            self.candidates.setdefault(racer, Histogram(CANDIDATE_BUCKETS)).observe(event.candidates)
+
+            self.events.append(event)
+            if len(self.events) > self.keep_events:
+                del self.events[:len(self.events) - self.keep_events]
+
+            if self._trace is not None:
+                self._trace.write(json.dumps(asdict(event), ensure_ascii=False) + "\n")
+                self._trace.flush()
+
+    def recent(self, racer: Optional[str] = None) -> List[StepEvent]:
+        with self._lock:
+            return [e for e in self.events if racer is None or e.racer == racer]
+
+    def summary(self) -> Dict[str, dict]:
+        """Per racer: steps, mean milliseconds per stage and links found per link encoded."""
+        out = {}
+        with self._lock:
+            for (racer, name), hist in self.stage_seconds.items():
+                row = out.setdefault(racer, {"steps": hist.count})
+                row[f"{name}_ms"] = round(hist.sum * 1000 / hist.count, 2) if hist.count else 0.0
+            for racer, row in out.items():
+                encoded = self.counters.get(("encoded_candidates_total", racer), 0)
+                if encoded:
+                    row["link_reduction"] = round(self.counters[("candidate_links_total", racer)] / encoded, 2)
+        return out
+
+    def render_prometheus(self) -> str:
+        lines = []
+
+        def histogram(name, help_text, series):
+            lines.append(f"# HELP wikigame_{name} {help_text}")
+            lines.append(f"# TYPE wikigame_{name} histogram")
+            for labels, hist in series:
+                for bound, count in zip(hist.buckets, hist.counts):
+                    lines.append(f'wikigame_{name}_bucket{{{_labels(**labels, le=bound)}}} {count}')
+                lines.append(f'wikigame_{name}_bucket{{{_labels(**labels, le="+Inf")}}} {hist.count}')
+                lines.append(f"wikigame_{name}_sum{{{_labels(**labels)}}} {hist.sum}")
+                lines.append(f"wikigame_{name}_count{{{_labels(**labels)}}} {hist.count}")
+
+        with self._lock:
+            names = sorted({name for name, _ in self.counters})
+            for name in names:
+                lines.append(f"# HELP wikigame_{name} Racer steps: {name.replace('_total', '').replace('_', ' ')}")
+                lines.append(f"# TYPE wikigame_{name} counter")
+                for (counter, racer), value in sorted(self.counters.items()):
+                    if counter == name:
+                        lines.append(f"wikigame_{name}{{{_labels(racer=racer)}}} {value:g}")
+
+            histogram("stage_seconds", "Time per step spent in each stage",
+                      [({"racer": r, "stage": s}, h) for (r, s), h in sorted(self.stage_seconds.items())])
+            histogram("step_seconds", "Time per step",
+                      [({"racer": r}, h) for r, h in sorted(self.step_seconds.items())])
+            histogram("step_candidates", "Links found per step",
+                      [({"racer": r}, h) for r, h in sorted(self.candidates.items())])
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str):
+        """For node_exporter's textfile collector; the file is replaced atomically."""
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.render_prometheus())
+        os.replace(tmp, path)
+
+    def serve(self, port: int, host: str = "0.0.0.0"):
+        """Expose GET /metrics on a background thread."""
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = registry.render_prometheus().encode("utf-8")
+                self.send_response(200 if self.path.startswith("/metrics") else 404)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+        logger.info(f"Serving metrics on http://{host}:{port}/metrics")
+
+    def close(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server = None
+        if self._trace is not None:
+            self._trace.close()
+            self._trace = None
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def get_metrics() -> MetricsRegistry:
+    """Process-wide registry configured from settings (trace file, /metrics port)."""
+    global _default
+    if _default is None:
+        with _default_lock:
+            if _default is None:
+                registry = MetricsRegistry(METRICS_TRACE or None)
+                if METRICS_PORT:
+                    try:
+                        registry.serve(METRICS_PORT)
+                    except OSError as e:
+                        logger.warning(f"Could not serve metrics on port {METRICS_PORT}: {e}")
+                _default = registry
+    return _default
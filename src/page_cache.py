@@ -0,0 +1,332 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Optional, Tuple
+from urllib.parse import urlparse
+
+import metrics
+from cancellation import cancellable_get
+from settings import (
+    CACHE_DIR, PAGE_CACHE_ENABLED, PAGE_CACHE_TTL, PAGE_CACHE_MEMORY_MB, PAGE_CACHE_DISK_MB,
+)
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CachedPage:
+    url: str
+    status_code: int
+    text: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    fetched_at: float = 0.0
+
+    @property
+    def size(self) -> int:
+        return len(self.text)
+
+
+def canonical_url(url: str) -> str:
+    parsed = urlparse(url)
+    return parsed._replace(
+        scheme=parsed.scheme.lower(),
+        netloc=parsed.netloc.lower(),
+        fragment="",
+    ).geturl()
+
+
+class PageCache:
+    """
+    Response cache in front of `session.get` with two tiers:
+
+      - memory: LRU of CachedPage, bounded by total text size
+      - disk:   one zlib-compressed file per URL, bounded by total file size
+                (oldest files are evicted first)
+
+    Entries younger than `ttl` seconds are served without touching the
+    network. Older entries are revalidated with If-None-Match /
+    If-Modified-Since, so an unchanged page costs a 304 instead of a body.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        ttl: float = 86400,
+        memory_bytes: int = 64 * 1024 * 1024,
+        disk_bytes: int = 512 * 1024 * 1024,
+    ):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+
+        self._memory: "OrderedDict[str, CachedPage]" = OrderedDict()
+        self._memory_size = 0
+        self._disk_size = 0
+        self._lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.fresh_hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.bytes_downloaded = 0
+        self.bytes_saved = 0
+
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._disk_size = sum(size for _, size, _ in self._disk_files())
+
+    # ----------------------------------------------------------
+    # Memory tier
+    # ----------------------------------------------------------
+    def _remember(self, key: str, page: CachedPage):
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_size -= old.size
+
+        self._memory[key] = page
+        self._memory_size += page.size
+
+        while self._memory_size > self.memory_bytes and len(self._memory) > 1:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_size -= evicted.size
+
+    # ----------------------------------------------------------
+    # Disk tier
+    # ----------------------------------------------------------
+    def _disk_path(self, key: str) -> str:
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, digest[:2], f"{digest}.z")
+
+    def _disk_files(self):
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith(".z"):
+                    path = os.path.join(root, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    yield path, st.st_size, st.st_mtime
+
+    def _load_disk(self, key: str) -> Optional[CachedPage]:
+        path = self._disk_path(key)
+        try:
+            with open(path, "rb") as f:
+                raw = zlib.decompress(f.read())
+            os.utime(path)
+        except (OSError, zlib.error):
+            return None
+
+        header, _, body = raw.partition(b"\n")
+        try:
+            meta = json.loads(header)
+            return CachedPage(text=body.decode("utf-8"), **meta)
+        except (ValueError, UnicodeDecodeError, KeyError, TypeError) as e:
+            # Truncated or foreign entry: a miss, and not worth keeping
+            logger.warning(f"Dropping corrupt page cache entry {path}: {e}")
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+
+    def _store_disk(self, key: str, page: CachedPage):
+        meta = asdict(page)
+        meta.pop("text")
+        blob = zlib.compress(json.dumps(meta).encode("utf-8") + b"\n" + page.text.encode("utf-8"))
+
+        path = self._disk_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            previous = os.path.getsize(path)
+        except OSError:
+            previous = 0
+
+        # Unique per process and thread: batch workers share the cache directory
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(blob)
+        os.replace(tmp, path)
+
+        with self._lock:
+            self._disk_size += len(blob) - previous
+            over = self._disk_size > self.disk_bytes
+
+        if over:
+            self._evict_disk()
+
+    def _evict_disk(self):
+        files = sorted(self._disk_files(), key=lambda item: item[2])
+        goal = int(self.disk_bytes * 0.9)
+        total = sum(size for _, size, _ in files)
+
+        for path, size, _ in files:
+            if total <= goal:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+
+        with self._lock:
+            self._disk_size = total
+
+    # ----------------------------------------------------------
+    # Public API
+    # ----------------------------------------------------------
+    def get(self, url: str) -> Optional[CachedPage]:
+        key = canonical_url(url)
+        with self._lock:
+            page = self._memory.get(key)
+            if page is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return page
+
+        if not self.cache_dir:
+            return None
+
+        page = self._load_disk(key)
+        if page is not None:
+            with self._lock:
+                self.disk_hits += 1
+                self._remember(key, page)
+        return page
+
+    def put(self, page: CachedPage):
+        key = canonical_url(page.url)
+        with self._lock:
+            self._remember(key, page)
+
+        if self.cache_dir:
+            try:
+                self._store_disk(key, page)
+            except OSError as e:
+                logger.warning(f"Could not write page cache entry for {page.url}: {e}")
+
+    def prepare(self, url: str) -> Tuple[Optional[CachedPage], Optional[CachedPage], dict]:
+        """
+        First half of a cached GET: returns (fresh, stale, headers).
+        `fresh` can be served as-is; otherwise send a GET with `headers`
+        and hand the response to `complete` together with `stale`.
+        """
+        cached = self.get(url)
+
+        if cached is not None and time.time() - cached.fetched_at < self.ttl:
+            with self._lock:
+                self.fresh_hits += 1
+                self.bytes_saved += cached.size
+            metrics.add("page_cache_hits")
+            return cached, None, {}
+
+        headers = {}
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+        return None, cached, headers
+
+    def complete(
+        self,
+        url: str,
+        stale: Optional[CachedPage],
+        status_code: int,
+        text: str,
+        headers,
+        nbytes: int,
+    ) -> CachedPage:
+        """Second half of a cached GET: records the response and returns the page to use."""
+        if stale is not None and status_code == 304:
+            stale.fetched_at = time.time()
+            with self._lock:
+                self.revalidated += 1
+                self.bytes_saved += stale.size
+            metrics.add("page_cache_hits")
+            metrics.add("bytes_downloaded", nbytes)
+            self.put(stale)
+            return stale
+
+        page = CachedPage(
+            url=url,
+            status_code=status_code,
+            text=text if status_code == 200 else "",
+            etag=headers.get("ETag"),
+            last_modified=headers.get("Last-Modified"),
+            fetched_at=time.time(),
+        )
+        with self._lock:
+            self.misses += 1
+            self.bytes_downloaded += nbytes
+        metrics.add("bytes_downloaded", nbytes)
+
+        # 404s are cached too: missing language editions are probed on every race
+        if status_code in (200, 404):
+            self.put(page)
+        return page
+
+    def fetch(self, session, url: str, timeout: float = 10, cancel=None) -> CachedPage:
+        """
+        GET `url` through the cache. Network errors propagate to the caller.
+        With a `cancel` token the request is interruptible (see cancellation.py).
+        """
+        fresh, stale, headers = self.prepare(url)
+        if fresh is not None:
+            return fresh
+
+        if cancel is not None:
+            res = cancellable_get(session, url, cancel, timeout=timeout, headers=headers)
+        else:
+            res = session.get(url, timeout=timeout, headers=headers)
+        return self.complete(url, stale, res.status_code, res.text, res.headers, len(res.content))
+
+    def stats(self) -> dict:
+        hits = self.fresh_hits + self.revalidated
+        lookups = hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "fresh_hits": self.fresh_hits,
+            "revalidated": self.revalidated,
+            "misses": self.misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "bytes_downloaded": self.bytes_downloaded,
+            "bytes_saved": self.bytes_saved,
+            "memory_bytes": self._memory_size,
+            "disk_bytes": self._disk_size,
+        }
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_page_cache() -> Optional[PageCache]:
+    """Process-wide page cache built from settings (None when disabled)."""
+    global _default_cache
+    if not PAGE_CACHE_ENABLED:
+        return None
+
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = PageCache(
+                cache_dir=os.path.join(CACHE_DIR, "pages"),
+                ttl=PAGE_CACHE_TTL,
+                memory_bytes=PAGE_CACHE_MEMORY_MB * 1024 * 1024,
+                disk_bytes=PAGE_CACHE_DISK_MB * 1024 * 1024,
+            )
+        return _default_cache
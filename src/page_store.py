@@ -0,0 +1,208 @@
+"""
+Process-wide store of parsed pages, shared by all racers.
+
+Racers of one race start on the same page and keep crossing the same hub
+pages. The page cache already saves the download of a page fetched before,
+but two racers asking for a page at the same moment both miss it, and every
+racer parses the HTML again. The store sits in front of fetch + parse:
+
+    - single flight: the first caller of a URL loads it; concurrent callers
+      of the same URL wait for that load instead of starting their own
+    - the parsed link lists are kept in an LRU bounded by approximate size,
+      so later visits skip fetch and parse altogether
+
+A waiter whose own race is still running retries the load itself when the
+owner's race was cancelled under it.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Callable, Dict, List, Optional, Tuple
+
+import metrics
+from cancellation import Cancelled, CancelToken
+from page_cache import canonical_url
+from settings import PAGE_CACHE_TTL, PAGE_STORE_MB
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+LINK_OVERHEAD = 120  # bytes per Link object beyond its strings, roughly
+WAIT_POLL = 0.05     # seconds between cancel checks while waiting on another racer
+
+
+class PartialLinks(list):
+    """Links a loader could read only in part (e.g. a cut API listing): served, never stored."""
+
+
+def links_size(links) -> int:
+    return sum(len(link.text) + len(link.url) + LINK_OVERHEAD for link in links)
+
+
+class PageStore:
+    """
+    Canonical URL -> parsed links, with one in-flight load per URL.
+
+    max_bytes  approximate size bound of the stored link lists
+    ttl        seconds a stored page is served before it is loaded again
+    """
+
+    def __init__(self, max_bytes: int, ttl: float = PAGE_CACHE_TTL):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+
+        self._pages: "OrderedDict[str, Tuple[float, int, List]]" = OrderedDict()  # key -> (stored at, size, links)
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._size = 0
+
+        self.hits = 0
+        self.shared = 0  # loads joined while in flight
+        self.loads = 0
+        self.evictions = 0
+
+    def _lookup(self, key: str) -> Optional[List]:
+        entry = self._pages.get(key)
+        if entry is None:
+            return None
+        stored_at, size, links = entry
+        if time.time() - stored_at > self.ttl:
+            del self._pages[key]
+            self._size -= size
+            return None
+        self._pages.move_to_end(key)
+        return links
+
+    def _remember(self, key: str, links: List):
+        size = links_size(links)
+        if size > self.max_bytes:
+            return
+        old = self._pages.pop(key, None)
+        if old is not None:
+            self._size -= old[1]
+        self._pages[key] = (time.time(), size, links)
+        self._size += size
+        while self._size > self.max_bytes:
+            _, (_, evicted, _) = self._pages.popitem(last=False)
+            self._size -= evicted
+            self.evictions += 1
+
+    @staticmethod
+    def _key(url: str, variant: str) -> str:
+        return f"{variant} {canonical_url(url)}" if variant else canonical_url(url)
+
+    def peek(self, url: str, variant: str = "") -> Optional[List]:
+        """Stored links of `url`, without loading them (None if not stored)."""
+        with self._lock:
+            links = self._lookup(self._key(url, variant))
+            if links is None:
+                return None
+            self.hits += 1
+        metrics.add("page_store_hits")
+        return list(links)
+
+    def put(self, url: str, links: List, variant: str = ""):
+        """Store links loaded elsewhere, e.g. by a batched request."""
+        if links and not isinstance(links, PartialLinks):
+            with self._lock:
+                self._remember(self._key(url, variant), links)
+
+    def get_links(self, url: str, load: Callable[[str], List], cancel: Optional[CancelToken] = None,
+                  variant: str = "") -> List:
+        """
+        Links of `url`: stored, joined from another caller's load, or loaded with `load(url)`.
+        `variant` separates loaders that parse the same page differently (e.g. the link extractor).
+        """
+        key = self._key(url, variant)
+        while True:
+            with self._lock:
+                links = self._lookup(key)
+                if links is not None:
+                    self.hits += 1
+                    metrics.add("page_store_hits")
+                    return list(links)
+                future = self._inflight.get(key)
+                owner = future is None
+                if owner:
+                    future = self._inflight[key] = Future()
+                    self.loads += 1
+                else:
+                    self.shared += 1
+
+            if owner:
+                return self._load(key, url, load, future)
+
+            try:
+                links = self._wait(future, cancel)
+            except Cancelled:
+                if cancel is not None:
+                    cancel.check()  # our own race is over: give up too
+                continue  # the owner's race was cancelled, not ours: load it ourselves
+            metrics.add("page_store_hits")
+            return list(links)
+
+    def _load(self, key: str, url: str, load: Callable[[str], List], future: Future) -> List:
+        try:
+            links = load(url)
+        except BaseException as e:
+            with self._lock:
+                del self._inflight[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            del self._inflight[key]
+            # An empty list is usually a failed fetch; let the next caller retry it
+            if links and not isinstance(links, PartialLinks):
+                self._remember(key, links)
+        future.set_result(links)
+        return list(links)
+
+    @staticmethod
+    def _wait(future: Future, cancel: Optional[CancelToken]) -> List:
+        if cancel is None:
+            return future.result()
+        while True:
+            cancel.check()
+            try:
+                return future.result(timeout=WAIT_POLL)
+            except FutureTimeout:
+                continue
+
+    def clear(self):
+        with self._lock:
+            self._pages.clear()
+            self._size = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "pages": len(self._pages),
+                "bytes": self._size,
+                "hits": self.hits,
+                "shared": self.shared,
+                "loads": self.loads,
+                "evictions": self.evictions,
+                "in_flight": len(self._inflight),
+            }
+
+
+_default_store = None
+_default_lock = threading.Lock()
+
+
+def get_page_store() -> Optional[PageStore]:
+    """Process-wide page store built from settings (None when disabled)."""
+    global _default_store
+    if PAGE_STORE_MB <= 0:
+        return None
+
+    with _default_lock:
+        if _default_store is None:
+            _default_store = PageStore(max_bytes=PAGE_STORE_MB * 1024 * 1024)
+        return _default_store
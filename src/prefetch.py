@@ -0,0 +1,131 @@
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Tuple
+
+import metrics
+from page_store import links_size
+from scapper import Link, Scrapper
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+
+class Prefetcher:
+    """
+    Speculatively fetches and parses the best-scoring candidate pages of the
+    current step, so the page the game moves to next is usually ready.
+
+    depth        how many top candidates to prefetch per step
+    max_workers  concurrent background fetches
+    byte_budget  max bytes (approximate, of parsed links) held by prefetched
+                 pages nobody asked for yet
+
+    Prefetches go through the scraper's page store when it has one, so a
+    page prefetched for one racer is also ready for the others.
+    """
+
+    def __init__(
+        self,
+        scraper: Scrapper,
+        depth: int = 3,
+        max_workers: int = 4,
+        byte_budget: int = 16 * 1024 * 1024,
+    ):
+        self.scraper = scraper
+        self.depth = depth
+        self.byte_budget = byte_budget
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._held_bytes = 0
+
+        self.scheduled = 0
+        self.used = 0
+        self.wasted = 0
+        self.skipped_budget = 0
+        self.bytes_fetched = 0
+        self.bytes_wasted = 0
+
+    def _fetch(self, url: str) -> Tuple[List[Link], int]:
+        links = self.scraper.get_links(url)
+        size = links_size(links)
+        with self._lock:
+            self._held_bytes += size
+            self.bytes_fetched += size
+        return links, size
+
+    def schedule(self, urls: List[str]):
+        with self._lock:
+            for url in urls[:self.depth]:
+                if url in self._futures:
+                    continue
+                if self._held_bytes >= self.byte_budget:
+                    self.skipped_budget += 1
+                    continue
+                self._futures[url] = self._executor.submit(self._fetch, url)
+                self.scheduled += 1
+
+    def _release(self, future: Future, wasted: bool):
+        if not future.done():
+            if future.cancel():
+                return
+            # Already running: account for it when it lands
+            future.add_done_callback(lambda f: self._release(f, wasted))
+            return
+
+        if future.cancelled() or future.exception() is not None:
+            return
+
+        _, size = future.result()
+        with self._lock:
+            self._held_bytes -= size
+            if wasted:
+                self.wasted += 1
+                self.bytes_wasted += size
+
+    def get_links(self, url: str) -> List[Link]:
+        """Links of `url`, from a prefetch if one was scheduled. Other pending prefetches are dropped."""
+        with self._lock:
+            future = self._futures.pop(url, None)
+            stale = list(self._futures.values())
+            self._futures.clear()
+
+        for other in stale:
+            self._release(other, wasted=True)
+
+        if future is None or future.cancelled():
+            return self.scraper.get_links(url)
+
+        links, size = future.result()
+        with self._lock:
+            self._held_bytes -= size
+            self.used += 1
+        metrics.add("prefetch_hits")
+        return links
+
+    def cancel_pending(self):
+        with self._lock:
+            stale = list(self._futures.values())
+            self._futures.clear()
+
+        for other in stale:
+            self._release(other, wasted=True)
+
+    def close(self):
+        self.cancel_pending()
+        self._executor.shutdown(wait=False)
+
+    def stats(self) -> dict:
+        return {
+            "scheduled": self.scheduled,
+            "used": self.used,
+            "wasted": self.wasted,
+            "skipped_budget": self.skipped_budget,
+            "bytes_fetched": self.bytes_fetched,
+            "bytes_wasted": self.bytes_wasted,
+        }
@@ -1,11 +1,16 @@
 import threading
+import time
 from get_similar_word import GetSimilarWord
-from scapper import Scrapper
+from backends import create_scraper, create_shortest_path_solver
 from fetch_target_summary import fetch_wikipedia_summary
 from engine import WikipediaGame
+from beam_search import BeamSearch
+from cancellation import CancelToken
+from page_cache import get_page_cache
 
 import logging
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import List, Optional
 
 logging.basicConfig(
     level=logging.INFO,
@@ -18,15 +23,37 @@ logger = logging.getLogger(__name__)
 class PathResult:
     name: str
     path: list
+    complete: bool = True          # False: best partial path at the race deadline
+    score: Optional[float] = None  # similarity of the last page, for ranking partials
 
 
+def pick_winner(results: List[PathResult]) -> Optional[PathResult]:
+    """The first racer that reached the target, else the most promising partial path."""
+    for result in results:
+        if result.complete:
+            return result
+    if not results:
+        return None
+    return max(results, key=lambda r: r.score if r.score is not None else float("-inf"))
+
+
+def _cancel_token(stop_event) -> Optional[CancelToken]:
+    return stop_event if isinstance(stop_event, CancelToken) else None
+
+
+def _record_partial(name, path, stop_event, results_list, score):
+    """When the race deadline (not a winner) stopped us, report how far we got."""
+    if path and getattr(stop_event, "expired", False):
+        results_list.append(PathResult(name=name, path=path, complete=False, score=score))
+        logger.info(f"[{name}] Deadline reached — partial path of {len(path)} pages.")
 
 
 def run_game_thread_title(name, start_url, target, results_list, stop_event, target_lang, max_steps = 100, threshold_val = 0.30):
     """Thread worker with early stop support."""
-    scraper = Scrapper()
+    cancel = _cancel_token(stop_event)
+    scraper = create_scraper(target_lang, cancel=cancel)
     selector = GetSimilarWord()
-    game = WikipediaGame(scraper, selector, target_lang=target_lang, max_steps=max_steps, similarity_threshold=threshold_val)
+    game = WikipediaGame(scraper, selector, target_lang=target_lang, max_steps=max_steps, similarity_threshold=threshold_val, cancel=cancel, racer=name)
 
     logger.info(f"[{name}] Starting game...")
 
@@ -35,11 +62,15 @@ def run_game_thread_title(name, start_url, target, results_list, stop_event, tar
 
     for title, url in game.play_stepwise_title(start_url, target):
         if stop_event.is_set():
-            logger.info(f"[{name}] Stop signal received. Exiting thread.")
-            return
-        
+            break
+
         path.append((title, url))
 
+    if stop_event.is_set():
+        logger.info(f"[{name}] Stop signal received. Exiting thread.")
+        _record_partial(name, path, stop_event, results_list, game.last_score)
+        return
+
     # If this thread finishes first → announce winner
     if not stop_event.is_set():
         stop_event.set()        # Tell the other thread to stop
@@ -50,9 +81,10 @@ def run_game_thread_title(name, start_url, target, results_list, stop_event, tar
 
 def run_game_thread_context(name, start_url, target, context, results_list, stop_event, target_lang, max_steps = 100, threshold_val = 0.30):
     """Thread worker with early stop support."""
-    scraper = Scrapper()
+    cancel = _cancel_token(stop_event)
+    scraper = create_scraper(target_lang, cancel=cancel)
     selector = GetSimilarWord()
-    game = WikipediaGame(scraper, selector, target_lang= target_lang, max_steps=max_steps, similarity_threshold=threshold_val)
+    game = WikipediaGame(scraper, selector, target_lang= target_lang, max_steps=max_steps, similarity_threshold=threshold_val, cancel=cancel, racer=name)
 
     logger.info(f"[{name}] Starting game...")
 
@@ -61,13 +93,137 @@ def run_game_thread_context(name, start_url, target, context, results_list, stop
 
     for title, url in game.play_stepwise_context(start_url, target, context):
         if stop_event.is_set():
-            logger.info(f"[{name}] Stop signal received. Exiting thread.")
-            return
-        
+            break
+
         path.append((title, url))
 
+    if stop_event.is_set():
+        logger.info(f"[{name}] Stop signal received. Exiting thread.")
+        _record_partial(name, path, stop_event, results_list, game.last_score)
+        return
+
     # If this thread finishes first → announce winner
     if not stop_event.is_set():
         stop_event.set()        # Tell the other thread to stop
         results_list.append(PathResult(name=name, path=path))
         logger.info(f"[{name}] Completed FIRST — winner!")
+
+
+
+def run_game_thread_shortest(name, start_url, target, results_list, stop_event, target_lang):
+    """Exact bidirectional-BFS racer over the local link graph."""
+    solver = create_shortest_path_solver(target_lang)
+    if solver is None:
+        logger.info(f"[{name}] No link graph for '{target_lang}'. Not racing.")
+        return
+
+    logger.info(f"[{name}] Starting game...")
+
+    path = []
+
+    for title, url in solver.play_stepwise(start_url, target):
+        if stop_event.is_set():
+            logger.info(f"[{name}] Stop signal received. Exiting thread.")
+            return
+
+        path.append((title, url))
+
+    # An empty path means the target is unreachable in the graph
+    if path and not stop_event.is_set():
+        stop_event.set()
+        results_list.append(PathResult(name=name, path=path))
+        logger.info(f"[{name}] Completed FIRST — winner!")
+
+
+
+def run_game_thread_beam(name, start_url, target, context, results_list, stop_event, target_lang):
+    """Best-first racer: bounded frontier, links scored against the target context."""
+    cancel = _cancel_token(stop_event)
+    scraper = create_scraper(target_lang, cancel=cancel)
+    selector = GetSimilarWord()
+    search = BeamSearch(scraper, selector, cancel=cancel, target_lang=target_lang)
+
+    logger.info(f"[{name}] Starting game...")
+
+    result = search.search(start_url, target, context)
+    path = result.path
+    logger.info(f"[{name}] {result.stats}")
+
+    if stop_event.is_set():
+        logger.info(f"[{name}] Stop signal received. Exiting thread.")
+        _record_partial(name, path, stop_event, results_list, result.score)
+        return
+
+    # An empty path means the expansion budget ran out
+    if result.stats.solved and not stop_event.is_set():
+        stop_event.set()
+        results_list.append(PathResult(name=name, path=path))
+        logger.info(f"[{name}] Completed FIRST — winner!")
+
+
+
+# --------------------------------------------------------------------
+# One full race: every racer on its own thread, first to finish wins
+# --------------------------------------------------------------------
+@dataclass
+class RaceOutcome:
+    winner: Optional[PathResult]
+    results: List[PathResult] = field(default_factory=list)
+    seconds: float = 0.0
+    idle_ms: Optional[float] = None   # losers' shutdown time after the race was decided
+    fetches: int = 0                  # page lookups through the page cache
+    downloads: int = 0                # of those, pages that went to the network
+    deadline_reached: bool = False
+
+
+def _page_counts():
+    cache = get_page_cache()
+    if cache is None:
+        return 0, 0
+    stats = cache.stats()
+    return stats["fresh_hits"] + stats["revalidated"] + stats["misses"], stats["misses"] + stats["revalidated"]
+
+
+def run_race(start_url, target, context, target_lang, deadline=None, max_steps=100, threshold_val=0.30):
+    """Race all strategies from `start_url` to `target`; blocks until every racer has stopped."""
+    results = []
+    # Set by the winner (or the race deadline); losers unwind within milliseconds
+    stop_event = CancelToken(deadline=deadline or None)
+    fetches_before, downloads_before = _page_counts()
+    started = time.perf_counter()
+
+    threads = [
+        threading.Thread(
+            target=run_game_thread_title,
+            args=("Title-Based", start_url, target, results, stop_event, target_lang, max_steps, threshold_val),
+        ),
+        threading.Thread(
+            target=run_game_thread_context,
+            args=("Context-Based", start_url, target, context, results, stop_event, target_lang, max_steps, threshold_val),
+        ),
+        # Only races when a local link graph is available (see build_link_graph.py)
+        threading.Thread(
+            target=run_game_thread_shortest,
+            args=("Shortest-Path", start_url, target, results, stop_event, target_lang),
+        ),
+        threading.Thread(
+            target=run_game_thread_beam,
+            args=("Beam-Search", start_url, target, context, results, stop_event, target_lang),
+        ),
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stop_event.close()
+
+    fetches_after, downloads_after = _page_counts()
+    return RaceOutcome(
+        winner=pick_winner(results),
+        results=results,
+        seconds=time.perf_counter() - started,
+        idle_ms=(time.monotonic() - stop_event.set_at) * 1000 if stop_event.set_at is not None else None,
+        fetches=fetches_after - fetches_before,
+        downloads=downloads_after - downloads_before,
+        deadline_reached=stop_event.expired,
+    )
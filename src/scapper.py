@@ -1,9 +1,18 @@
 import logging
 import requests
-from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
 from dataclasses import dataclass
-from typing import List
+from functools import partial
+from typing import List, Optional
+
+import metrics
+from cancellation import CancelToken, cancellable_get
+from http_session import wiki_base_url, wiki_title
+from link_extractor import extract_links_bs4, extract_links_lxml, parity_diff
+from page_cache import PageCache, get_page_cache
+from page_store import PageStore, get_page_store
+from settings import LINK_EXTRACTOR, LINK_EXTRACTOR_PARITY
+from titles import get_redirects
 
 logging.basicConfig(
     level=logging.INFO,
@@ -18,15 +27,78 @@ class Link:
     url: str
 
 
+def is_useful_href(href: str, base_url: str) -> bool:
+    if not href:
+        return False
+
+    # Reject bad schemes
+    if href.startswith("#") or href.startswith("mailto:") or href.startswith("javascript:"):
+        return False
+
+    # Accept ONLY links inside the target language domain
+    if href.startswith("/wiki/"):
+        return True
+
+    if href.startswith(f"{base_url}/wiki/"):
+        return True
+
+    # Reject cross-language links
+    return False
+
+
+def parse_links(html: str, base_url: str, extractor: str = LINK_EXTRACTOR) -> List[Link]:
+    """Links of a page of the `base_url` wiki; needs no session, so any fetcher can use it."""
+    logger.info("Extracting links...")
+    accept = partial(is_useful_href, base_url=base_url)
+
+    if extractor == "lxml":
+        raw = extract_links_lxml(html, accept)
+        if LINK_EXTRACTOR_PARITY:
+            diffs = parity_diff(raw, extract_links_bs4(html, accept))
+            if diffs:
+                logger.warning(f"Link extractor parity mismatch: {diffs}")
+    else:
+        raw = extract_links_bs4(html, accept, content_only=False)
+
+    links: List[Link] = []
+    for text, href in raw:
+        # Normalize to correct base_url
+        abs_url = href
+        if href.startswith("/wiki/"):
+            abs_url = f"{base_url}{href}"
+
+        links.append(Link(text=text, url=abs_url))
+
+    logger.info(f"Total useful links extracted: {len(links)}")
+    return links
+
+
 class Scrapper:
-    def __init__(self, target_lang: str = "en"):
+    def __init__(
+        self,
+        target_lang: str = "en",
+        page_cache: Optional[PageCache] = None,
+        extractor: str = LINK_EXTRACTOR,
+        cancel: Optional[CancelToken] = None,
+        page_store: Optional[PageStore] = None,
+    ):
         """
         target_lang: Wikipedia language code (en, es, hi, fr, ...)
+        page_cache: response cache to fetch through (defaults to the shared one)
+        extractor: "lxml" (streaming, article links in #mw-content-text only)
+                   or "bs4" (every <a> on the page, the original behaviour)
+        cancel: race token; fetches return as soon as it is set and raise `Cancelled`
+        page_store: parsed pages shared with the other racers (defaults to the shared one)
         """
         self.target_lang = target_lang
+        self.extractor = extractor
+        self.cancel = cancel
+        self.page_cache = page_cache if page_cache is not None else get_page_cache()
+        self.page_store = page_store if page_store is not None else get_page_store()
+        self.redirects = get_redirects(self.target_lang)  # learns from the pages fetched
 
         # Base URL switches depending on language
-        self.base_url = f"https://{self.target_lang}.wikipedia.org"
+        self.base_url = wiki_base_url(self.target_lang)
 
         self.session = requests.Session()
         self.session.headers.update({
@@ -40,56 +112,47 @@ class Scrapper:
     def get_html(self, url: str) -> str:
         logger.info(f"Fetching URL: {url}")
         try:
-            res = self.session.get(url, timeout=10)
+            if self.page_cache is not None:
+                page = self.page_cache.fetch(self.session, url, timeout=10, cancel=self.cancel)
+                if page.status_code != 200:
+                    raise requests.exceptions.HTTPError(f"{page.status_code} Error for url: {url}")
+                logger.info(f"Fetched successfully ({len(page.text)} chars).")
+                self.redirects.learn(wiki_title(url), page.text)
+                return page.text
+
+            if self.cancel is not None:
+                res = cancellable_get(self.session, url, self.cancel, timeout=10)
+            else:
+                res = self.session.get(url, timeout=10)
             res.raise_for_status()
+            metrics.add("bytes_downloaded", len(res.content))
             logger.info(f"Fetched successfully ({len(res.text)} chars).")
+            self.redirects.learn(wiki_title(url), res.text)
             return res.text
         except requests.exceptions.RequestException as e:
             logger.error(f"Error fetching URL {url}: {e}")
             return ""
 
     def _is_useful_href(self, href: str) -> bool:
-        if not href:
-            return False
-
-        # Reject bad schemes
-        if href.startswith("#") or href.startswith("mailto:") or href.startswith("javascript:"):
-            return False
-
-        # Accept ONLY links inside the target language domain
-        if href.startswith("/wiki/"):
-            return True
-
-        if href.startswith(f"https://{self.target_lang}.wikipedia.org/wiki/"):
-            return True
-
-        # Reject cross-language links
-        return False
+        return is_useful_href(href, self.base_url)
 
     def get_links(self, url: str) -> List[Link]:
+        if self.page_store is None:
+            return self._load_links(url)
+        # Racers asking for the same page at once share one fetch and parse
+        return self.page_store.get_links(url, self._load_links, cancel=self.cancel, variant=self.extractor)
+
+    def _load_links(self, url: str) -> List[Link]:
         html = self.get_html(url)
         if not html:
             logger.warning("Empty HTML. No links extracted.")
             return []
 
-        soup = BeautifulSoup(html, "html.parser")
-        links: List[Link] = []
-
-        logger.info("Extracting links...")
-
-        for tag in soup.find_all("a"):
-            href = tag.get("href")
-            if not self._is_useful_href(href):
-                continue
-
-            text = tag.get_text(strip=True) or ""
-
-            # Normalize to correct base_url
-            abs_url = href
-            if href.startswith("/wiki/"):
-                abs_url = f"{self.base_url}{href}"
+        return self.parse_links(html)
 
-            links.append(Link(text=text, url=abs_url))
+    def parse_links(self, html: str) -> List[Link]:
+        with metrics.stage("parse"):
+            return self._parse_links(html)
 
-        logger.info(f"Total useful links extracted: {len(links)}")
-        return links
+    def _parse_links(self, html: str) -> List[Link]:
+        return parse_links(html, self.base_url, self.extractor)
@@ -0,0 +1,100 @@
+import os
+
+# --------------------------------------------------------------------
+# Runtime settings, overridable through environment variables
+# --------------------------------------------------------------------
+CACHE_DIR = os.environ.get(
+    "WIKIGAME_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "wikigame"),
+)
+
+MODEL_NAME = os.environ.get("WIKIGAME_MODEL", "all-MiniLM-L6-v2")
+
+# Encoder backend (encoders.py): "torch" (SentenceTransformer), "onnx"
+# (exported, int8-quantized, ONNX Runtime) or "remote" (the embedding daemon
+# on EMBEDDING_SOCKET). Threads: 0 = the runtime default.
+ENCODER_BACKEND = os.environ.get("WIKIGAME_ENCODER", "torch")
+ENCODER_THREADS = int(os.environ.get("WIKIGAME_ENCODER_THREADS", "0"))
+ONNX_DIR = os.environ.get("WIKIGAME_ONNX_DIR", os.path.join(CACHE_DIR, "onnx"))
+ONNX_QUANTIZE = os.environ.get("WIKIGAME_ONNX_QUANTIZE", "1") != "0"
+EMBEDDING_SOCKET = os.environ.get("WIKIGAME_EMBEDDING_SOCKET", os.path.join(CACHE_DIR, "embed.sock"))
+
+# Embedding cache: rows kept in the in-memory LRU and rows in the on-disk
+# memory-mapped matrix (0 disables the disk tier).
+EMBEDDING_MEMORY_ROWS = int(os.environ.get("WIKIGAME_EMBEDDING_MEMORY_ROWS", "50000"))
+EMBEDDING_DISK_ROWS = int(os.environ.get("WIKIGAME_EMBEDDING_DISK_ROWS", "200000"))
+
+# Cross-thread micro-batching in front of the shared model.
+EMBEDDING_BATCH_SIZE = int(os.environ.get("WIKIGAME_EMBEDDING_BATCH_SIZE", "512"))
+EMBEDDING_BATCH_WAIT_MS = float(os.environ.get("WIKIGAME_EMBEDDING_BATCH_WAIT_MS", "3"))
+
+# HTTP page cache: freshness window before revalidation, and size bounds.
+PAGE_CACHE_ENABLED = os.environ.get("WIKIGAME_PAGE_CACHE", "1") != "0"
+PAGE_CACHE_TTL = float(os.environ.get("WIKIGAME_PAGE_CACHE_TTL", "86400"))
+PAGE_CACHE_MEMORY_MB = int(os.environ.get("WIKIGAME_PAGE_CACHE_MEMORY_MB", "64"))
+PAGE_CACHE_DISK_MB = int(os.environ.get("WIKIGAME_PAGE_CACHE_DISK_MB", "512"))
+
+# Parsed pages shared by all racers of the process, in MB (0 disables it).
+PAGE_STORE_MB = int(os.environ.get("WIKIGAME_PAGE_STORE_MB", "64"))
+
+# Speculative prefetch of the best-scoring candidates (0 disables it).
+PREFETCH_DEPTH = int(os.environ.get("WIKIGAME_PREFETCH_DEPTH", "0"))
+PREFETCH_WORKERS = int(os.environ.get("WIKIGAME_PREFETCH_WORKERS", "4"))
+PREFETCH_BUDGET_MB = int(os.environ.get("WIKIGAME_PREFETCH_BUDGET_MB", "16"))
+
+# Link extraction backend: "lxml" (streaming, #mw-content-text only) or "bs4".
+# With parity on, every lxml result is checked against the bs4 reference.
+LINK_EXTRACTOR = os.environ.get("WIKIGAME_LINK_EXTRACTOR", "lxml")
+LINK_EXTRACTOR_PARITY = os.environ.get("WIKIGAME_LINK_EXTRACTOR_PARITY", "0") == "1"
+
+# Where links come from: "html" (live scraping), "api" (MediaWiki prop=links,
+# batched) or "graph" (local dump-built link graph in WIKIGAME_GRAPH_DIR, see
+# build_link_graph.py).
+LINK_BACKEND = os.environ.get("WIKIGAME_LINK_BACKEND", "html")
+LINK_GRAPH_DIR = os.environ.get("WIKIGAME_GRAPH_DIR", os.path.join(CACHE_DIR, "graph"))
+
+# Beam / best-first racer: frontier size, page fetch budget per race, pages
+# fetched and encoded together per round, and concurrent fetches.
+BEAM_WIDTH = int(os.environ.get("WIKIGAME_BEAM_WIDTH", "32"))
+BEAM_MAX_EXPANSIONS = int(os.environ.get("WIKIGAME_BEAM_MAX_EXPANSIONS", "60"))
+BEAM_BATCH_SIZE = int(os.environ.get("WIKIGAME_BEAM_BATCH_SIZE", "4"))
+BEAM_WORKERS = int(os.environ.get("WIKIGAME_BEAM_WORKERS", "4"))
+
+# Cancellation: wall-clock budget of one race in seconds (0 = unlimited; the
+# best partial path is returned when it runs out) and how many texts are
+# encoded between cancellation checks.
+RACE_DEADLINE = float(os.environ.get("WIKIGAME_RACE_DEADLINE", "120"))
+ENCODE_CHUNK_SIZE = int(os.environ.get("WIKIGAME_ENCODE_CHUNK_SIZE", "128"))
+
+# Language editions probed for a target's summary, in order of preference
+# (all at once; the race runs in the edition that answered).
+SUMMARY_LANGS = os.environ.get("WIKIGAME_SUMMARY_LANGS", "en,simple,es,fr,de,hi,ru,ja").split(",")
+
+# Page-summary embedding index (build_summary_index.py). When present, link
+# scores blend anchor-text similarity with similarity to the linked page's
+# lead paragraph; the weight is the summary share (0 disables it). Resident
+# index pages are dropped once this many MB have been touched.
+SUMMARY_INDEX_DIR = os.environ.get("WIKIGAME_SUMMARY_INDEX_DIR", os.path.join(CACHE_DIR, "summaries"))
+SUMMARY_WEIGHT = float(os.environ.get("WIKIGAME_SUMMARY_WEIGHT", "0.5"))
+SUMMARY_INDEX_RESIDENT_MB = int(os.environ.get("WIKIGAME_SUMMARY_INDEX_RESIDENT_MB", "256"))
+
+# Target neighborhood: pages within this many hops of the target (via
+# backlinks) end the race as soon as a page links to one of them (0 only
+# checks for direct links to the target). Source: "auto" (local graph, else
+# the "what links here" API), "graph", "api" or "off". The API source is
+# capped at NEIGHBORHOOD_API_HOPS: races wait only for the first backlinks,
+# the rest (and hop 2, when allowed) is fetched in the background.
+NEIGHBORHOOD_HOPS = int(os.environ.get("WIKIGAME_NEIGHBORHOOD_HOPS", "2"))
+NEIGHBORHOOD_API_HOPS = int(os.environ.get("WIKIGAME_NEIGHBORHOOD_API_HOPS", "1"))
+NEIGHBORHOOD_SOURCE = os.environ.get("WIKIGAME_NEIGHBORHOOD_SOURCE", "auto")
+NEIGHBORHOOD_MAX_PAGES = int(os.environ.get("WIKIGAME_NEIGHBORHOOD_MAX_PAGES", "20000"))
+
+# Where Wikipedia is served from; "{lang}" becomes the language code. Point
+# it at a local stand-in for load tests (see wiki_server.py), for example
+# http://127.0.0.1:8765/{lang}
+WIKI_BASE_URL = os.environ.get("WIKIGAME_WIKI_BASE_URL", "https://{lang}.wikipedia.org")
+
+# Per-step race metrics (metrics.py): JSONL trace of every step ("" = off)
+# and a port serving them in the Prometheus text format at /metrics (0 = off).
+METRICS_TRACE = os.environ.get("WIKIGAME_METRICS_TRACE", "")
+METRICS_PORT = int(os.environ.get("WIKIGAME_METRICS_PORT", "0"))
@@ -0,0 +1,195 @@
+import hashlib
+import json
+import logging
+import mmap
+import os
+import threading
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from link_graph import title_key
+from settings import MODEL_NAME, SUMMARY_INDEX_DIR, SUMMARY_INDEX_RESIDENT_MB
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+
+# --------------------------------------------------------------------
+# On-disk layout (written by build_summary_index.py)
+#
+#   meta.json               model, dim, dtype ("f16" | "i8"), rows, lang
+#   vectors.f16             rows x dim normalized lead-paragraph embeddings,
+#   vectors.i8 + scales.f32   or int8 with one dequantization scale per row
+#   title_hashes.u64        sorted 64-bit hashes of title_key(title)
+#   title_rows.i32            and the row of each
+#   page_ids.i32            Wikipedia page_id of each row (-1 if unknown)
+#   page_sorted_ids.i32     the same ids sorted, and their rows, for
+#   page_sorted_rows.i32      vectorized page_id / graph node lookups
+# --------------------------------------------------------------------
+
+
+def title_hashes(titles: List[str]) -> np.ndarray:
+    """64-bit hashes of normalized titles; lookups are a searchsorted over these."""
+    return np.array(
+        [int.from_bytes(hashlib.blake2b(title_key(t), digest_size=8).digest(), "little") for t in titles],
+        dtype=np.uint64,
+    )
+
+
+class _MappedArray:
+    """Read-only mmap of a raw array with access hints and a way to drop resident pages."""
+
+    def __init__(self, path: str, dtype, shape=None):
+        self.file = open(path, "rb")
+        size = os.path.getsize(path)
+        self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        if self.mm is not None and hasattr(self.mm, "madvise"):
+            self.mm.madvise(mmap.MADV_RANDOM)  # rows are gathered, never scanned
+        data = np.frombuffer(self.mm, dtype=dtype) if self.mm is not None else np.zeros(0, dtype=dtype)
+        self.array = data.reshape(shape) if shape is not None else data
+
+    def drop_resident(self):
+        if self.mm is not None and hasattr(self.mm, "madvise"):
+            self.mm.madvise(mmap.MADV_DONTNEED)
+
+
+class SummaryIndex:
+    """
+    Lead-paragraph embeddings of many articles, so a link can be scored by
+    where it leads without fetching the page.
+
+    Nothing is mapped until the first lookup. Lookups are vectorized over all
+    links of a page: titles are hashed, found with one searchsorted, and the
+    matching rows gathered and dequantized in one go. Touched pages of the
+    vector file are released after `resident_bytes`, which bounds RSS.
+    """
+
+    def __init__(self, directory: str, resident_bytes: int = SUMMARY_INDEX_RESIDENT_MB * 1024 * 1024):
+        self.directory = directory
+        with open(os.path.join(directory, "meta.json"), "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+
+        self.model = self.meta["model"]
+        self.lang = self.meta.get("lang")
+        self.dim = int(self.meta["dim"])
+        self.dtype = self.meta.get("dtype", "f16")
+        self.rows = int(self.meta["rows"])
+        self.resident_bytes = resident_bytes
+
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._touched = 0
+
+    def _load(self):
+        with self._lock:
+            if self._loaded:
+                return
+            d = self.directory
+            if self.dtype == "i8":
+                self._vectors = _MappedArray(os.path.join(d, "vectors.i8"), np.int8, (self.rows, self.dim))
+                self._scales = _MappedArray(os.path.join(d, "scales.f32"), np.float32).array
+            else:
+                self._vectors = _MappedArray(os.path.join(d, "vectors.f16"), np.float16, (self.rows, self.dim))
+                self._scales = None
+
+            self._title_hashes = _MappedArray(os.path.join(d, "title_hashes.u64"), np.uint64).array
+            self._title_rows = _MappedArray(os.path.join(d, "title_rows.i32"), np.int32).array
+            self._page_ids = _MappedArray(os.path.join(d, "page_sorted_ids.i32"), np.int32).array
+            self._page_rows = _MappedArray(os.path.join(d, "page_sorted_rows.i32"), np.int32).array
+            self._loaded = True
+            logger.info(f"Mapped summary index {d}: {self.rows} pages, {self.dim}-d {self.dtype}")
+
+    @staticmethod
+    def _find(sorted_keys: np.ndarray, rows: np.ndarray, keys: np.ndarray) -> np.ndarray:
+        if not len(sorted_keys):
+            return np.full(len(keys), -1, dtype=np.int64)
+        pos = np.minimum(np.searchsorted(sorted_keys, keys), len(sorted_keys) - 1)
+        hit = sorted_keys[pos] == keys
+        return np.where(hit, rows[pos], -1).astype(np.int64)
+
+    def rows_for_titles(self, titles: List[str]) -> np.ndarray:
+        """Row of each title, -1 where the index has no summary."""
+        self._load()
+        return self._find(self._title_hashes, self._title_rows, title_hashes(titles))
+
+    def rows_for_page_ids(self, page_ids: np.ndarray) -> np.ndarray:
+        self._load()
+        return self._find(self._page_ids, self._page_rows, np.asarray(page_ids, dtype=np.int32))
+
+    def vectors(self, rows: np.ndarray) -> np.ndarray:
+        """float32 embeddings of `rows` (all must be valid)."""
+        self._load()
+        rows = np.asarray(rows, dtype=np.int64)
+        order = np.argsort(rows)  # gather in file order
+        out = np.empty((len(rows), self.dim), dtype=np.float32)
+        out[order] = self._vectors.array[rows[order]]
+        if self._scales is not None:
+            out *= self._scales[rows][:, None]
+
+        self._touched += len(rows) * self._vectors.array.itemsize * self.dim
+        if self._touched > self.resident_bytes:
+            self._vectors.drop_resident()
+            self._touched = 0
+        return out
+
+    def similarity(self, titles: List[str], query_emb: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(similarity of each title's summary to `query_emb`, mask of titles found)."""
+        rows = self.rows_for_titles(titles)
+        found = rows >= 0
+        sims = np.zeros(len(titles), dtype=np.float32)
+        if found.any():
+            sims[found] = self.vectors(rows[found]) @ np.asarray(query_emb, dtype=np.float32).reshape(-1)
+        return sims, found
+
+
+def blend_scores(index: Optional[SummaryIndex], titles: List[str], query_emb: np.ndarray,
+                 scores: np.ndarray, weight: float) -> np.ndarray:
+    """Mix anchor-text scores with summary scores where the index knows the page."""
+    if index is None or weight <= 0 or not len(titles):
+        return scores
+    sims, found = index.similarity(titles, query_emb)
+    scores = np.asarray(scores, dtype=np.float32).copy()
+    scores[found] = (1 - weight) * scores[found] + weight * sims[found]
+    return scores
+
+
+_index = None
+_index_checked = False
+_lang_warned = set()
+_index_lock = threading.Lock()
+
+
+def get_summary_index(lang: str = "en") -> Optional[SummaryIndex]:
+    """
+    Process-wide index from SUMMARY_INDEX_DIR, or None if absent, built with
+    another model, or built from another edition than `lang` (the race language).
+    """
+    global _index, _index_checked
+    with _index_lock:
+        if not _index_checked:
+            _index_checked = True
+            if os.path.exists(os.path.join(SUMMARY_INDEX_DIR, "meta.json")):
+                index = SummaryIndex(SUMMARY_INDEX_DIR)
+                if index.model != MODEL_NAME:
+                    logger.warning(
+                        f"Summary index {SUMMARY_INDEX_DIR} was built with {index.model}, "
+                        f"not {MODEL_NAME}. Ignoring it."
+                    )
+                else:
+                    _index = index
+        if _index is None:
+            return None
+        if _index.lang != lang:
+            # Titles of another edition would match the wrong pages, or none
+            if lang not in _lang_warned:
+                _lang_warned.add(lang)
+                logger.warning(
+                    f"Summary index {SUMMARY_INDEX_DIR} holds {_index.lang} pages; "
+                    f"not using it for a {lang} race."
+                )
+            return None
+        return _index
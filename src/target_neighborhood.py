@@ -0,0 +1,346 @@
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import quote, urlencode, urlparse
+
+import numpy as np
+
+from cancellation import Cancelled, CancelToken, cancellable_get
+from http_session import create_session, wiki_base_url, wiki_title
+from link_graph import title_key
+from page_cache import get_page_cache
+from settings import (
+    LINK_GRAPH_DIR, NEIGHBORHOOD_API_HOPS, NEIGHBORHOOD_HOPS, NEIGHBORHOOD_MAX_PAGES, NEIGHBORHOOD_SOURCE,
+)
+from summary_index import title_hashes
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+
+def _sorted_lookup(sorted_keys: np.ndarray, keys: np.ndarray) -> np.ndarray:
+    """Position of each key in `sorted_keys`, -1 where absent."""
+    if not len(sorted_keys) or not len(keys):
+        return np.full(len(keys), -1, dtype=np.int64)
+    pos = np.minimum(np.searchsorted(sorted_keys, keys), len(sorted_keys) - 1)
+    return np.where(sorted_keys[pos] == keys, pos, -1)
+
+
+class _Keys(NamedTuple):
+    target: np.ndarray      # the target and its redirects
+    hop1_titles: List[str]
+    hop1: np.ndarray        # sorted
+    hop2: np.ndarray        # sorted
+    hop2_via: np.ndarray    # index into hop1_titles, aligned with hop2
+
+
+class TargetNeighborhood:
+    """
+    Pages that link to the target (hop 1) and pages that link to those
+    (hop 2), held as sorted key arrays. `find` checks a page's whole link list
+    with one vectorized search; on a hit the rest of the path is known, so the
+    race can finish without scoring another step.
+
+    Keys are 64-bit hashes of normalized titles, so the same check works for
+    live pages and the local graph.
+    """
+
+    def __init__(self, target_title: str, aliases: List[str] = (),
+                 hop1: List[str] = (), hop2: List[Tuple[str, int]] = ()):
+        """
+        aliases: titles that land on the target (redirects)
+        hop1:    titles linking to the target
+        hop2:    (title, index into hop1 of the page it links to)
+        """
+        self.target_title = target_title.replace("_", " ")
+        self._keys = self._index(target_title, aliases, hop1, hop2)
+        self.complete = True  # False while a background build is still extending it
+
+    @staticmethod
+    def _index(target_title, aliases, hop1, hop2) -> "_Keys":
+        keys = title_hashes([t for t, _ in hop2])
+        via = np.array([v for _, v in hop2], dtype=np.int32)
+        order = np.argsort(keys, kind="stable")
+        return _Keys(
+            np.unique(title_hashes([target_title, *aliases])),
+            list(hop1),
+            np.sort(title_hashes(list(hop1))),
+            keys[order],
+            via[order],
+        )
+
+    def update(self, other: "TargetNeighborhood"):
+        """Take over the pages of a larger neighborhood of the same target (one atomic swap)."""
+        self._keys = other._keys
+        self.complete = True
+
+    def __len__(self) -> int:
+        keys = self._keys
+        return len(keys.hop1) + len(keys.hop2)
+
+    def is_target(self, title: str) -> bool:
+        """`title` is the target or one of its redirects."""
+        return bool(np.isin(title_hashes([title]), self._keys.target)[0])
+
+    def find(self, links) -> Optional[List[Tuple[str, str]]]:
+        """
+        Shortest known completion through one of `links`, as (title, url)
+        pages ending at the target; None if no link is within reach.
+        """
+        if not links:
+            return None
+        known = self._keys  # one snapshot, in case a background build swaps it
+        keys = title_hashes([wiki_title(link.url) for link in links])
+
+        hit = np.flatnonzero(np.isin(keys, known.target))
+        if len(hit):
+            return [self._page(self.target_title, links[hit[0]].url)]
+
+        pos = _sorted_lookup(known.hop1, keys)
+        hit = np.flatnonzero(pos >= 0)
+        if len(hit):
+            link = links[hit[0]]
+            return [self._page(None, link.url), self._page(self.target_title, link.url)]
+
+        pos = _sorted_lookup(known.hop2, keys)
+        hit = np.flatnonzero(pos >= 0)
+        if len(hit):
+            link = links[hit[0]]
+            via = known.hop1_titles[known.hop2_via[pos[hit[0]]]]
+            return [
+                self._page(None, link.url),
+                self._page(via, link.url),
+                self._page(self.target_title, link.url),
+            ]
+        return None
+
+    @staticmethod
+    def _page(title: Optional[str], like_url: str) -> Tuple[str, str]:
+        """(title, url) on the same site as `like_url`; title None keeps `like_url` itself."""
+        if title is None:
+            return wiki_title(like_url).replace("_", " "), like_url
+        parsed = urlparse(like_url)
+        prefix = parsed.path.split("/wiki/", 1)[0]  # a site under a path prefix keeps it
+        path = f"{prefix}/wiki/" + quote(title.replace(" ", "_"), safe=":/()!,*;@$-._~")
+        return title.replace("_", " "), parsed._replace(path=path, query="", fragment="").geturl()
+
+
+def graph_neighborhood(graph, target: int, hops: int = 2, max_pages: int = NEIGHBORHOOD_MAX_PAGES) -> TargetNeighborhood:
+    """Reverse neighborhood from the local link graph, including redirects to the target."""
+    aliases = [
+        graph.redirects[i].decode("utf-8")
+        for i in np.flatnonzero(np.asarray(graph.redirect_targets) == target)
+    ]
+
+    hop1 = np.zeros(0, dtype=np.int64)
+    if hops >= 1:
+        hop1 = np.unique(np.asarray(graph.in_neighbors(target), dtype=np.int64))
+        hop1 = hop1[hop1 != target][:max_pages]
+
+    hop2, via = np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    if hops >= 2 and len(hop1):
+        starts, ends = graph.rev_offsets[hop1], graph.rev_offsets[hop1 + 1]
+        degrees = ends - starts
+        total = int(degrees.sum())
+        # Bound the work for very popular targets; hop 1 still applies
+        if total <= max_pages * 20:
+            idx = np.arange(total) + np.repeat(starts - (np.cumsum(degrees) - degrees), degrees)
+            nodes = np.asarray(graph.rev_targets[idx], dtype=np.int64)
+            parents = np.repeat(np.arange(len(hop1)), degrees)
+            keep = ~np.isin(nodes, hop1) & (nodes != target)
+            hop2, first = np.unique(nodes[keep], return_index=True)
+            hop2, via = hop2[:max_pages], parents[keep][first][:max_pages]
+        else:
+            logger.info(f"Target has {total} second-hop links; using hop 1 only.")
+
+    return TargetNeighborhood(
+        graph.title(target),
+        aliases,
+        [graph.title(int(n)) for n in hop1],
+        [(graph.title(int(n)), int(v)) for n, v in zip(hop2, via)],
+    )
+
+
+# --------------------------------------------------------------------
+# "What links here" from the MediaWiki API (responses go through the page cache)
+# --------------------------------------------------------------------
+_API_BATCH = 50  # titles per prop=linkshere request
+_API_SYNC_REQUESTS = 2  # backlinks requests a race start waits for; the rest is fetched in the background
+
+
+def _api_get(session, api_url: str, params: dict, cancel: Optional[CancelToken] = None) -> dict:
+    url = f"{api_url}?{urlencode(params)}"
+    cache = get_page_cache()
+    if cache is not None:
+        res = cache.fetch(session, url, timeout=10, cancel=cancel)
+    elif cancel is not None:
+        res = cancellable_get(session, url, cancel, timeout=10)
+    else:
+        res = session.get(url, timeout=10)
+    if res.status_code != 200:
+        raise RuntimeError(f"{res.status_code} from {url}")
+    return json.loads(res.text)
+
+
+def _api_pages(session, api_url: str, params: dict, max_requests: int, cancel: Optional[CancelToken] = None):
+    """Yield each response of a continued query; raises `Cancelled` between requests once `cancel` is set."""
+    params = dict(params, action="query", format="json", formatversion="2")
+    for _ in range(max_requests):
+        if cancel is not None:
+            cancel.check()
+        data = _api_get(session, api_url, params, cancel)
+        yield data
+        if "continue" not in data:
+            return
+        params.update(data["continue"])
+
+
+def fetch_neighborhood(target_title: str, lang: str, hops: int = 2,
+                       max_pages: int = NEIGHBORHOOD_MAX_PAGES, base_url: Optional[str] = None,
+                       cancel: Optional[CancelToken] = None) -> TargetNeighborhood:
+    session = create_session()
+    api_url = f"{base_url or wiki_base_url(lang)}/w/api.php"
+    max_requests = max(1, max_pages // 500)
+
+    aliases, hop1 = [], []
+    if hops >= 1:
+        params = {
+            "list": "backlinks", "bltitle": target_title.replace("_", " "),
+            "blnamespace": 0, "bllimit": "max", "blredirect": 1,
+        }
+        for data in _api_pages(session, api_url, params, max_requests, cancel):
+            for item in data.get("query", {}).get("backlinks", []):
+                if item.get("redirect"):
+                    aliases.append(item["title"])  # a link to a redirect lands on the target
+                else:
+                    hop1.append(item["title"])
+                # pages reaching the target through one of its redirects
+                hop1.extend(r["title"] for r in item.get("redirlinks", []))
+            if len(hop1) >= max_pages:
+                break
+
+    hop1 = list(dict.fromkeys(hop1))[:max_pages]
+    index = {title_key(t): i for i, t in enumerate(hop1)}
+
+    hop2: List[Tuple[str, int]] = []
+    seen = set(index) | {title_key(target_title)}
+    if hops >= 2:
+        requests_left = max_requests
+        for start in range(0, len(hop1), _API_BATCH):
+            if requests_left <= 0 or len(hop2) >= max_pages:
+                break
+            params = {
+                "prop": "linkshere", "titles": "|".join(hop1[start:start + _API_BATCH]),
+                "lhnamespace": 0, "lhlimit": "max", "lhprop": "title",
+            }
+            for data in _api_pages(session, api_url, params, requests_left, cancel):
+                requests_left -= 1
+                for page in data.get("query", {}).get("pages", []):
+                    via = index.get(title_key(page.get("title", "")))
+                    if via is None:
+                        continue
+                    for item in page.get("linkshere", []):
+                        key = title_key(item["title"])
+                        if key not in seen:
+                            seen.add(key)
+                            hop2.append((item["title"], via))
+
+    logger.info(
+        f"Neighborhood of '{target_title}' ({lang}): {len(aliases)} redirects, "
+        f"{len(hop1)} pages at 1 hop, {len(hop2)} at 2 hops"
+    )
+    return TargetNeighborhood(target_title, aliases, hop1, hop2[:max_pages])
+
+
+# --------------------------------------------------------------------
+# Process-wide neighborhoods: racers chasing the same target share one
+# --------------------------------------------------------------------
+_neighborhoods: "OrderedDict[tuple, TargetNeighborhood]" = OrderedDict()
+_building: Dict[tuple, threading.Lock] = {}
+_lock = threading.Lock()
+_MAX_CACHED = 16
+
+
+def _extend(hood: TargetNeighborhood, target_title: str, lang: str, hops: int):
+    """Background part of an API build: all of hop 1 and, when asked for, hop 2."""
+    try:
+        hood.update(fetch_neighborhood(target_title, lang, hops))
+        logger.info(f"Neighborhood of '{target_title}' extended in the background ({len(hood)} pages)")
+    except Exception as e:
+        logger.warning(f"Could not extend the neighborhood of '{target_title}': {e}")
+
+
+def _build(target_title: str, lang: str, hops: int, source: str,
+           cancel: Optional[CancelToken] = None) -> TargetNeighborhood:
+    if hops > 0 and source in ("auto", "graph") and os.path.exists(os.path.join(LINK_GRAPH_DIR, "meta.json")):
+        from link_graph import load_link_graph
+
+        graph = load_link_graph(LINK_GRAPH_DIR)
+        node = graph.node_id(target_title) if graph.lang == lang else None
+        if node is not None and graph.has_reverse:
+            return graph_neighborhood(graph, node, hops)
+
+    if hops > 0 and source in ("auto", "api"):
+        hops = min(hops, NEIGHBORHOOD_API_HOPS)
+        sync_pages = _API_SYNC_REQUESTS * 500
+        try:
+            # The race waits for the first pages of direct backlinks only
+            hood = fetch_neighborhood(target_title, lang, 1, max_pages=sync_pages, cancel=cancel)
+        except Cancelled:
+            raise
+        except Exception as e:
+            logger.warning(f"Could not fetch backlinks of '{target_title}': {e}")
+        else:
+            if hops >= 2 or len(hood) >= sync_pages:
+                hood.complete = False
+                threading.Thread(
+                    target=_extend, args=(hood, target_title, lang, hops), name="neighborhood", daemon=True,
+                ).start()
+            return hood
+
+    # Direct links to the target are still caught
+    return TargetNeighborhood(target_title)
+
+
+def get_target_neighborhood(target_title: str, lang: str = "en", hops: int = NEIGHBORHOOD_HOPS,
+                            source: str = NEIGHBORHOOD_SOURCE,
+                            cancel: Optional[CancelToken] = None) -> TargetNeighborhood:
+    """
+    Neighborhood of `target_title`, built once per process (single flight).
+    Once `cancel` is set, waiting or building stops and a neighborhood with
+    only the target is returned (and not kept).
+    """
+    key = (lang, title_key(target_title), hops, source)
+    with _lock:
+        if key in _neighborhoods:
+            _neighborhoods.move_to_end(key)
+            return _neighborhoods[key]
+        build_lock = _building.setdefault(key, threading.Lock())
+
+    while not build_lock.acquire(timeout=0.05):
+        if cancel is not None and cancel.is_set():
+            return TargetNeighborhood(target_title)
+    try:
+        with _lock:
+            if key in _neighborhoods:
+                return _neighborhoods[key]
+
+        try:
+            hood = _build(target_title, lang, hops if source != "off" else 0, source, cancel)
+        except Cancelled:
+            return TargetNeighborhood(target_title)  # the next racer to ask builds it
+
+        with _lock:
+            _neighborhoods[key] = hood
+            _building.pop(key, None)
+            while len(_neighborhoods) > _MAX_CACHED:
+                _neighborhoods.popitem(last=False)
+        return hood
+    finally:
+        build_lock.release()
@@ -0,0 +1,151 @@
+"""
+Title normalization and redirect resolution.
+
+The same article shows up as "United_States", "United%20States",
+"united States" and, through redirects, as "USA" or "United States of
+America". A RedirectMap resolves any of them to the article's canonical
+title, so races stop on the real target and links to one article through
+different redirects count as one candidate.
+
+Redirects come from
+    - the local link graph of the language, when built (dump redirects)
+    - a TSV file per language under CACHE_DIR/redirects, appended to as
+      fetched pages reveal redirects (their <link rel="canonical">)
+The engine also accepts the target's aliases known to its neighborhood.
+"""
+import logging
+import os
+import re
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+from urllib.parse import unquote
+
+from settings import CACHE_DIR, LINK_GRAPH_DIR
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+CANONICAL_LINK = re.compile(r'<link rel="canonical" href="[^"]*?/wiki/([^"#?]+)"')
+HEAD_BYTES = 64 * 1024  # the canonical link sits in <head>
+MAX_HOPS = 3            # double redirects exist; loops must not hang a race
+MAX_MEMO = 200_000      # resolved page keys remembered per language
+
+
+def normalize_title(title: str) -> str:
+    """Display form: percent-decoded, spaces, single-spaced, first letter upper-cased."""
+    title = " ".join(unquote(title).replace("_", " ").split())
+    return title[:1].upper() + title[1:]
+
+
+def title_key(title: str) -> bytes:
+    """Dump form of a title: percent-decoded, underscores, first letter upper-cased."""
+    title = unquote(title).strip().replace(" ", "_")
+    return (title[:1].upper() + title[1:]).encode("utf-8")
+
+
+def canonical_title(html: str) -> Optional[str]:
+    """Title a fetched page declares for itself, if it says."""
+    m = CANONICAL_LINK.search(html, 0, HEAD_BYTES)
+    return normalize_title(m.group(1)) if m else None
+
+
+class RedirectMap:
+    """Known redirects of one language edition: normalized title -> normalized target title."""
+
+    def __init__(self, lang: str, path: Optional[str] = None, graph=None):
+        self.lang = lang
+        self.path = path
+        self.graph = graph if graph is not None and graph.lang == lang else None
+        self._redirects: Dict[str, str] = {}
+        self._keys: Dict[str, bytes] = {}  # title -> page key; cleared when redirects change
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            self.load(path)
+
+    def __len__(self) -> int:
+        return len(self._redirects)
+
+    def load(self, path: str):
+        """Read `source<TAB>target` lines (also the format of a redirect dump converted to TSV)."""
+        with open(path, "r", encoding="utf-8") as f:
+            pairs = [line.rstrip("\n").split("\t", 1) for line in f if "\t" in line]
+        self.add_many(pairs, persist=False)
+        logger.info(f"Loaded {len(pairs)} redirects ({self.lang}) from {path}")
+
+    def add(self, source: str, target: str):
+        self.add_many([(source, target)])
+
+    def add_many(self, pairs: Iterable[Tuple[str, str]], persist: bool = True):
+        new = []
+        with self._lock:
+            for source, target in pairs:
+                source, target = normalize_title(source), normalize_title(target)
+                if source and target and source != target and self._redirects.get(source) != target:
+                    self._redirects[source] = target
+                    new.append((source, target))
+            if new:
+                self._keys = {}
+            if new and persist and self.path:
+                try:
+                    os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                    with open(self.path, "a", encoding="utf-8") as f:
+                        f.writelines(f"{s}\t{t}\n" for s, t in new)
+                except OSError as e:
+                    logger.warning(f"Could not save redirects: {e}")
+
+    def learn(self, url_title: str, html: str):
+        """Record a redirect when the page fetched for `url_title` declares another title."""
+        declared = canonical_title(html) if html else None
+        if declared and declared != normalize_title(url_title):
+            self.add(url_title, declared)
+
+    def resolve(self, title: str) -> str:
+        """Canonical title of the page `title` lands on (itself when no redirect is known)."""
+        title = normalize_title(title)
+        for _ in range(MAX_HOPS):
+            target = self._redirects.get(title)
+            if target is None:
+                break
+            title = target
+        if self.graph is not None and len(self.graph.redirects):
+            r = self.graph.redirects.find(title_key(title))
+            if r is not None:
+                return self.graph.title(int(self.graph.redirect_targets[r]))
+        return title
+
+    def key(self, title: str) -> bytes:
+        """Page id: the dump-form key of the resolved title."""
+        key = self._keys.get(title)
+        if key is None:
+            key = title_key(self.resolve(title))
+            if len(self._keys) >= MAX_MEMO:
+                self._keys = {}
+            self._keys[title] = key
+        return key
+
+    def same_page(self, a: str, b: str) -> bool:
+        ra, rb = self.resolve(a), self.resolve(b)
+        # Titles used to be compared case-insensitively; keep accepting that
+        return ra == rb or ra.lower() == rb.lower()
+
+
+_maps: Dict[str, RedirectMap] = {}
+_maps_lock = threading.Lock()
+
+
+def get_redirects(lang: str = "en") -> RedirectMap:
+    """Process-wide RedirectMap of a language, with the local graph and saved redirects loaded."""
+    with _maps_lock:
+        if lang not in _maps:
+            graph = None
+            if os.path.exists(os.path.join(LINK_GRAPH_DIR, "meta.json")):
+                from link_graph import load_link_graph
+                try:
+                    graph = load_link_graph(LINK_GRAPH_DIR)
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Link graph not usable for redirects: {e}")
+            _maps[lang] = RedirectMap(lang, os.path.join(CACHE_DIR, "redirects", f"{lang}.tsv"), graph)
+        return _maps[lang]
@@ -0,0 +1,530 @@
+"""
+Local stand-in for Wikipedia, for load tests that would be throttled live.
+
+Articles are rendered as MediaWiki-shaped HTML (chrome outside
+#mw-content-text, lead paragraph, infobox, sections, navbox, reference and
+namespace links, redirects) from a link graph: one built from the dumps by
+build_link_graph.py, or a generated topical wiki of any size. A small
+/w/api.php answers the backlinks / linkshere / links queries the racers use.
+
+    # generate a 2M-page wiki once, then serve it with realistic faults
+    python src/wiki_server.py --graph /tmp/wiki2m --synthetic-nodes 2000000 \\
+        --latency-ms 40 --latency-sigma 0.6 --error-rate 0.01 --throttle-rate 0.02
+
+    # point the engine, fetch_wikipedia_summary and both apps at it
+    WIKIGAME_WIKI_BASE_URL='http://127.0.0.1:8765/{lang}' python src/main.py
+
+Language editions are served under a path prefix (/en/wiki/...) or a Host
+subdomain (en.localhost). The first --langs edition has every page; the
+others have a --lang-coverage share of them, so language probing sees 404s.
+GET /_stats returns request counts by status and served latency percentiles.
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional, Tuple
+from urllib.parse import parse_qs, quote, unquote, urlparse
+
+import numpy as np
+
+from link_graph import LinkGraph, title_key
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+
+# --------------------------------------------------------------------
+# Synthetic topical wiki: areas > topics > pages. Titles share area and
+# topic words and most links stay inside a topic or an area, so anchor-text
+# similarity carries real signal towards a target.
+# --------------------------------------------------------------------
+SYLLABLES = ["ka", "lo", "mi", "ne", "su", "ta", "ri", "vo", "pe", "zu", "ba", "do", "fi", "gu", "ha", "jo"]
+
+
+def _word(n: int, length: int) -> str:
+    parts = []
+    for _ in range(length):
+        n, r = divmod(n, len(SYLLABLES))
+        parts.append(SYLLABLES[r])
+    return "".join(parts).capitalize()
+
+
+def synthetic_graph(directory: str, nodes: int, avg_degree: int, seed: int = 0, redirect_share: float = 0.05):
+    """Writes a topical link graph with redirects to `directory`."""
+    from build_link_graph import csr_from_edges, write_graph
+
+    rng = np.random.default_rng(seed)
+    topics = max(nodes // 50, 1)
+    areas = max(topics // 8, 1)
+    topic_of = np.arange(nodes) % topics
+    area_of = topic_of % areas
+    page_len = max(4, int(np.ceil(np.log(nodes) / np.log(len(SYLLABLES)))))
+
+    area_words = [_word(a + 97, 2) for a in range(areas)]
+    topic_words = [_word(t + 1009, 2) for t in range(topics)]
+    page_words = [_word(i, page_len) for i in range(nodes)]
+    names = [f"{area_words[area_of[i]]} {topic_words[topic_of[i]]} {page_words[i]}" for i in range(nodes)]
+
+    # 55% of links inside the topic, 25% inside the area, 20% anywhere
+    edges = nodes * avg_degree
+    src = rng.integers(0, nodes, edges)
+    kind = rng.random(edges)
+    dst = rng.integers(0, nodes, edges)
+    same_topic = kind < 0.55
+    dst[same_topic] = topic_of[src[same_topic]] + topics * rng.integers(0, nodes // topics, int(same_topic.sum()))
+    same_area = (kind >= 0.55) & (kind < 0.80)
+    dst[same_area] = (
+        area_of[src[same_area]] + areas * rng.integers(0, topics // areas, int(same_area.sum()))
+        + topics * rng.integers(0, nodes // topics, int(same_area.sum()))
+    )
+    dst = np.minimum(dst, nodes - 1)
+
+    # Node ids are ranks of the titles in dump order
+    keys = [title_key(n) for n in names]
+    order = np.argsort(np.array(keys, dtype=object), kind="stable")
+    rank = np.empty(nodes, dtype=np.int64)
+    rank[order] = np.arange(nodes)
+    offsets, targets = csr_from_edges(nodes, rank[src], rank[dst])
+
+    # "<Page> (<topic>)" redirects to some pages
+    redirects = {
+        title_key(f"{page_words[i]} ({topic_words[topic_of[i]]})"): int(rank[i])
+        for i in np.flatnonzero(rng.random(nodes) < redirect_share)
+    }
+    write_graph(directory, "en", [keys[i] for i in order], np.arange(nodes), offsets, targets,
+                redirects=redirects, source="synthetic")
+
+
+def lead_text(title: str) -> str:
+    """Deterministic lead paragraph; for synthetic titles it names the topic and area."""
+    words = title.split()
+    topic = words[-2] if len(words) > 1 else title
+    return (
+        f"{title} is a page about {topic} in the field of {words[0]}, "
+        f"served by the local test wiki for navigation load tests."
+    )
+
+
+def render_article(title: str, lead: str, links: List[Tuple[str, str]], redirected_from: Optional[str] = None) -> str:
+    """
+    MediaWiki-shaped article. `links` are (anchor text, target title); chrome
+    links sit outside #mw-content-text, namespace links and references inside.
+    """
+    def a(text, target):
+        return f'<a href="/wiki/{quote(target.replace(" ", "_"))}" title="{escape(target)}">{escape(text)}</a>'
+
+    path = quote(title.replace(" ", "_"))
+    infobox, inline, rest = links[:2], links[2:5], links[5:]
+    half = len(rest) * 2 // 3
+    body, navbox = rest[:half], rest[half:]
+    sections = [body[i:i + 12] for i in range(0, len(body), 12)]
+    redirect_note = (
+        f'<span class="mw-redirectedfrom">(Redirected from <a href="/w/index.php?title='
+        f'{quote(redirected_from.replace(" ", "_"))}&amp;redirect=no">{escape(redirected_from)}</a>)</span>'
+        if redirected_from else ""
+    )
+    return "".join([
+        f"<!DOCTYPE html><html><head><title>{escape(title)} - Wikipedia</title>",
+        f'<link rel="canonical" href="/wiki/{path}"></head><body>',
+        '<div id="mw-navigation"><a href="/wiki/Main_Page">Main page</a>',
+        '<a href="/wiki/Special:Random">Random article</a><a href="/wiki/Help:Contents">Help</a></div>',
+        f'<h1 id="firstHeading">{escape(title)}</h1>',
+        f'<div id="siteSub">From Wikipedia, the free encyclopedia</div>{redirect_note}',
+        '<div id="mw-content-text" class="mw-body-content"><div class="mw-parser-output">',
+        '<table class="infobox"><tbody>',
+        "".join(f"<tr><th>Related</th><td>{a(t, h)}</td></tr>" for t, h in infobox),
+        f'<tr><td><a href="/wiki/File:{path}.jpg" class="mw-file-description">image</a></td></tr>',
+        "</tbody></table>",
+        f'<p>{escape(lead)} See also {", ".join(a(t, h) for t, h in inline)}.'
+        '<sup class="reference"><a href="#cite_note-1">[1]</a></sup></p>',
+        "".join(
+            f'<h2><span class="mw-headline">Section {i + 1}</span></h2>'
+            f'<p>{" ".join(a(t, h) for t, h in section)}</p>'
+            for i, section in enumerate(sections)
+        ),
+        '<h2><span class="mw-headline">References</span></h2><ol class="references">',
+        f'<li id="cite_note-1"><a rel="nofollow" class="external text" href="https://example.org/{path}">Source</a></li></ol>',
+        '<div class="navbox"><a href="/wiki/Template:Navbox" title="Template:Navbox">v</a>',
+        " · ".join(a(t, h) for t, h in navbox),
+        "</div>",
+        f'<div id="catlinks"><a href="/wiki/Category:{quote(title.split()[0])}">{escape(title.split()[0])}</a></div>',
+        "</div></div></body></html>",
+    ])
+
+
+# --------------------------------------------------------------------
+# The site: pages and API answers for each language edition
+# --------------------------------------------------------------------
+class WikiSite:
+    def __init__(self, graph: LinkGraph, langs: List[str], coverage: float = 0.5):
+        self.graph = graph
+        self.langs = langs
+        self.coverage = coverage
+        self.built = graph.meta.get("built_at", "")
+
+        # Redirects grouped by target, so pages can link through them like
+        # real articles do
+        redirect_targets = np.asarray(graph.redirect_targets, dtype=np.int64)
+        self._redirect_order = np.argsort(redirect_targets, kind="stable")
+        self._redirect_sorted = redirect_targets[self._redirect_order]
+
+    def present(self, lang: str, nodes: np.ndarray) -> np.ndarray:
+        """Which nodes exist in `lang`: all in the first edition, a fixed share elsewhere."""
+        nodes = np.asarray(nodes, dtype=np.uint64)
+        if lang == self.langs[0]:
+            return np.ones(len(nodes), dtype=bool)
+        salt = np.uint64(self.langs.index(lang) * 0x9E3779B1)
+        mixed = (nodes * np.uint64(2654435761) + salt) % np.uint64(1 << 32)
+        return mixed < np.uint64(self.coverage * (1 << 32))
+
+    def _alias(self, node: int) -> Optional[str]:
+        pos = int(np.searchsorted(self._redirect_sorted, node))
+        if pos < len(self._redirect_sorted) and self._redirect_sorted[pos] == node:
+            return self.graph.redirects[int(self._redirect_order[pos])].decode("utf-8").replace("_", " ")
+        return None
+
+    def resolve(self, lang: str, title: str) -> Tuple[Optional[int], bool]:
+        """(node, reached through a redirect); node None if the page does not exist in `lang`."""
+        node = self.graph.node_id(title, follow_redirects=False)
+        redirected = False
+        if node is None:
+            node = self.graph.node_id(title)
+            redirected = node is not None
+        if node is None or not self.present(lang, np.array([node]))[0]:
+            return None, False
+        return node, redirected
+
+    def etag(self, lang: str, node: int) -> str:
+        return f'"{lang}-{node:x}-{self.built}"'
+
+    def page(self, lang: str, title: str) -> Tuple[int, str, Optional[int]]:
+        """(status, html, node)."""
+        node, redirected = self.resolve(lang, title)
+        if node is None:
+            return 404, f"<html><body><p>Wikipedia does not have an article with this exact name: {escape(title)}</p></body></html>", None
+
+        neighbors = np.asarray(self.graph.neighbors(node), dtype=np.int64)
+        neighbors = neighbors[self.present(lang, neighbors)]
+        links = []
+        for i, n in enumerate(neighbors.tolist()):
+            target = self.graph.title(n)
+            # Every third link with a redirect goes through it, like real articles
+            alias = self._alias(n) if i % 3 == 0 else None
+            links.append((target, alias or target))
+
+        page_title = self.graph.title(node)
+        html = render_article(
+            page_title, lead_text(page_title), links,
+            redirected_from=unquote(title).replace("_", " ") if redirected else None,
+        )
+        return 200, html, node
+
+    # ----------------------------------------------------------------
+    # /w/api.php (action=query, formatversion=2)
+    # ----------------------------------------------------------------
+    @staticmethod
+    def _limit(value: Optional[str]) -> int:
+        return 500 if value in (None, "max") else max(1, min(int(value), 500))
+
+    def _titles(self, lang: str, nodes) -> List[dict]:
+        nodes = np.asarray(nodes, dtype=np.int64)
+        nodes = nodes[self.present(lang, nodes)]
+        return [{"ns": 0, "title": self.graph.title(int(n))} for n in nodes]
+
+    @staticmethod
+    def _pages_query(pages: List[dict], redirects: List[dict], params: dict) -> dict:
+        # Like MediaWiki, redirects=1 lists the redirects followed for the requested titles
+        if params.get("redirects") and redirects:
+            return {"redirects": redirects, "pages": pages}
+        return {"pages": pages}
+
+    def api(self, lang: str, params: dict) -> dict:
+        if params.get("action") != "query":
+            return {"error": {"code": "badvalue", "info": "only action=query is supported"}}
+
+        if params.get("list") == "backlinks":
+            node, _ = self.resolve(lang, params.get("bltitle", ""))
+            if node is None:
+                return {"query": {"backlinks": []}}
+            items = self._titles(lang, self.graph.in_neighbors(node))
+            if params.get("blredirect"):
+                aliases = self._redirect_order[self._redirect_sorted == node]
+                items = [
+                    {"ns": 0, "title": self.graph.redirects[int(r)].decode("utf-8").replace("_", " "),
+                     "redirect": True, "redirlinks": []}
+                    for r in aliases
+                ] + items
+            start, limit = int(params.get("blcontinue", 0)), self._limit(params.get("bllimit"))
+            data = {"query": {"backlinks": items[start:start + limit]}}
+            if start + limit < len(items):
+                data["continue"] = {"blcontinue": str(start + limit), "continue": "-||"}
+            return data
+
+        prop = params.get("prop")
+        if prop in ("links", "linkshere"):
+            short = "pl" if prop == "links" else "lh"
+            limit = self._limit(params.get(f"{short}limit"))
+            page_no, offset = (int(x) for x in params.get(f"{short}continue", "0|0").split("|"))
+
+            pages, budget, redirects = [], limit, []
+            titles = [t for t in params.get("titles", "").split("|") if t][:50]
+            for i, title in enumerate(titles):
+                node, redirected = self.resolve(lang, title)
+                if node is None:
+                    pages.append({"ns": 0, "title": title, "missing": True})
+                    continue
+                page = {"ns": 0, "title": self.graph.title(node)}
+                if redirected:
+                    redirects.append({"from": title.replace("_", " "), "to": page["title"]})
+                if i >= page_no and budget > 0:
+                    adjacent = self.graph.neighbors(node) if prop == "links" else self.graph.in_neighbors(node)
+                    items = self._titles(lang, adjacent)
+                    start = offset if i == page_no else 0
+                    page[prop] = items[start:start + budget]
+                    budget -= len(page[prop])
+                    if start + len(page[prop]) < len(items):
+                        pages.append(page)
+                        return {
+                            "continue": {f"{short}continue": f"{i}|{start + len(page[prop])}", "continue": "||"},
+                            "query": self._pages_query(pages, redirects, params),
+                        }
+                pages.append(page)
+            return {"query": self._pages_query(pages, redirects, params)}
+
+        return {"error": {"code": "badvalue", "info": "unsupported query"}}
+
+
+# --------------------------------------------------------------------
+# Fault injection: latency, errors, throttling
+# --------------------------------------------------------------------
+class FaultInjector:
+    """
+    latency_ms     median added latency; the spread is log-normal with
+                   `latency_sigma`, which gives a realistic long tail
+    error_rate     share of requests answered with 500 / 503
+    throttle_rate  share answered with 429 + Retry-After
+    max_rps        token bucket; requests beyond it get 429 (0 = unlimited)
+    """
+
+    def __init__(self, latency_ms: float = 0.0, latency_sigma: float = 0.5, error_rate: float = 0.0,
+                 throttle_rate: float = 0.0, max_rps: float = 0.0, seed: int = 0):
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.max_rps = max_rps
+
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._tokens = max_rps
+        self._refilled = time.monotonic()
+
+    def _take_token(self) -> bool:
+        now = time.monotonic()
+        self._tokens = min(self.max_rps, self._tokens + (now - self._refilled) * self.max_rps)
+        self._refilled = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    def decide(self) -> Tuple[float, Optional[int]]:
+        """(seconds to delay, forced status or None)."""
+        with self._lock:
+            delay = 0.0
+            if self.latency_ms > 0:
+                delay = self.latency_ms / 1000 * self._rng.lognormvariate(0.0, self.latency_sigma)
+            if self.max_rps > 0 and not self._take_token():
+                return delay, 429
+            roll = self._rng.random()
+            if roll < self.throttle_rate:
+                return delay, 429
+            if roll < self.throttle_rate + self.error_rate:
+                return delay, self._rng.choice((500, 503))
+        return delay, None
+
+
+class ServerStats:
+    def __init__(self, window: int = 100000):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.requests = 0
+        self.by_status = {}
+        self._latencies = deque(maxlen=window)
+
+    def record(self, status: int, seconds: float):
+        with self._lock:
+            self.requests += 1
+            self.by_status[status] = self.by_status.get(status, 0) + 1
+            self._latencies.append(seconds)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            latencies = sorted(self._latencies)
+            uptime = time.time() - self.started
+            data = {
+                "requests": self.requests,
+                "by_status": {str(k): v for k, v in sorted(self.by_status.items())},
+                "uptime_s": round(uptime, 1),
+                "rps": round(self.requests / uptime, 1) if uptime else 0.0,
+            }
+        if latencies:
+            for p in (50, 90, 99, 99.9):
+                data[f"p{p}_ms"] = round(latencies[min(len(latencies) - 1, int(len(latencies) * p / 100))] * 1000, 2)
+        return data
+
+
+# --------------------------------------------------------------------
+# HTTP
+# --------------------------------------------------------------------
+class WikiRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real site
+    site: WikiSite = None
+    faults: FaultInjector = None
+    stats: ServerStats = None
+
+    def log_message(self, format, *args):
+        pass  # one line per request would dominate a load test
+
+    def _split(self):
+        """(lang, path within the edition, query params)."""
+        parsed = urlparse(self.path)
+        path = parsed.path
+        lang = self.site.langs[0]
+
+        host_lang = (self.headers.get("Host") or "").split(".", 1)[0]
+        parts = path.split("/", 2)
+        if len(parts) > 2 and parts[1] in self.site.langs:
+            lang, path = parts[1], "/" + parts[2]
+        elif host_lang in self.site.langs:
+            lang = host_lang
+        return lang, path, {k: v[-1] for k, v in parse_qs(parsed.query).items()}
+
+    def _send(self, status: int, body: bytes, content_type: str, headers: Optional[dict] = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def do_HEAD(self):
+        self.do_GET()
+
+    def do_GET(self):
+        started = time.perf_counter()
+        status = 500
+        try:
+            status = self._handle()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        except Exception as e:
+            logger.exception(f"Error serving {self.path}: {e}")
+            self._send(500, b"internal error", "text/plain")
+        finally:
+            if not self.path.startswith("/_stats"):
+                self.stats.record(status, time.perf_counter() - started)
+
+    def _handle(self) -> int:
+        if self.path.startswith("/_stats"):
+            self._send(200, json.dumps(self.stats.snapshot()).encode(), "application/json")
+            return 200
+
+        delay, forced = self.faults.decide()
+        if delay:
+            time.sleep(delay)
+        if forced == 429:
+            self._send(429, b"Too many requests", "text/plain", {"Retry-After": "1"})
+            return 429
+        if forced is not None:
+            self._send(forced, b"Server error", "text/plain")
+            return forced
+
+        lang, path, params = self._split()
+        if path == "/w/api.php":
+            data = self.site.api(lang, params)
+            self._send(200, json.dumps(data).encode(), "application/json; charset=utf-8")
+            return 200
+
+        if not path.startswith("/wiki/"):
+            self._send(404, b"not found", "text/plain")
+            return 404
+
+        title = unquote(path[len("/wiki/"):])
+        node, _ = self.site.resolve(lang, title)
+        if node is not None and self.headers.get("If-None-Match") == self.site.etag(lang, node):
+            self._send(304, b"", "text/html; charset=utf-8", {"ETag": self.site.etag(lang, node)})
+            return 304
+
+        status, html, node = self.site.page(lang, title)
+        headers = {"ETag": self.site.etag(lang, node)} if node is not None else {}
+        self._send(status, html.encode("utf-8"), "text/html; charset=utf-8", headers)
+        return status
+
+
+def make_server(site: WikiSite, faults: FaultInjector, host: str = "127.0.0.1", port: int = 8765) -> ThreadingHTTPServer:
+    handler = type("Handler", (WikiRequestHandler,), {"site": site, "faults": faults, "stats": ServerStats()})
+    ThreadingHTTPServer.request_queue_size = 256
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--graph", required=True, help="link graph directory (generated there if missing)")
+    parser.add_argument("--synthetic-nodes", type=int, default=0, help="generate a topical wiki of this size")
+    parser.add_argument("--avg-degree", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--langs", default="en,simple,es,fr,de", help="editions; the first one has every page")
+    parser.add_argument("--lang-coverage", type=float, default=0.5, help="share of pages in the other editions")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--latency-sigma", type=float, default=0.5)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--max-rps", type=float, default=0.0)
+    args = parser.parse_args()
+
+    if not os.path.exists(os.path.join(args.graph, "meta.json")):
+        if not args.synthetic_nodes:
+            parser.error(f"no graph in {args.graph}; pass --synthetic-nodes to generate one")
+        start = time.time()
+        synthetic_graph(args.graph, args.synthetic_nodes, args.avg_degree, args.seed)
+        logger.info(f"Generated {args.synthetic_nodes} pages in {time.time() - start:.1f}s")
+
+    graph = LinkGraph(args.graph)
+    if not graph.has_reverse:
+        logger.warning("Graph has no reverse adjacency; backlink API queries will fail.")
+
+    site = WikiSite(graph, [lang.strip() for lang in args.langs.split(",") if lang.strip()], args.lang_coverage)
+    faults = FaultInjector(args.latency_ms, args.latency_sigma, args.error_rate, args.throttle_rate,
+                           args.max_rps, args.seed)
+    server = make_server(site, faults, args.host, args.port)
+    logger.info(
+        f"Serving {graph.num_nodes} pages on http://{args.host}:{args.port}/<lang>/wiki/... "
+        f"(set WIKIGAME_WIKI_BASE_URL='http://{args.host}:{args.port}/{{lang}}')"
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()